@@ -1,19 +1,39 @@
 #!/usr/bin/env python3
 """
-add_progressions.py — Ajoute le champ progression_to à chaque exercice.
+add_progressions.py — Compile les chaînes de progression dans le catalogue.
 
 Les chaînes de progression reflètent une difficulté croissante
 au sein du même patron de mouvement.
 Exercices sans suite = null (fins de chaîne ou exercices isolés).
+
+Le graphe CHAINS est validé avant toute écriture (erreur = rien n'est écrit) :
+  - chaque exercice du catalogue a une entrée, et chaque entrée un exercice
+  - pas de cible inexistante, pas de lien entre catégories, pas de cycle
+Avertissements (non bloquants) : cible plus facile que la source,
+échelon inaccessible depuis un exercice de difficulté 1.
+
+Champs calculés pour chaque exercice :
+  progression_to    exercice suivant (ou null)
+  regression_from   exercices dont c'est la suite (index inverse)
+  progression_path  toutes les suites, dans l'ordre (fermeture transitive)
+  ladder            id du sommet de l'échelle (fin de chaîne)
+  ladder_depth      rang dans l'échelle (0 = point d'entrée)
+
+Usage :
+  python3 add_progressions.py [--check]
 """
-import json
-import glob
+import argparse
 import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scripts'))
+from catalog import Catalog, format_changes  # noqa: E402
 
 # ── Chaînes de progression explicites ──────────────────────────────────────
 # Format : { exercise_id: next_exercise_id_or_None }
 CHAINS = {
     # ── PUSH ────────────────────────────────────────────────────────────────
+    'push_wall':       'push_incline',
     'push_incline':    'push_knee',
     'push_knee':       'push_standard',
     'push_standard':   'push_close',
@@ -38,6 +58,9 @@ CHAINS = {
     'reverse_snow_angel':      None,
     'wall_slide':              None,
     'scapular_pushup':         None,
+    'prone_t_raise':           'prone_y_raise',
+    'prone_y_raise':           None,
+    'table_row_single_arm':    None,
 
     # ── SQUAT ───────────────────────────────────────────────────────────────
     'wall_sit':             'squat_bodyweight',
@@ -53,9 +76,12 @@ CHAINS = {
     'split_squat':          'pistol_squat_assisted',
     'pistol_squat_assisted': None,
     'squat_jump':           None,
+    'heel_elevated_squat':  'squat_pulse',
+    'squat_cossack':        None,
 
     # ── HINGE ───────────────────────────────────────────────────────────────
-    'hip_hinge_wall':       'glute_bridge',
+    'hip_hinge_wall':       'frog_pump',
+    'frog_pump':            'glute_bridge',
     'glute_bridge':         'glute_bridge_march',
     'glute_bridge_march':   'glute_bridge_single',
     'glute_bridge_single':  'hip_thrust_bodyweight',
@@ -83,6 +109,7 @@ CHAINS = {
     'bird_dog':             None,
     'hollow_hold':          None,
     'kegel':                None,
+    'plank_walkout':        None,
 
     # ── MOBILITY ────────────────────────────────────────────────────────────
     # Les étirements/mobilité n'ont pas de progression directe
@@ -99,33 +126,150 @@ CHAINS = {
     'thread_needle':        None,
     'lizard_pose':          None,
     'couch_stretch':        None,
+    'downward_dog':         None,
+    'standing_quad_stretch': None,
 }
 
 
+def compile_graph(exercises, chains):
+    """
+    Valide le graphe de progression et calcule les champs dérivés.
+    Retourne (champs par id, erreurs, avertissements).
+    """
+    by_id    = {ex['id']: ex for ex in exercises}
+    errors   = []
+    warnings = []
+
+    for ex_id in by_id:
+        if ex_id not in chains:
+            errors.append(f'{ex_id} : absent de CHAINS (mettre None si fin de chaîne)')
+    for ex_id, target in chains.items():
+        if ex_id not in by_id:
+            errors.append(f'{ex_id} : dans CHAINS mais absent du catalogue')
+        elif target is not None and target not in by_id:
+            errors.append(f'{ex_id} → {target} : cible inexistante')
+        elif target is not None and by_id[target]['category'] != by_id[ex_id]['category']:
+            errors.append(f'{ex_id} → {target} : change de catégorie '
+                          f'({by_id[ex_id]["category"]} → {by_id[target]["category"]})')
+        elif target is not None and by_id[target]['difficulty'] < by_id[ex_id]['difficulty']:
+            warnings.append(f'{ex_id} → {target} : cible plus facile '
+                            f'({by_id[ex_id]["difficulty"]} → {by_id[target]["difficulty"]})')
+    if errors:
+        return None, errors, warnings
+
+    nxt = {ex_id: chains[ex_id] for ex_id in by_id}
+    regression_from = {ex_id: [] for ex_id in by_id}
+    for ex_id, target in nxt.items():
+        if target is not None:
+            regression_from[target].append(ex_id)
+
+    # Chemins vers l'avant : un seul successeur par exercice, donc un cycle
+    # se détecte en revenant sur un id déjà vu pendant la marche. Chaque
+    # membre (et chaque exercice qui y mène) le retrouve : un seul message
+    # par cycle, qui commence par son plus petit id.
+    paths  = {}
+    cycles = {}
+    for ex_id in by_id:
+        path, seen, cur = [], {ex_id}, nxt[ex_id]
+        while cur is not None:
+            if cur in seen:
+                walk  = [ex_id, *path]
+                loop  = walk[walk.index(cur):]
+                start = loop.index(min(loop))
+                cycles.setdefault(loop[start], loop[start:] + loop[:start])
+                break
+            seen.add(cur)
+            path.append(cur)
+            cur = nxt[cur]
+        paths[ex_id] = path
+    for loop in cycles.values():
+        errors.append(f'cycle : {" → ".join([*loop, loop[0]])}')
+    if errors:
+        return None, errors, warnings
+
+    depth = {}
+
+    def ladder_depth(ex_id):
+        if ex_id not in depth:
+            depth[ex_id] = max((ladder_depth(p) + 1 for p in regression_from[ex_id]), default=0)
+        return depth[ex_id]
+
+    # Accessible = atteignable en progressant depuis un exercice de difficulté 1
+    reachable = set()
+    for ex_id, ex in by_id.items():
+        if ex['difficulty'] == 1:
+            reachable.add(ex_id)
+            reachable.update(paths[ex_id])
+    for ex_id in by_id:
+        in_ladder = paths[ex_id] or regression_from[ex_id]
+        if in_ladder and ex_id not in reachable:
+            warnings.append(f'{ex_id} : inaccessible depuis un exercice de difficulté 1')
+
+    fields = {
+        ex_id: {
+            'progression_to':   nxt[ex_id],
+            'regression_from':  regression_from[ex_id],
+            'progression_path': paths[ex_id],
+            'ladder':           paths[ex_id][-1] if paths[ex_id] else ex_id,
+            'ladder_depth':     ladder_depth(ex_id),
+        }
+        for ex_id in by_id
+    }
+    return fields, errors, warnings
+
+
 def main():
-    pattern = os.path.join(os.path.dirname(__file__), 'web/data/exercises/*.json')
-    files   = sorted(glob.glob(pattern))
-    total   = 0
+    parser = argparse.ArgumentParser(description='Compile les chaînes de progression')
+    parser.add_argument('--check', action='store_true',
+                        help="Valide seulement ; code 1 si erreur ou fichiers à régénérer")
+    args = parser.parse_args()
 
-    for path in files:
-        fname = os.path.basename(path)
-        if fname in ('LICENSE', 'image_prompts.txt'):
-            continue
-        with open(path, encoding='utf-8') as f:
-            data = json.load(f)
+    catalog = Catalog()
+    fields, errors, warnings = compile_graph(catalog.exercises(), CHAINS)
+    for msg in warnings:
+        print(f'  ⚠ {msg}')
+    if errors:
+        for msg in errors:
+            print(f'  ✗ {msg}', file=sys.stderr)
+        print(f'\n{len(errors)} erreur(s) dans CHAINS — aucun fichier modifié', file=sys.stderr)
+        sys.exit(1)
 
-        for ex in data:
-            ex['progression_to'] = CHAINS.get(ex['id'], None)
+    total  = 0
+    stale  = []
+    for category in catalog.categories:
+        path  = catalog.path(category)
+        fname = path.name
+        data  = catalog.records(category)
 
-        with open(path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
-            f.write('\n')
+        for ex in data:
+            before = {k: ex.get(k) for k in fields[ex['id']]}
+            if before != fields[ex['id']]:
+                stale.append(ex['id'])
+            ex.update(fields[ex['id']])
 
         annotated = sum(1 for ex in data if ex['progression_to'])
         print(f'  {fname:20s} {len(data):3d} ex  ({annotated} avec progression)')
         total += len(data)
 
-    print(f'\n✓ {total} exercices annotés dans {len(files)} fichiers')
+    ladders = {f['ladder'] for f in fields.values() if f['progression_path'] or f['regression_from']}
+    longest = max(len(f['progression_path']) + 1 for f in fields.values())
+    print(f'\n{len(ladders)} échelles, la plus longue : {longest} exercices')
+
+    if args.check:
+        if stale:
+            print(f'✗ {len(stale)} exercices à régénérer : python3 add_progressions.py', file=sys.stderr)
+            sys.exit(1)
+        print('✓ catalogue à jour')
+        return
+
+    changed = catalog.save()
+    for category, changes in changed.items():
+        print(f'  ✎ {category}.json : {format_changes(changes)}')
+
+    print(f'\n✓ {total} exercices annotés dans {len(catalog.categories)} fichiers '
+          f'({len(changed)} modifiés)')
+    if changed:
+        print('→ python3 scripts/build_bundle.py pour régénérer le catalogue de la PWA')
 
 
 if __name__ == '__main__':
@@ -2,68 +2,38 @@
 """
 generate_image_prompts.py — Génère des prompts image pour chaque exercice OOPS
 
-Usage : python3 generate_image_prompts.py
+Usage : python3 generate_image_prompts.py [--jsonl batch.jsonl]
 Output : web/data/exercises/image_prompts.txt
 
 Un prompt par exercice, formaté pour DALL-E 3 / ChatGPT / Nano Banana.
 Chaque prompt produit un comic strip 3 panneaux horizontal (ratio 3:1).
+
+Les prompts sont rendus par make_prompt() de scripts/gen_exercise_images.py
+(STYLE_PREFIX + VISUAL_HINTS) : le fichier texte, le lot JSONL et la génération
+via l'API utilisent exactement le même texte, donc le même hash de prompt.
+
+--jsonl écrit en plus un lot machine (une ligne {id, prompt_sha256, prompt}
+par exercice) à soumettre avec scripts/batch_images.py.
 """
 
-import json
-import glob
+import argparse
 import os
+import sys
 
-# ── Style commun à tous les prompts ──────────────────────────────────────────
-STYLE_PREFIX = (
-    "3-panel horizontal comic strip, minimalist flat illustration style, "
-    "bold black outlines, pure white background. "
-    "The character is a non-gendered rounded figure: smooth oval head, "
-    "no facial features, no hair, gender-neutral body with simple rounded limbs. "
-    "Panels flow left-to-right showing: "
-    "[Panel 1] starting position → [Panel 2] mid-movement → [Panel 3] peak or return position. "
-    "Flat colors only, no gradients, no shadows. "
-    "Accent colors: forest green #2D6A4F for the figure body, "
-    "orange #F4A261 for motion highlights or active limbs. "
-    "No text, no numbers, no labels anywhere. "
-    "Consistent figure size and style across all 3 panels. "
-    "Landscape format 3:1 ratio. "
-)
-
-STYLE_SUFFIX = (
-    "Clean, friendly, app illustration aesthetic. "
-    "Each panel separated by a thin black line."
-)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "scripts"))
+from catalog import Catalog  # noqa: E402
+from gen_exercise_images import batch_record, make_prompt, write_batch_file  # noqa: E402
 
 
 def load_all_exercises():
-    exercises = []
-    pattern = os.path.join(os.path.dirname(__file__), "web/data/exercises/*.json")
-    for path in sorted(glob.glob(pattern)):
-        fname = os.path.basename(path)
-        if fname == "LICENSE":
-            continue
-        with open(path, encoding="utf-8") as f:
-            data = json.load(f)
-        if isinstance(data, list):
-            exercises.extend(data)
-    return exercises
-
-
-def make_prompt(ex):
-    name    = ex.get("name_en") or ex.get("name_fr", ex["id"])
-    instr   = ex.get("instructions_en") or ex.get("instructions_fr", "")
-    cat     = ex.get("category", "")
-    pattern = ex.get("movement_pattern", "")
-
-    exercise_block = (
-        f"Exercise: {name} ({cat} / {pattern}).\n"
-        f"Movement: {instr}"
-    )
-
-    return f"{STYLE_PREFIX}{exercise_block} {STYLE_SUFFIX}"
+    return Catalog().exercises()
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Génère les prompts image de chaque exercice")
+    parser.add_argument('--jsonl', metavar='PATH', help="Écrit aussi un lot JSONL pour batch_images.py")
+    args = parser.parse_args()
+
     exercises = load_all_exercises()
 
     out_path = os.path.join(
@@ -88,6 +58,10 @@ def main():
     print("Tip: open image_prompts.txt, copie un bloc, colle-le dans ChatGPT/Nano Banana.")
     print("     Demande 'wide landscape 3:1 format' si l'outil le supporte.")
 
+    if args.jsonl:
+        write_batch_file(args.jsonl, [batch_record(ex, make_prompt(ex)) for ex in exercises])
+        print(f"✓ {len(exercises)} prompts → {args.jsonl} (python3 scripts/batch_images.py run {args.jsonl})")
+
 
 if __name__ == "__main__":
     main()
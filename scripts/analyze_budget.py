@@ -0,0 +1,405 @@
+#!/usr/bin/env python3
+"""
+analyze_budget.py — What a first visit downloads, in which order, and whether
+it fits the byte budgets in scripts/budgets.json.
+
+Usage:
+  python3 scripts/analyze_budget.py [--lang fr] [--profile slow-4g]
+  python3 scripts/analyze_budget.py --check            # exit 1 over budget
+  python3 scripts/analyze_budget.py --json budget.json
+  python3 scripts/analyze_budget.py --fetch-external   # measure CDN modules
+
+The request graph is read from the sources, not from a browser trace:
+
+  index.html        <link> / <script src> subresources and the importmap
+  web/js/**         static import / export-from graph, bare specifiers resolved
+                    through the importmap (dexie → CDN, oops → web/pkg/oops.js)
+  boot()            the awaited fetches of boot() in web/js/app.js, in order:
+                    the WASM binary, the UI strings, then the catalog bundle and
+                    its string table. BOOT_STEPS is maintained by hand, not
+                    extracted from app.js; check_boot_steps() (run on every
+                    invocation, fatal with --check) verifies that boot() still
+                    awaits each listed call in that order and that each URL
+                    is still requested from web/js (web/pkg for the WASM glue)
+  service worker    PRECACHE_MANIFEST in web/service-worker.js: on install every
+                    entry is downloaded again with cache 'reload'
+  first session     the atlas sheets of the home screen, then one illustration
+                    per exercise of the heaviest plan of the first week for a
+                    default new profile (scripts/simulate_sessions.py), in the
+                    format and width the <picture> srcset picks on VIEWPORT
+
+Phases: boot (until the first screen renders), onboarding (the service worker
+install that runs while the user fills in the form) and first_session.
+Transfer sizes are gzip level 9 for text formats (what precompress.py
+serves), raw for images and WASM that is not compressible further.
+
+The critical path is the longest chain of requests that can only start once
+the previous one has finished (document → module → import → ... → boot
+steps). Its time is estimated per chain level as one round trip plus the
+level's transfer at the --profile bandwidth (dev_server.py PROFILES).
+
+External modules are not in the repo: their sizes come from EXTERNAL_SIZES
+(approximate) unless --fetch-external downloads them.
+
+Requirements:
+  none
+"""
+
+import argparse
+import json
+import re
+import sys
+import urllib.parse
+import urllib.request
+from collections import defaultdict
+from html.parser import HTMLParser
+from pathlib import Path
+
+from build_precache import SERVICE_WORKER, WEB_DIR
+from catalog import Catalog, write_atomic
+from dev_server import PROFILES
+from precompress import COMPRESSIBLE, compress
+from simulate_sessions import as_profile, build_session
+
+BUDGETS_PATH = Path(__file__).parent / "budgets.json"
+INDEX_HTML   = WEB_DIR / "index.html"
+JS_DIR       = WEB_DIR / "js"
+
+APP_JS       = JS_DIR / "app.js"
+PKG_DIR      = WEB_DIR / "pkg"
+
+# Hand-maintained: (call awaited by boot() in web/js/app.js, URLs it fetches),
+# in boot() order, once the module graph has run. See check_boot_steps().
+BOOT_STEPS = (
+    ("init()", ("/pkg/oops_bg.wasm",)),
+    ("initI18n(lang)", ("/locales/{lang}.json",)),
+    ("loadExercises(lang)", ("/data/catalog.json", "/locales/exercises.{lang}.json")),
+)
+# Approximate (raw, gzip) bytes of the CDN modules in the importmap
+EXTERNAL_SIZES = {
+    "https://cdn.jsdelivr.net/npm/dexie@3.2.6/dist/dexie.mjs": (170_000, 45_000),
+}
+# Pixel 7 (the Playwright device): CSS width, device pixel ratio
+VIEWPORT = (412, 2.625)
+# Slot of .session-ex-img, the `sizes` attribute in web/js/ui/session.js
+IMAGE_SLOT_PX = 540
+IMAGE_TYPES = ("image/avif", "image/webp")
+# Default onboarding answers, and how many days of plans count as "first session"
+FIRST_PROFILE = as_profile("under_35", "beginner", False, (), 30)
+FIRST_WEEK_SEEDS = 7
+
+IMPORT_RE = re.compile(
+    r"^\s*(?:import|export)\s+(?:[\w$*{}\s,]+?\s+from\s+)?['\"]([^'\"]+)['\"]", re.M,
+)
+ENTRY_RE = re.compile(r"\{ url: '([^']+)', revision: (?:'[^']+'|null) \}")
+SRCSET_ITEM_RE = re.compile(r"(\S+)\s+(\d+)w")
+
+
+class Request:
+    def __init__(self, url, parent=None, phase="boot", kind="static"):
+        self.url = url
+        self.parent = parent
+        self.phase = phase
+        self.kind = kind
+        self.raw = 0
+        self.transfer = 0
+        self.missing = False
+
+    @property
+    def depth(self):
+        return 1 if self.parent is None else self.parent.depth + 1
+
+
+class DocumentParser(HTMLParser):
+    """Subresources and importmap of index.html."""
+
+    def __init__(self):
+        super().__init__()
+        self.resources = []
+        self.importmap = {}
+        self._in_importmap = False
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == "link" and attrs.get("rel") in ("stylesheet", "manifest", "icon", "modulepreload"):
+            self.resources.append(attrs["href"])
+        elif tag == "script" and attrs.get("type") == "importmap":
+            self._in_importmap = True
+        elif tag == "script" and attrs.get("src"):
+            self.resources.append(attrs["src"])
+
+    def handle_endtag(self, tag):
+        if tag == "script":
+            self._in_importmap = False
+
+    def handle_data(self, data):
+        if self._in_importmap and data.strip():
+            self.importmap = json.loads(data).get("imports", {})
+
+
+def is_external(url):
+    return url.startswith(("http://", "https://"))
+
+
+def local_path(url):
+    return WEB_DIR / urllib.parse.urlsplit(url).path.lstrip("/")
+
+
+def resolve(specifier, importer, importmap):
+    """URL of an import specifier, as the browser resolves it."""
+    if specifier in importmap:
+        specifier = importmap[specifier]
+        importer = "/index.html"
+    if is_external(specifier):
+        return specifier
+    return urllib.parse.urljoin(importer, specifier)
+
+
+def measure(req, fetch_external=False):
+    if is_external(req.url):
+        if fetch_external:
+            with urllib.request.urlopen(req.url, timeout=30) as resp:
+                data = resp.read()
+            req.raw, req.transfer = len(data), len(compress(data, "gz", ".js"))
+        else:
+            req.raw, req.transfer = EXTERNAL_SIZES.get(req.url, (0, 0))
+            req.missing = req.url not in EXTERNAL_SIZES
+        return
+    path = local_path(req.url)
+    if path.is_dir():
+        path = path / "index.html"
+    if not path.is_file():
+        req.missing = True
+        return
+    data = path.read_bytes()
+    req.raw = len(data)
+    req.transfer = len(compress(data, "gz", path.suffix)) if path.suffix in COMPRESSIBLE else len(data)
+    req.transfer = min(req.transfer, req.raw)
+
+
+def module_graph(entry, importmap, requests):
+    """Breadth-first static import graph from `entry`; adds every module to `requests`."""
+    queue = [entry]
+    while queue:
+        module = queue.pop(0)
+        if is_external(module.url):
+            continue
+        path = local_path(module.url)
+        if not path.is_file():
+            continue
+        for specifier in IMPORT_RE.findall(path.read_text(encoding="utf-8")):
+            url = resolve(specifier, module.url, importmap)
+            if url not in requests:
+                requests[url] = Request(url, module, kind="module")
+                queue.append(requests[url])
+
+
+def check_boot_steps():
+    """
+    Problems with BOOT_STEPS against the sources: a call boot() no longer
+    awaits (or awaits in another order), a URL no script requests any more.
+    /pkg/ URLs are looked up by file name in the wasm-pack glue, when built.
+    """
+    problems = []
+    body = re.search(r"^async function boot\(\) \{\n(.*?)^\}", APP_JS.read_text(encoding="utf-8"), re.S | re.M)
+    if not body:
+        return [f"async function boot() not found in {APP_JS.relative_to(WEB_DIR.parent)}"]
+    last = -1
+    for call, _urls in BOOT_STEPS:
+        at = body.group(1).find(f"await {call}")
+        if at < 0:
+            problems.append(f"boot() no longer awaits {call}")
+        elif at < last:
+            problems.append(f"boot() awaits {call} earlier than BOOT_STEPS lists it")
+        last = max(last, at)
+
+    scripts = "".join(p.read_text(encoding="utf-8") for p in sorted(JS_DIR.rglob("*.js")))
+    glue = sorted(PKG_DIR.glob("*.js"))
+    for _call, urls in BOOT_STEPS:
+        for url in urls:
+            if url.startswith("/pkg/"):
+                name = url.rsplit("/", 1)[1]
+                if glue and not any(name in p.read_text(encoding="utf-8") for p in glue):
+                    problems.append(f"{url}: not referenced by the wasm-pack glue in web/pkg")
+            elif url.replace("{lang}", "${lang}") not in scripts:
+                problems.append(f"{url}: not requested by any script in web/js")
+    return problems
+
+
+def pick_image(record):
+    """URL of the illustration the <picture> of session.js loads on VIEWPORT."""
+    css_width, dpr = VIEWPORT
+    needed = min(css_width, IMAGE_SLOT_PX) * dpr
+    srcset = record.get("image_srcset") or {}
+    for mime in IMAGE_TYPES:
+        if mime in srcset:
+            candidates = sorted((int(w), url) for url, w in SRCSET_ITEM_RE.findall(srcset[mime]))
+            return next((url for w, url in candidates if w >= needed), candidates[-1][1])
+    return record.get("image_url")
+
+
+def first_session_images(exercises):
+    """Image URLs of the heaviest plan of the first week for FIRST_PROFILE."""
+    by_id = {ex["id"]: ex for ex in exercises}
+    best, best_bytes = [], -1
+    for seed in range(FIRST_WEEK_SEEDS):
+        urls = [pick_image(by_id[item["exercise_id"]]) for item in build_session(FIRST_PROFILE, exercises, seed)]
+        urls = [u for u in dict.fromkeys(urls) if u]
+        size = sum(local_path(u).stat().st_size for u in urls if local_path(u).is_file())
+        if size > best_bytes:
+            best, best_bytes = urls, size
+    return best
+
+
+def build_requests(lang, fetch_external=False):
+    """Every first-visit request, keyed by URL, each with its discovering parent."""
+    parser = DocumentParser()
+    parser.feed(INDEX_HTML.read_text(encoding="utf-8"))
+
+    requests = {}
+    document = requests["/"] = Request("/", kind="document")
+    for href in parser.resources:
+        url = resolve(href, "/index.html", {})
+        requests[url] = Request(url, document, kind="module" if url.endswith(".js") else "static")
+    for req in list(requests.values()):
+        if req.kind == "module":
+            module_graph(req, parser.importmap, requests)
+
+    # boot() starts once every module of the graph has loaded and run
+    parent = max(requests.values(), key=lambda r: r.depth)
+    for _call, urls in BOOT_STEPS:
+        step_requests = [Request(url.format(lang=lang), parent, kind="fetch") for url in urls]
+        for req in step_requests:
+            requests[req.url] = req
+        parent = step_requests[0]
+
+    worker = requests["/service-worker.js"] = Request("/service-worker.js", parent, "onboarding", "worker")
+    source = SERVICE_WORKER.read_text(encoding="utf-8")
+    for url in ENTRY_RE.findall(source):
+        key = f"{url}?__precache"   # downloaded again, even if the page already has it
+        requests[key] = Request(url, worker, "onboarding", "precache")
+
+    catalog = Catalog()
+    exercises = catalog.exercises()
+    atlas_path = WEB_DIR / "icons" / "atlas" / "atlas.json"
+    sheets = json.loads(atlas_path.read_text(encoding="utf-8"))["sheets"] if atlas_path.exists() else []
+    home = parent
+    for sheet in sheets:
+        requests[sheet["url"]] = home = Request(sheet["url"], parent, "first_session", "image")
+    for url in first_session_images(exercises):
+        requests[url] = Request(url, home, "first_session", "image")
+
+    for req in requests.values():
+        measure(req, fetch_external)
+    return requests
+
+
+def critical_path(requests, latency_s, bytes_per_s):
+    """(chain of Requests, estimated seconds) of the boot phase."""
+    boot = [r for r in requests.values() if r.phase == "boot"]
+    levels = defaultdict(int)
+    for r in boot:
+        levels[r.depth] += r.transfer
+    seconds = sum(latency_s + size / bytes_per_s for size in levels.values())
+    last = max(boot, key=lambda r: (r.depth, r.transfer))
+    chain = []
+    while last is not None:
+        chain.append(last)
+        last = last.parent
+    return chain[::-1], seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description="First-visit byte budget and critical path")
+    parser.add_argument("--lang", default="fr", choices=("fr", "en"))
+    parser.add_argument("--profile", default=None, choices=PROFILES,
+                        help="Network profile for the time estimate (default: from budgets.json)")
+    parser.add_argument("--budgets", default=str(BUDGETS_PATH), help="Budget file")
+    parser.add_argument("--json", metavar="PATH", help="Write every request and the totals as JSON")
+    parser.add_argument("--fetch-external", action="store_true", help="Download CDN modules to measure them")
+    parser.add_argument("--check", action="store_true", help="Exit 1 if a budget is exceeded")
+    parser.add_argument("-v", "--verbose", action="store_true", help="List every request")
+    args = parser.parse_args()
+
+    with open(args.budgets, encoding="utf-8") as f:
+        budgets = json.load(f)
+    profile = args.profile or budgets["profile"]
+    latency_s, kbit_s = PROFILES[profile]
+
+    stale_steps = check_boot_steps()
+    for msg in stale_steps:
+        print(f"  WARN  BOOT_STEPS out of date: {msg}", file=sys.stderr)
+
+    requests = build_requests(args.lang, args.fetch_external)
+    phases = {}
+    for phase in ("boot", "onboarding", "first_session"):
+        members = [r for r in requests.values() if r.phase == phase]
+        phases[phase] = {
+            "requests": len(members),
+            "raw": sum(r.raw for r in members),
+            "transfer": sum(r.transfer for r in members),
+        }
+        if args.verbose:
+            print(f"\n{phase}:")
+            for r in sorted(members, key=lambda r: (r.depth, r.url)):
+                print(f"  {r.depth:2d}  {r.kind:8s} {r.transfer:9,d} B  {r.url}"
+                      + ("  (missing)" if r.missing else ""))
+
+    print(f"\n  {'phase':14s} {'requests':>8s} {'raw':>12s} {'transfer':>12s} {'budget':>10s}")
+    over = []
+    for phase, totals in phases.items():
+        limit = budgets["phases_kb"].get(phase)
+        kb = totals["transfer"] / 1024
+        flag = ""
+        if limit is not None and kb > limit:
+            over.append(f"{phase}: {kb:,.0f} KB > {limit:,} KB")
+            flag = "  ✗"
+        print(f"  {phase:14s} {totals['requests']:8d} {totals['raw'] / 1024:10,.0f}KB {kb:10,.0f}KB "
+              f"{f'{limit:,}KB' if limit is not None else '-':>10s}{flag}")
+    total = sum(t["transfer"] for t in phases.values())
+    print(f"  {'first visit':14s} {len(requests):8d} {'':12s} {total / 1024:10,.0f}KB")
+
+    chain, seconds = critical_path(requests, latency_s, kbit_s * 1000 / 8)
+    print(f"\nCritical path ({len(chain)} round trips, ~{seconds * 1000:,.0f} ms on {profile}):")
+    for r in chain:
+        print(f"  {'  ' * (r.depth - 1)}→ {r.url}  {r.transfer:,d} B")
+    limit = budgets["critical_path"]
+    if len(chain) > limit["depth"]:
+        over.append(f"critical path: {len(chain)} round trips > {limit['depth']}")
+    # The time budget is set for the budget file's profile only
+    if profile == budgets["profile"] and seconds * 1000 > limit["ms"]:
+        over.append(f"critical path: ~{seconds * 1000:,.0f} ms > {limit['ms']:,} ms on {profile}")
+
+    missing = [r.url for r in requests.values() if r.missing]
+    if missing:
+        print(f"\n  Not measured (not built or unknown size): {', '.join(sorted(set(missing)))}")
+
+    if args.json:
+        report = {
+            "lang": args.lang,
+            "profile": profile,
+            "phases": phases,
+            "critical_path": {"urls": [r.url for r in chain], "estimated_ms": round(seconds * 1000)},
+            "requests": [
+                {"url": r.url, "phase": r.phase, "kind": r.kind, "depth": r.depth,
+                 "raw": r.raw, "transfer": r.transfer, "missing": r.missing}
+                for r in requests.values()
+            ],
+        }
+        write_atomic(Path(args.json), (json.dumps(report, indent=2) + "\n").encode("utf-8"))
+
+    if stale_steps and args.check:
+        print(f"\n✗ BOOT_STEPS no longer matches web/js ({len(stale_steps)} problem(s) above)", file=sys.stderr)
+        sys.exit(1)
+    if over:
+        print(f"\n✗ {len(over)} budget(s) exceeded:", file=sys.stderr)
+        for msg in over:
+            print(f"  {msg}", file=sys.stderr)
+        if args.check:
+            sys.exit(1)
+    else:
+        print("\nWithin budget.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+batch_images.py — Generates exercise images as one asynchronous Gemini batch
+job instead of one interactive call per image.
+
+Usage:
+  python3 scripts/gen_exercise_images.py --batch-file batch.jsonl   # pending images
+  python3 generate_image_prompts.py --jsonl batch.jsonl             # or every exercise
+  export GEMINI_API_KEY="your_api_key"
+  python3 scripts/batch_images.py run batch.jsonl      # submit, wait, apply
+  python3 scripts/batch_images.py submit batch.jsonl   # or step by step
+  python3 scripts/batch_images.py status batch.jsonl
+  python3 scripts/batch_images.py fetch batch.jsonl    # wait if needed, apply
+
+The batch file has one {"id", "prompt_sha256", "prompt"} per line, rendered by
+gen_exercise_images.make_prompt(). The whole file goes out in a single
+batchGenerateContent request; the job name is kept next to it in
+<file>.job, so `fetch` can run later or from another shell. Batch jobs are
+billed at a discount and are not subject to the per-request rate limit, so a
+full regeneration costs one submission and a few polls.
+
+Results go through the same path as interactive runs: each image is written
+atomically to web/icons/exercises/, recorded in scripts/image_manifest.json
+with the model the job was submitted with, and linked in image_url. A result
+whose prompt no longer matches make_prompt(ex) (VISUAL_HINTS edited while the
+job ran) is not applied, nor is an image that fails
+check_images.inspect_master(), blank ones included (left pending, so the next
+--batch-file picks it up again).
+
+--base-url points at a local stand-in (fake_gemini_server.py serves the batch
+endpoints too). Its results go to --output-dir, scripts/.image_scratch/ by
+default, never to the real masters; the manifest there records the endpoint
+and image_url is left alone.
+
+Requirements:
+  pip install pillow numpy   (image checks; the HTTP client is stdlib)
+"""
+
+import argparse
+import base64
+import json
+import os
+import sys
+import time
+import urllib.request
+from pathlib import Path
+
+from catalog import write_atomic
+from check_images import inspect_master
+from gen_exercise_images import (
+    MAX_RETRIES,
+    MODEL,
+    OUTPUT_DIR,
+    SCRATCH_DIR,
+    URL_PREFIX,
+    backoff_delay,
+    is_retryable,
+    load_all_exercises,
+    load_manifest,
+    make_prompt,
+    manifest_entry,
+    manifest_path,
+    read_batch_file,
+    save_exercises_by_file,
+    save_manifest,
+    sha256,
+)
+
+API_URL          = "https://generativelanguage.googleapis.com"
+API_VERSION      = "v1beta"
+POLL_INTERVAL_S  = 30
+PENDING_STATES   = ("BATCH_STATE_PENDING", "BATCH_STATE_RUNNING")
+SUCCEEDED_STATE  = "BATCH_STATE_SUCCEEDED"
+
+
+class BatchClient:
+    """Minimal REST client for the Gemini Batch API (create, get, download results)."""
+
+    def __init__(self, api_key, model, base_url=None, timeout_s=120):
+        self.api_key = api_key
+        self.model = model
+        self.base_url = (base_url or API_URL).rstrip("/")
+        self.timeout_s = timeout_s
+
+    def _request(self, method, path, body=None, raw=False):
+        data = json.dumps(body).encode("utf-8") if body is not None else None
+        for attempt in range(MAX_RETRIES + 1):
+            req = urllib.request.Request(
+                f"{self.base_url}/{path}", data=data, method=method,
+                headers={"x-goog-api-key": self.api_key, "Content-Type": "application/json"},
+            )
+            try:
+                with urllib.request.urlopen(req, timeout=self.timeout_s) as r:
+                    payload = r.read()
+                return payload if raw else json.loads(payload)
+            except Exception as e:
+                if attempt == MAX_RETRIES or not is_retryable(e):
+                    raise
+                delay = backoff_delay(attempt)
+                print(f"  {method} {path}: retry {attempt + 1}/{MAX_RETRIES} in {delay:.1f}s ({e})", file=sys.stderr)
+                time.sleep(delay)
+
+    def create(self, records, display_name):
+        """Submit every record as one inline batch; returns the job name ("batches/...")."""
+        requests = [
+            {
+                "request": {
+                    "contents": [{"parts": [{"text": r["prompt"]}]}],
+                    "generation_config": {"response_modalities": ["IMAGE", "TEXT"]},
+                },
+                "metadata": {"key": r["id"]},
+            }
+            for r in records
+        ]
+        op = self._request("POST", f"{API_VERSION}/models/{self.model}:batchGenerateContent", {
+            "batch": {"display_name": display_name, "input_config": {"requests": {"requests": requests}}},
+        })
+        return op["name"]
+
+    def get(self, name):
+        return self._request("GET", f"{API_VERSION}/{name}")
+
+    def results(self, op):
+        """Yield (key, response, error) for a finished job, inline or file output."""
+        response = op.get("response", {})
+        inlined = response.get("inlinedResponses", {}).get("inlinedResponses")
+        if inlined is not None:
+            for item in inlined:
+                yield item.get("metadata", {}).get("key"), item.get("response"), item.get("error")
+            return
+        responses_file = response.get("responsesFile")
+        if responses_file:
+            text = self._request("GET", f"download/{API_VERSION}/{responses_file}:download?alt=media", raw=True)
+            for line in text.decode("utf-8").splitlines():
+                if line.strip():
+                    item = json.loads(line)
+                    yield item.get("key"), item.get("response"), item.get("error")
+
+
+def job_path(batch_path):
+    return Path(str(batch_path) + ".job")
+
+
+def load_job(batch_path):
+    path = job_path(batch_path)
+    if not path.exists():
+        print(f"ERROR: {path} not found — run `submit` first.", file=sys.stderr)
+        sys.exit(1)
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def job_state(op):
+    return op.get("metadata", {}).get("state", "BATCH_STATE_UNSPECIFIED")
+
+
+def extract_image(response):
+    """Raw image bytes from a GenerateContentResponse (JSON), or None."""
+    for candidate in response.get("candidates", []):
+        for part in candidate.get("content", {}).get("parts", []):
+            inline = part.get("inlineData") or part.get("inline_data")
+            if inline and inline.get("data"):
+                return base64.b64decode(inline["data"])
+    return None
+
+
+def submit(client, batch_path):
+    records = read_batch_file(batch_path)
+    if not records:
+        print(f"{batch_path} is empty — nothing to submit.")
+        return None
+    name = client.create(records, display_name=f"oops-images-{Path(batch_path).stem}")
+    job = {
+        "name": name,
+        "model": client.model,
+        "batch_sha256": sha256(Path(batch_path).read_bytes()),
+        "count": len(records),
+        "submitted_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    write_atomic(job_path(batch_path), (json.dumps(job, indent=2) + "\n").encode("utf-8"))
+    print(f"Submitted {len(records)} prompts as {name}")
+    return job
+
+
+def wait(client, name, poll_interval):
+    started = time.monotonic()
+    while True:
+        op = client.get(name)
+        state = job_state(op)
+        if state not in PENDING_STATES:
+            print(f"  {name}: {state} after {time.monotonic() - started:.0f}s", file=sys.stderr)
+            return op
+        print(f"  {name}: {state}, next poll in {poll_interval:.0f}s", file=sys.stderr)
+        time.sleep(poll_interval)
+
+
+def apply_results(client, op, records, output_dir=OUTPUT_DIR, model=MODEL):
+    """
+    Write every usable image to `output_dir` and record it as made by `model`;
+    returns (saved, skipped, errors). image_url is only set for the real masters.
+    """
+    by_id = {r["id"]: r for r in records}
+    exercises = {ex["id"]: ex for ex in load_all_exercises()}
+    scratch = Path(output_dir).resolve() != OUTPUT_DIR.resolve()
+    endpoint = client.base_url if client.base_url != API_URL else None
+    manifest = load_manifest(manifest_path(output_dir))
+    saved = skipped = errors = 0
+
+    for key, response, error in client.results(op):
+        record, ex = by_id.get(key), exercises.get(key)
+        if record is None or ex is None:
+            print(f"  Warning: result for unknown id {key!r}", file=sys.stderr)
+            skipped += 1
+            continue
+        if error:
+            print(f"  ERROR {key}: {error.get('message', error)}", file=sys.stderr)
+            errors += 1
+            continue
+        prompt = make_prompt(ex)
+        if sha256(prompt) != record["prompt_sha256"]:
+            print(f"  {key}: prompt changed since submission — not applied", file=sys.stderr)
+            skipped += 1
+            continue
+        img_bytes = extract_image(response or {})
+        if img_bytes is None:
+            print(f"  ERROR {key}: no image part returned", file=sys.stderr)
+            errors += 1
+            continue
+        problems, _info = inspect_master(img_bytes)
+        if problems:
+            print(f"  ERROR {key}: {'; '.join(problems)}", file=sys.stderr)
+            errors += 1
+            continue
+        out_path = Path(output_dir) / f"{key}.png"
+        write_atomic(out_path, img_bytes)
+        manifest[key] = manifest_entry(prompt, img_bytes, "gemini", endpoint, model)
+        if not scratch and not ex.get("image_url"):
+            ex["image_url"] = f"{URL_PREFIX}/{out_path.name}"
+        saved += 1
+        print(f"  → saved {out_path.name} ({len(img_bytes) // 1024} KB)")
+
+    save_manifest(manifest, manifest_path(output_dir))
+    if not scratch:
+        save_exercises_by_file(list(exercises.values()))
+    return saved, skipped, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate exercise images as one Gemini batch job")
+    parser.add_argument("command", choices=("run", "submit", "status", "fetch"))
+    parser.add_argument("batch_file", help="JSONL batch (gen_exercise_images.py --batch-file)")
+    parser.add_argument(
+        "--poll-interval", type=float, default=POLL_INTERVAL_S,
+        help=f"Seconds between status polls (default: {POLL_INTERVAL_S})",
+    )
+    parser.add_argument("--base-url", help="Override the API endpoint (e.g. http://127.0.0.1:8765)")
+    parser.add_argument(
+        "--output-dir",
+        help=f"Write images and their manifest here (default: web/icons/exercises, "
+             f"{SCRATCH_DIR.name}/ with --base-url)",
+    )
+    args = parser.parse_args()
+
+    api_key = os.environ.get("GEMINI_API_KEY")
+    if not api_key:
+        print("ERROR: Set GEMINI_API_KEY environment variable.", file=sys.stderr)
+        sys.exit(1)
+
+    client = BatchClient(api_key, MODEL, base_url=args.base_url)
+    if args.command in ("run", "submit"):
+        job = submit(client, args.batch_file)
+        if job is None or args.command == "submit":
+            return
+    else:
+        job = load_job(args.batch_file)
+        if job["batch_sha256"] != sha256(Path(args.batch_file).read_bytes()):
+            print(f"  Warning: {args.batch_file} changed since submission", file=sys.stderr)
+
+    if args.command == "status":
+        op = client.get(job["name"])
+        print(f"{job['name']}: {job_state(op)} ({job['count']} prompts, submitted {job['submitted_at']})")
+        return
+
+    op = wait(client, job["name"], args.poll_interval)
+    if job_state(op) != SUCCEEDED_STATE:
+        print(f"ERROR: batch {job['name']} ended in {job_state(op)}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.output_dir:
+        output_dir = Path(args.output_dir)
+    else:
+        output_dir = SCRATCH_DIR if args.base_url else OUTPUT_DIR
+    scratch = output_dir.resolve() != OUTPUT_DIR.resolve()
+    if scratch:
+        print(f"Writing to {output_dir} (scratch: masters, manifest and image_url untouched)", file=sys.stderr)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    records = read_batch_file(args.batch_file)
+    saved, skipped, errors = apply_results(client, op, records, output_dir, job.get("model", MODEL))
+    print(f"\nSaved: {saved}, Skipped: {skipped}, Errors: {errors}")
+    if saved and not scratch:
+        print("Done. Run `make images` to build the web variants, the thumbnail atlas,")
+        print("the catalog bundle and the service worker precache manifest.")
+    if errors:
+        print("Failed images are still pending: rerun gen_exercise_images.py --batch-file", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,495 @@
+#!/usr/bin/env python3
+"""
+bench.py — Times every stage of the Python data toolchain on the real catalog
+and on synthetic 1k / 10k-exercise catalogs, and compares with a baseline.
+
+Usage:
+  python3 scripts/bench.py                          # all stages, all sizes
+  python3 scripts/bench.py --sizes real,1k --stages catalog_load_cold,validate
+  python3 scripts/bench.py --json bench.json        # raw results
+  python3 scripts/bench.py --update-baseline        # record this machine's timings
+  python3 scripts/bench.py --check                  # exit 1 on regression (records a missing baseline)
+
+Stages (the script each one stands for in brackets):
+  catalog_load_cold    Catalog() parsing every file, no pickle cache    [all]
+  catalog_load_cached  Catalog() from a warm pickle cache               [all]
+  validate             check_records() on every file                    [validate_catalog.py]
+  progressions         compile_graph() over the whole catalog           [add_progressions.py]
+  prompts              make_prompt() for every exercise                 [generate_image_prompts.py]
+  rewrite              save_records() of every file into an empty dir   [add_progressions.py, ...]
+  rewrite_noop         save_records() when nothing changed              [add_progressions.py --check]
+  bundle               build() of catalog.json + string tables          [build_bundle.py]
+  wger_fetch           cold paginated fetch + make_candidate()          [fetch_wger.py]
+  wger_revalidate      same with every page cached (304s)               [fetch_wger.py]
+  wger_dedupe          index the catalog, match every candidate         [fetch_wger.py]
+  image_generate       IMAGE_SAMPLE requests through GeminiBackend      [gen_exercise_images.py]
+  image_inspect        decode + dHash of IMAGE_SAMPLE masters           [check_images.py]
+  image_thumbnail      atlas thumbnails of IMAGE_SAMPLE masters         [build_atlas.py]
+
+Synthetic catalogs clone the real records under new ids (ids referenced by
+progression fields and CHAINS are renamed with them), so every stage sees
+valid data of the target size. Network stages run against the repo's fakes on
+an ephemeral local port, with no added latency: wger_fixture_server.py serves
+a synthetic exerciseinfo listing of the same size, fake_gemini_server.py
+answers image requests. Image stages do not depend on catalog size and only
+run on the real catalog; so does wger_dedupe, because every synthetic clone
+repeats the texts of its original and the LSH buckets would grow with the
+number of copies instead of with the catalog.
+
+Each stage runs --repeat times after one warm-up; the median is reported.
+--check fails when a stage's median exceeds the baseline's by more than
+--threshold (default 25%) and by more than MIN_DELTA_S, so sub-millisecond
+noise never fails a run. Timings are only comparable on one machine: the
+baseline (scripts/bench_baseline.json) is not committed, and --check without
+one records the current run as the baseline instead of failing.
+
+Requirements:
+  none (pip install pillow google-genai for the image stages)
+"""
+
+import argparse
+import base64
+import importlib.util
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from http.server import ThreadingHTTPServer
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+
+from add_progressions import CHAINS, compile_graph  # noqa: E402
+from build_bundle import build  # noqa: E402
+from catalog import Catalog, save_records, write_atomic  # noqa: E402
+from fetch_wger import (  # noqa: E402
+    CATEGORY_MAP,
+    LANG_EN,
+    LANG_FR,
+    PAGE_SIZE,
+    WORKERS,
+    CatalogMatcher,
+    WgerClient,
+    cache_key,
+    make_candidate,
+)
+from gen_exercise_images import MODEL, OUTPUT_DIR, TokenBucket, generate_with_retries, make_prompt, manifest_entry  # noqa: E402
+from validate_catalog import check_records, load_schema  # noqa: E402
+
+BASELINE_PATH = Path(__file__).parent / "bench_baseline.json"
+
+SIZES        = {"real": None, "1k": 1_000, "10k": 10_000}
+REPEAT       = 5
+THRESHOLD    = 1.25   # median / baseline median above which a stage regressed
+MIN_DELTA_S  = 0.005  # ... and by at least this much, in seconds
+IMAGE_SAMPLE = 32
+
+# Fields holding exercise ids, renamed along with the records they point to
+ID_FIELDS = ("progression_to", "regression_from", "progression_path", "ladder")
+
+WGER_LISTING = "exerciseinfo/?format=json&equipment=7"
+
+
+# ── Synthetic catalogs ───────────────────────────────────────────────────────
+
+def clone_id(ex_id, copy):
+    return ex_id if copy == 0 else f"{ex_id}_x{copy}"
+
+
+def clone_record(ex, copy):
+    ex = dict(ex, id=clone_id(ex["id"], copy))
+    for field in ID_FIELDS:
+        value = ex.get(field)
+        if isinstance(value, list):
+            ex[field] = [clone_id(v, copy) for v in value]
+        elif isinstance(value, str):
+            ex[field] = clone_id(value, copy)
+    return ex
+
+
+def synthesize(catalog, size, out_dir):
+    """
+    Write `size` exercises (rounded to whole copies of the real catalog) as
+    category files under out_dir. Returns the CHAINS matching the clones.
+    """
+    copies = max(1, round(size / len(catalog)))
+    chains = {}
+    for category in catalog.categories:
+        records = []
+        for copy in range(copies):
+            records.extend(clone_record(ex, copy) for ex in catalog.records(category))
+        (out_dir / f"{category}.json").write_text(json.dumps(records, ensure_ascii=False, indent=2) + "\n",
+                                                 encoding="utf-8")
+    for copy in range(copies):
+        chains.update({clone_id(k, copy): v and clone_id(v, copy) for k, v in CHAINS.items()})
+    return chains
+
+
+def wger_bases(exercises):
+    """One exerciseinfo base per exercise, shaped like the wger API's."""
+    category_ids = {}
+    for wger_id, category in CATEGORY_MAP.items():
+        category_ids.setdefault(category, wger_id)
+    return [
+        {
+            "id": i + 1,
+            "category": {"id": category_ids.get(ex["category"], 9)},
+            "last_update": "2025-01-01T00:00:00Z",
+            "translations": [
+                {"language": LANG_EN, "name": ex["name_en"], "description": f"<p>{ex['instructions_en']}</p>"},
+                {"language": LANG_FR, "name": ex["name_fr"], "description": f"<p>{ex['instructions_fr']}</p>"},
+            ],
+        }
+        for i, ex in enumerate(exercises)
+    ]
+
+
+def write_wger_fixtures(bases, fixtures_dir):
+    """Record the paginated listing the way WgerClient caches it, for the fixture server."""
+    for offset in range(0, max(len(bases), 1), PAGE_SIZE):
+        rel = f"{WGER_LISTING}&limit={PAGE_SIZE}&offset={offset}"
+        entry = {"rel": rel, "etag": None, "last_modified": None, "fetched_at": 0,
+                 "body": {"count": len(bases), "results": bases[offset:offset + PAGE_SIZE]}}
+        (fixtures_dir / f"{cache_key(rel)}.json").write_text(json.dumps(entry, ensure_ascii=False), encoding="utf-8")
+
+
+@contextmanager
+def local_server(handler):
+    """Serve `handler` on an ephemeral port with logging off; yields the base URL."""
+    quiet = type(handler.__name__, (handler,), {"log_message": lambda self, fmt, *args: None})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), quiet)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+# ── Stages ───────────────────────────────────────────────────────────────────
+
+class Workspace:
+    """One catalog size: its files, loaded records and scratch space."""
+
+    def __init__(self, label, exercises_dir, chains, tmp):
+        self.label = label
+        self.dir = exercises_dir
+        self.chains = chains
+        self.tmp = tmp
+        self.catalog = Catalog(exercises_dir, use_cache=False)
+        self.files = {c: self.catalog.records(c) for c in self.catalog.categories}
+        self.exercises = [ex for records in self.files.values() for ex in records]
+        self.schema = load_schema()
+        self.runs = 0
+
+    def scratch(self, name):
+        self.runs += 1
+        path = self.tmp / f"{name}-{self.runs}"
+        path.mkdir()
+        return path
+
+
+def stage_catalog_load_cold(ws):
+    return len(Catalog(ws.dir, use_cache=False).exercises())
+
+
+def stage_catalog_load_cached(ws):
+    cache = ws.tmp / "catalog.pickle"
+    if not cache.exists():
+        Catalog(ws.dir, cache_path=cache).exercises()
+    return len(Catalog(ws.dir, cache_path=cache).exercises())
+
+
+def stage_validate(ws):
+    errors = []
+    for category, records in ws.files.items():
+        errors += check_records(records, f"{category}.json", ws.schema)[0]
+    if errors:
+        raise RuntimeError(f"{len(errors)} schema errors, first: {errors[0]}")
+    return len(ws.exercises)
+
+
+def stage_progressions(ws):
+    fields, errors, _warnings = compile_graph(ws.exercises, ws.chains)
+    if errors:
+        raise RuntimeError(f"{len(errors)} CHAINS errors, first: {errors[0]}")
+    return len(fields)
+
+
+def stage_prompts(ws):
+    return len([make_prompt(ex) for ex in ws.exercises])
+
+
+def stage_rewrite(ws):
+    out = ws.scratch("rewrite")
+    for category, records in ws.files.items():
+        save_records(out / f"{category}.json", records)
+    return len(ws.exercises)
+
+
+def stage_rewrite_noop(ws):
+    unchanged = sum(save_records(ws.dir / f"{category}.json", records) is None
+                    for category, records in ws.files.items())
+    if unchanged != len(ws.files):
+        raise RuntimeError("no-op rewrite changed files")
+    return len(ws.exercises)
+
+
+def stage_bundle(ws):
+    bundle, _strings = build(ws.exercises)
+    return len(bundle["rows"])
+
+
+def wger_fetch(ws, cache_dir):
+    client = WgerClient(ws.wger_url, cache_dir, ttl_s=0)
+    with ThreadPoolExecutor(max_workers=WORKERS) as pool:
+        bases = client.fetch_all_pages(WGER_LISTING, pool)
+    candidates = [c for c in map(make_candidate, bases) if c]
+    if len(bases) != len(ws.exercises):
+        raise RuntimeError(f"fetched {len(bases)} bases, expected {len(ws.exercises)}")
+    return len(candidates)
+
+
+def stage_wger_fetch(ws):
+    return wger_fetch(ws, ws.scratch("wger"))
+
+
+def stage_wger_revalidate(ws):
+    cache = ws.tmp / "wger-warm"
+    if not cache.exists():
+        wger_fetch(ws, cache)
+    return wger_fetch(ws, cache)
+
+
+def stage_wger_dedupe(ws):
+    if not hasattr(ws, "wger_candidates"):
+        ws.wger_candidates = [c for c in map(make_candidate, wger_bases(ws.exercises)) if c]
+    matcher = CatalogMatcher(ws.exercises)
+    for candidate in ws.wger_candidates:
+        matcher.annotate(candidate)
+    return len(ws.wger_candidates)
+
+
+def image_sample(ws):
+    return [ex for ex in ws.exercises if (OUTPUT_DIR / f"{ex['id']}.png").exists()][:IMAGE_SAMPLE]
+
+
+def stage_image_generate(ws):
+    from image_backends import GeminiBackend
+
+    out = ws.scratch("images")
+    jobs = [(ex, make_prompt(ex)) for ex in ws.exercises[:IMAGE_SAMPLE]]
+    limiter = TokenBucket(rate=1e6, capacity=WORKERS)
+    manifest = {}
+
+    def run(job):
+        ex, prompt = job
+        img = generate_with_retries(backend.generate, prompt, limiter, label=ex["id"])
+        write_atomic(out / f"{ex['id']}.png", img)
+        manifest[ex["id"]] = manifest_entry(prompt, img, backend.name, ws.gemini_url)
+
+    with GeminiBackend("bench", MODEL, base_url=ws.gemini_url, timeout_s=30, pool_size=WORKERS) as backend:
+        with ThreadPoolExecutor(max_workers=WORKERS) as pool:
+            list(pool.map(run, jobs))
+    return len(manifest)
+
+
+def stage_image_inspect(ws):
+    from check_images import inspect_master
+
+    sample = image_sample(ws)
+    for ex in sample:
+        problems, _info = inspect_master(OUTPUT_DIR / f"{ex['id']}.png")
+    return len(sample)
+
+
+def stage_image_thumbnail(ws):
+    from build_atlas import thumbnail
+
+    sample = image_sample(ws)
+    for ex in sample:
+        thumbnail(OUTPUT_DIR / f"{ex['id']}.png")
+    return len(sample)
+
+
+# name → (function, scales with catalog size, required modules)
+STAGES = {
+    "catalog_load_cold":   (stage_catalog_load_cold, True, ()),
+    "catalog_load_cached": (stage_catalog_load_cached, True, ()),
+    "validate":            (stage_validate, True, ()),
+    "progressions":        (stage_progressions, True, ()),
+    "prompts":             (stage_prompts, True, ()),
+    "rewrite":             (stage_rewrite, True, ()),
+    "rewrite_noop":        (stage_rewrite_noop, True, ()),
+    "bundle":              (stage_bundle, True, ()),
+    "wger_fetch":          (stage_wger_fetch, True, ()),
+    "wger_revalidate":     (stage_wger_revalidate, True, ()),
+    "wger_dedupe":         (stage_wger_dedupe, False, ()),
+    "image_generate":      (stage_image_generate, False, ("PIL", "google.genai")),
+    "image_inspect":       (stage_image_inspect, False, ("PIL",)),
+    "image_thumbnail":     (stage_image_thumbnail, False, ("PIL",)),
+}
+
+
+def missing_modules(modules):
+    missing = []
+    for name in modules:
+        try:
+            found = importlib.util.find_spec(name) is not None
+        except ModuleNotFoundError:
+            found = False
+        if not found:
+            missing.append(name)
+    return missing
+
+
+def time_stage(fn, ws, repeat):
+    """(median seconds, min seconds, items processed) after one warm-up run."""
+    items = fn(ws)
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(ws)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings), min(timings), items
+
+
+def run(sizes, stages, repeat):
+    from fake_gemini_server import make_handler as gemini_handler, make_image
+    from wger_fixture_server import make_handler as wger_handler
+
+    catalog = Catalog(use_cache=False)
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="oops-bench-") as tmp:
+        tmp = Path(tmp)
+        for label in sizes:
+            root = tmp / label
+            exercises_dir = root / "exercises"
+            exercises_dir.mkdir(parents=True)
+            if SIZES[label] is None:
+                for category in catalog.categories:
+                    (exercises_dir / f"{category}.json").write_bytes(catalog.path(category).read_bytes())
+                chains = CHAINS
+            else:
+                chains = synthesize(catalog, SIZES[label], exercises_dir)
+            ws = Workspace(label, exercises_dir, chains, root)
+
+            fixtures = root / "wger-fixtures"
+            fixtures.mkdir()
+            write_wger_fixtures(wger_bases(ws.exercises), fixtures)
+            image_b64 = base64.b64encode(make_image()).decode()
+            with local_server(wger_handler(fixtures, 0.0)) as wger_url, \
+                    local_server(gemini_handler(image_b64, 0.0, 0.0)) as gemini_url:
+                ws.wger_url, ws.gemini_url = wger_url, gemini_url
+                print(f"\n{label}: {len(ws.exercises)} exercises", file=sys.stderr)
+                for name in stages:
+                    fn, scales, requires = STAGES[name]
+                    if not scales and SIZES[label] is not None:
+                        continue
+                    missing = missing_modules(requires)
+                    if missing:
+                        print(f"  {name:22s} skipped ({', '.join(missing)} not installed)", file=sys.stderr)
+                        continue
+                    median, best, items = time_stage(fn, ws, repeat)
+                    results[f"{label}/{name}"] = {
+                        "median_s": round(median, 6), "min_s": round(best, 6), "items": items,
+                    }
+                    print(f"  {name:22s} {median * 1000:10.2f} ms  (min {best * 1000:.2f}, {items} items)",
+                          file=sys.stderr)
+    return results
+
+
+def compare(results, baseline, threshold):
+    """[(key, baseline s, current s)] of the stages that regressed."""
+    regressions = []
+    for key, current in results.items():
+        ref = baseline.get(key)
+        if ref is None:
+            continue
+        before, after = ref["median_s"], current["median_s"]
+        if after > before * threshold and after - before > MIN_DELTA_S:
+            regressions.append((key, before, after))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Python data toolchain")
+    parser.add_argument("--sizes", default=",".join(SIZES), help=f"Comma-separated, from {', '.join(SIZES)}")
+    parser.add_argument("--stages", default=",".join(STAGES), help="Comma-separated stage names (default: all)")
+    parser.add_argument("--repeat", type=int, default=REPEAT, help=f"Timed runs per stage (default: {REPEAT})")
+    parser.add_argument("--json", metavar="PATH", help="Write the results as JSON")
+    parser.add_argument("--baseline", default=str(BASELINE_PATH), help="Baseline results file")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD,
+                        help=f"Regression ratio against the baseline median (default: {THRESHOLD})")
+    parser.add_argument("--check", action="store_true", help="Exit 1 if a stage regressed against the baseline")
+    parser.add_argument("--update-baseline", action="store_true", help="Record these results as the baseline")
+    args = parser.parse_args()
+
+    sizes = [s for s in args.sizes.split(",") if s]
+    stages = [s for s in args.stages.split(",") if s]
+    for value, known, what in ((sizes, SIZES, "size"), (stages, STAGES, "stage")):
+        unknown = [v for v in value if v not in known]
+        if unknown:
+            parser.error(f"unknown {what}(s): {', '.join(unknown)}")
+
+    results = run(sizes, stages, args.repeat)
+    report = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "machine": f"{platform.system()} {platform.machine()}, {os.cpu_count()} CPUs",
+        "repeat": args.repeat,
+        "results": results,
+    }
+    text = (json.dumps(report, indent=2) + "\n").encode("utf-8")
+    if args.json:
+        write_atomic(Path(args.json), text)
+
+    baseline_path = Path(args.baseline)
+    if args.update_baseline:
+        if baseline_path.exists():
+            # Keep stages and sizes that were not part of this run
+            with open(baseline_path, encoding="utf-8") as f:
+                previous = json.load(f)["results"]
+            report["results"] = {**previous, **results}
+            text = (json.dumps(report, indent=2) + "\n").encode("utf-8")
+        write_atomic(baseline_path, text)
+        print(f"\nBaseline updated: {baseline_path} ({len(report['results'])} timings)")
+        return
+    if not baseline_path.exists():
+        if args.check:
+            write_atomic(baseline_path, text)
+            print(f"\nNo baseline at {baseline_path}: recorded this run ({len(results)} timings), "
+                  f"later --check runs compare against it")
+            return
+        print(f"\nNo baseline at {baseline_path}: run with --update-baseline first")
+        return
+
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)["results"]
+    print(f"\n  {'stage':34s} {'baseline':>10s} {'now':>10s} {'ratio':>7s}")
+    for key, current in results.items():
+        if key in baseline:
+            before, after = baseline[key]["median_s"], current["median_s"]
+            print(f"  {key:34s} {before * 1000:8.2f}ms {after * 1000:8.2f}ms "
+                  f"{after / before if before else float('inf'):6.2f}x")
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"\n✗ {len(regressions)} stage(s) slower than {args.threshold:.2f}x the baseline:", file=sys.stderr)
+        for key, before, after in regressions:
+            print(f"  {key}: {before * 1000:.2f} ms → {after * 1000:.2f} ms", file=sys.stderr)
+        if args.check:
+            sys.exit(1)
+    else:
+        print(f"\nNo regression above {args.threshold:.2f}x.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+build_atlas.py — Packs a small thumbnail of every exercise into one or a few
+sprite sheets for list views.
+
+Usage:
+  python3 scripts/build_atlas.py [--check]
+  python3 scripts/build_bundle.py          # embeds the coordinate map
+
+List views (today's session, week preview) only need a glimpse of the
+movement, not the 1792x592 strip. Panel 1 (starting position) of each master
+in web/icons/exercises/ is cropped to a square, resized to CELL px (2x a
+CELL/2 CSS px thumbnail) and placed on a COLUMNS-wide grid. Up to
+COLUMNS * MAX_ROWS thumbnails share one sheet.
+
+Outputs:
+  web/icons/atlas/thumbs-<n>.<hash>.webp   sprite sheets; the content hash in
+                                           the name makes them cacheable forever
+  web/icons/atlas/atlas.json               coordinate map:
+    {"cell": 96,
+     "sheets": [{"url": "/icons/atlas/thumbs-0.<hash>.webp", "width": 1152, "height": 768}],
+     "thumbs": {"push_knee": [0, 96, 192], ...}}       # id → [sheet, x, y]
+
+build_bundle.py copies atlas.json into catalog.json ("thumbs"), so a list
+view costs one request for the sheet, cached by the service worker.
+Outdated sheets are deleted. --check exits 1 if the outputs are out of date.
+
+Requirements:
+  pip install pillow
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import sys
+from pathlib import Path
+
+from catalog import write_atomic
+from gen_exercise_images import OUTPUT_DIR, load_all_exercises
+
+WEB_DIR    = Path(__file__).parent.parent / "web"
+ATLAS_DIR  = WEB_DIR / "icons" / "atlas"
+ATLAS_MAP  = ATLAS_DIR / "atlas.json"
+
+CELL       = 96      # px per thumbnail (displayed at 48 CSS px)
+COLUMNS    = 12
+MAX_ROWS   = 12
+PANELS     = 3
+# Panel separators are thin black lines: keep clear of them
+PANEL_INSET = 0.04
+WEBP_OPTIONS = {"quality": 80, "method": 6}
+
+
+def crop_first_panel(im):
+    """Square crop centred in panel 1 of a 3-panel strip."""
+    panel_w = im.width / PANELS
+    inset = panel_w * PANEL_INSET
+    left, right = inset, panel_w - inset
+    side = min(right - left, im.height - 2 * inset)
+    cx, cy = (left + right) / 2, im.height / 2
+    return im.crop((round(cx - side / 2), round(cy - side / 2), round(cx + side / 2), round(cy + side / 2)))
+
+
+def thumbnail(path):
+    from PIL import Image
+
+    with Image.open(path) as im:
+        im.draft("RGB", (im.width // 4, im.height // 4))
+        panel = crop_first_panel(im.convert("RGB"))
+    return panel.resize((CELL, CELL), Image.LANCZOS)
+
+
+def build(ids):
+    """Return ({file name: bytes}, atlas map) for the ids that have a master."""
+    from PIL import Image
+
+    present = [ex_id for ex_id in ids if (OUTPUT_DIR / f"{ex_id}.png").exists()]
+    per_sheet = COLUMNS * MAX_ROWS
+    files, sheets, thumbs = {}, [], {}
+    for s, start in enumerate(range(0, len(present), per_sheet)):
+        chunk = present[start:start + per_sheet]
+        rows = -(-len(chunk) // COLUMNS)
+        width = CELL * min(COLUMNS, len(chunk))
+        sheet = Image.new("RGB", (width, CELL * rows), "white")
+        for i, ex_id in enumerate(chunk):
+            x, y = CELL * (i % COLUMNS), CELL * (i // COLUMNS)
+            sheet.paste(thumbnail(OUTPUT_DIR / f"{ex_id}.png"), (x, y))
+            thumbs[ex_id] = [s, x, y]
+        buf = io.BytesIO()
+        sheet.save(buf, format="WEBP", **WEBP_OPTIONS)
+        data = buf.getvalue()
+        name = f"thumbs-{s}.{hashlib.sha256(data).hexdigest()[:8]}.webp"
+        files[name] = data
+        sheets.append({"url": f"/icons/atlas/{name}", "width": sheet.width, "height": sheet.height})
+    return files, {"cell": CELL, "sheets": sheets, "thumbs": thumbs}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the exercise thumbnail atlas")
+    parser.add_argument("--check", action="store_true", help="Exit 1 if outputs are out of date")
+    args = parser.parse_args()
+
+    try:
+        from PIL import features
+    except ImportError:
+        print("ERROR: Install Pillow: pip install pillow", file=sys.stderr)
+        sys.exit(1)
+    if not features.check("webp"):
+        print("ERROR: this Pillow build has no WebP encoder", file=sys.stderr)
+        sys.exit(1)
+
+    exercises = load_all_exercises()
+    ids = [ex["id"] for ex in exercises]
+    files, atlas = build(ids)
+    files[ATLAS_MAP.name] = (json.dumps(atlas, separators=(",", ":")) + "\n").encode("utf-8")
+
+    stale = [name for name, data in files.items()
+             if not (ATLAS_DIR / name).exists() or (ATLAS_DIR / name).read_bytes() != data]
+    outdated = [p for p in ATLAS_DIR.glob("thumbs-*.webp") if p.name not in files] if ATLAS_DIR.exists() else []
+
+    missing = len(ids) - len(atlas["thumbs"])
+    total = sum(len(data) for name, data in files.items() if name.endswith(".webp"))
+    for name in sorted(files):
+        print(f"  {'✎' if name in stale else ' '} {name}  {len(files[name]) // 1024} KB")
+    for path in outdated:
+        print(f"  ✗ {path.name}")
+    print(f"\n{len(atlas['thumbs'])} thumbnails ({missing} without image) in "
+          f"{len(atlas['sheets'])} sheet(s), {total // 1024} KB")
+
+    if args.check:
+        if stale or outdated:
+            print("Atlas out of date: run python3 scripts/build_atlas.py", file=sys.stderr)
+            sys.exit(1)
+        return
+
+    ATLAS_DIR.mkdir(parents=True, exist_ok=True)
+    for name in stale:
+        write_atomic(ATLAS_DIR / name, files[name])
+    for path in outdated:
+        path.unlink()
+    if stale:
+        print("Run scripts/build_bundle.py to embed the new coordinates.")
+
+
+if __name__ == "__main__":
+    main()
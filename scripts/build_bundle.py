@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+build_bundle.py — Compiles web/data/exercises/*.json into the single catalog
+bundle the PWA loads at startup.
+
+Usage:
+  python3 scripts/build_bundle.py [--check]
+
+Outputs:
+  web/data/catalog.json              language-neutral structural records, minified
+  web/locales/exercises.<lang>.json  names + instructions for one language, by id
+
+Bundle layout (decoded by web/js/catalog.js):
+  {
+    "version": 1,
+    "hash":    "<8 hex>",              # ties the locale sidecars to this bundle
+    "fields":  ["id", "category", ...],
+    "enums":   {"category": ["core", ...], "contraindications": [...], ...},
+    "rows":    [["push_knee", 4, 3, 1, 30, ...], ...],   # enum values interned
+    "index":   {"push_knee": 0, ...},                    # id → row
+    "planner": {...},                                    # eligibility index, below
+    "thumbs":  {...}                                     # list-view sprites (optional)
+  }
+  strings: {"version": 1, "hash": "<same>", "lang": "fr",
+            "exercises": {"push_knee": {"name": "...", "instructions": "..."}, ...}}
+
+The string tables sit next to web/locales/<lang>.json: the PWA fetches only
+the active language, and the WASM planner never sees any text.
+
+"planner" is the packed eligibility index the WASM Planner deserializes once
+(PackedCatalog in src/eligibility.rs): exercises sorted by Category, one
+column per field, a contraindication bitmask and a flags byte per exercise.
+  {"contraindications": [...],        # bit i of mask = this value
+   "offsets": [0, 13, 26, ...],       # category c = rows offsets[c]..offsets[c+1]
+   "ids": [...], "mask": [...], "difficulty": [...], "flags": [...], "duration_s": [...]}
+Enum orders, timed patterns and flag bits are read from the Rust sources.
+
+"thumbs" is web/icons/atlas/atlas.json as written by build_atlas.py (sprite
+sheet URLs and an id → [sheet, x, y] map), or absent if the atlas was never
+built.
+
+The source files stay the single source of truth; this build is
+deterministic, validated, and writes only files whose bytes change.
+--check exits 1 if the committed bundle is out of date.
+"""
+
+import argparse
+import hashlib
+import json
+import sys
+from pathlib import Path
+
+from build_atlas import ATLAS_MAP
+from catalog import Catalog, write_atomic
+from validate_catalog import check_records, eligibility_flags, load_enums, snake_case, timed_patterns
+
+WEB_DIR      = Path(__file__).parent.parent / "web"
+WEB_DATA_DIR = WEB_DIR / "data"
+LOCALES_DIR  = WEB_DIR / "locales"
+BUNDLE_PATH  = WEB_DATA_DIR / "catalog.json"
+BUNDLE_VERSION = 1
+
+LANGS = ("fr", "en")
+# Per-language text fields, moved out of the structural bundle into string tables
+TEXT_FIELDS = ("name", "instructions")
+# Fields whose values are interned into enum tables (scalar or list of values)
+ENUM_FIELDS = ("category", "movement_pattern", "contraindications")
+
+
+def strings_path(lang):
+    return LOCALES_DIR / f"exercises.{lang}.json"
+
+
+def minify(obj):
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+
+def validate(exercises):
+    """
+    Checks the bundle relies on, on top of the WASM schema
+    (validate_catalog.py). Returns a list of error strings.
+    """
+    errors, _ = check_records(exercises, "catalog")
+    ids = set()
+    for ex in exercises:
+        ex_id = ex.get("id", "<no id>")
+        for lang in LANGS:
+            for field in TEXT_FIELDS:
+                if not isinstance(ex.get(f"{field}_{lang}"), str):
+                    errors.append(f"{ex_id}: missing text {field}_{lang!r}")
+        if ex_id in ids:
+            errors.append(f"{ex_id}: duplicate id")
+        ids.add(ex_id)
+    for ex in exercises:
+        target = ex.get("progression_to")
+        if target is not None and target not in ids:
+            errors.append(f"{ex['id']}: progression_to {target!r} does not exist")
+    return errors
+
+
+def pack_planner(exercises):
+    """PackedCatalog (src/eligibility.rs) for a flat list of records."""
+    enums = load_enums()
+    categories, _ = enums["Category"]
+    values, other = enums["Contraindication"]
+    contraindications = [*values, snake_case(other)] if other else list(values)
+    bits = {c: 1 << i for i, c in enumerate(contraindications)}
+    unknown = bits.get(snake_case(other)) if other else 0
+    timed = timed_patterns()
+    flag = eligibility_flags()
+
+    def flags(ex):
+        return (
+            (flag["equipment"] if ex["equipment_required"] else 0)
+            | (flag["postpartum_only"] if ex["postpartum_only"] else 0)
+            | (flag["timed"] if ex["movement_pattern"] in timed else 0)
+            | (flag["requires_anchor"] if ex.get("requires_anchor") else 0)
+        )
+
+    ordered = sorted(exercises, key=lambda ex: categories.index(ex["category"]))
+    offsets = [0]
+    for category in categories:
+        offsets.append(offsets[-1] + sum(1 for ex in exercises if ex["category"] == category))
+    mask = []
+    for ex in ordered:
+        m = 0
+        for c in ex["contraindications"]:
+            m |= bits.get(c, unknown)
+        mask.append(m)
+    return {
+        "contraindications": contraindications,
+        "offsets": offsets,
+        "ids": [ex["id"] for ex in ordered],
+        "mask": mask,
+        "difficulty": [ex["difficulty"] for ex in ordered],
+        "flags": [flags(ex) for ex in ordered],
+        "duration_s": [ex["duration_s"] for ex in ordered],
+    }
+
+
+def build(exercises, thumbs=None):
+    """Return (bundle, {lang: string table}) for a flat list of records."""
+    text_keys = {f"{field}_{lang}" for field in TEXT_FIELDS for lang in LANGS}
+
+    fields = []
+    for ex in exercises:
+        for key in ex:
+            if key not in text_keys and not key.startswith("_") and key not in fields:
+                fields.append(key)
+
+    enums = {}
+    for field in ENUM_FIELDS:
+        values = set()
+        for ex in exercises:
+            value = ex.get(field)
+            values.update(value if isinstance(value, list) else [value] if value is not None else [])
+        enums[field] = sorted(values)
+    lookup = {field: {v: i for i, v in enumerate(values)} for field, values in enums.items()}
+
+    def encode(field, value):
+        if field not in lookup or value is None:
+            return value
+        if isinstance(value, list):
+            return [lookup[field][v] for v in value]
+        return lookup[field][value]
+
+    rows = [[encode(f, ex.get(f)) for f in fields] for ex in exercises]
+    digest = hashlib.sha256(minify([fields, enums, rows]).encode("utf-8")).hexdigest()[:8]
+
+    bundle = {
+        "version": BUNDLE_VERSION,
+        "hash": digest,
+        "fields": fields,
+        "enums": enums,
+        "rows": rows,
+        "index": {ex["id"]: i for i, ex in enumerate(exercises)},
+        "planner": pack_planner(exercises),
+    }
+    if thumbs:
+        bundle["thumbs"] = thumbs
+    strings = {
+        lang: {
+            "version": BUNDLE_VERSION,
+            "hash": digest,
+            "lang": lang,
+            "exercises": {
+                ex["id"]: {field: ex[f"{field}_{lang}"] for field in TEXT_FIELDS}
+                for ex in exercises
+            },
+        }
+        for lang in LANGS
+    }
+    return bundle, strings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile the exercise catalog bundle")
+    parser.add_argument("--check", action="store_true", help="Exit 1 if outputs are out of date")
+    args = parser.parse_args()
+
+    catalog = Catalog()
+    exercises = catalog.exercises()
+    errors = validate(exercises)
+    if errors:
+        for err in errors:
+            print(f"  ERROR {err}", file=sys.stderr)
+        sys.exit(1)
+
+    thumbs = json.loads(ATLAS_MAP.read_text(encoding="utf-8")) if ATLAS_MAP.exists() else None
+    bundle, strings = build(exercises, thumbs)
+    outputs = {BUNDLE_PATH: minify(bundle)}
+    outputs.update({strings_path(lang): minify(table) for lang, table in strings.items()})
+
+    source_bytes = sum(catalog.path(c).stat().st_size for c in catalog.categories)
+    stale = []
+    for path, text in outputs.items():
+        data = text.encode("utf-8")
+        if path.exists() and path.read_bytes() == data:
+            continue
+        stale.append(path)
+        if not args.check:
+            write_atomic(path, data)
+
+    for path, text in outputs.items():
+        mark = "✎" if path in stale else " "
+        print(f"  {mark} {path.relative_to(WEB_DIR)}  {len(text.encode('utf-8')) // 1024} KB")
+    bundle_bytes = len(outputs[BUNDLE_PATH].encode("utf-8"))
+    lang_bytes = max(len(outputs[strings_path(lang)].encode("utf-8")) for lang in LANGS)
+    print(
+        f"\n{len(exercises)} exercises, bundle {bundle['hash']}: "
+        f"{source_bytes // 1024} KB in {len(catalog.categories)} files → "
+        f"{(bundle_bytes + lang_bytes) // 1024} KB in 2 requests per language"
+    )
+
+    if args.check and stale:
+        print("Bundle out of date: run python3 scripts/build_bundle.py", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
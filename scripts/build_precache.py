@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+build_precache.py — Generates the service worker's precache manifest from
+what is actually in web/, with a content hash per file.
+
+Usage:
+  python3 scripts/build_precache.py [--check]
+
+Every shippable file under web/ (see INCLUDE / EXCLUDE) becomes one
+{url, revision} entry, revision = first 10 hex digits of its SHA-256. The
+list is written into web/service-worker.js between the `precache:start` and
+`precache:end` markers, so any content change also changes the worker's
+bytes, which is what makes browsers install the new worker.
+
+The worker caches each file under `<url>?__rev=<revision>`: on update it
+downloads only the entries whose revision it does not already hold and drops
+the others once active. Changing one image costs that image, not the app.
+
+WASM build outputs (web/pkg/, from wasm-pack) are hashed when present and
+listed with revision null otherwise; the worker refetches null entries on
+every install. CI regenerates the manifest after wasm-pack (deploy.yml).
+
+Not precached: catalog sources (web/data/exercises/, compiled into
+catalog.json), the exercise illustrations (fetched during a session, kept
+by the runtime cache) and the atlas map (embedded in catalog.json).
+
+--check exits 1 if service-worker.js is out of date.
+"""
+
+import argparse
+import hashlib
+import re
+import sys
+from pathlib import Path
+
+from catalog import write_atomic
+
+WEB_DIR        = Path(__file__).parent.parent / "web"
+SERVICE_WORKER = WEB_DIR / "service-worker.js"
+
+INCLUDE_SUFFIXES = {".html", ".css", ".js", ".json", ".svg", ".png", ".webp", ".wasm", ".ico", ".woff2"}
+EXCLUDE = (
+    "service-worker.js",
+    "data/exercises/",        # sources of data/catalog.json
+    "icons/exercises/",       # illustrations, runtime-cached on first session
+    "icons/atlas/atlas.json", # embedded in data/catalog.json
+    "icons/logo.png",         # not referenced by the app
+    "pkg/package.json",
+)
+# wasm-pack outputs the app imports; listed even before the first build
+BUILD_OUTPUTS = ("pkg/oops.js", "pkg/oops_bg.wasm")
+
+MARKERS_RE = re.compile(
+    r"(// precache:start[^\n]*\n)(.*?)(^// precache:end)", re.S | re.M,
+)
+REVISION_LEN = 10
+
+
+def revision(path):
+    return hashlib.sha256(path.read_bytes()).hexdigest()[:REVISION_LEN]
+
+
+def is_shippable(rel):
+    return Path(rel).suffix in INCLUDE_SUFFIXES and not any(
+        rel == e or (e.endswith("/") and rel.startswith(e)) for e in EXCLUDE
+    )
+
+
+def collect(web_dir=WEB_DIR):
+    """[(url, revision or None)] sorted by URL."""
+    entries = {}
+    for path in web_dir.rglob("*"):
+        rel = path.relative_to(web_dir).as_posix()
+        if path.is_file() and is_shippable(rel):
+            entries["/" + rel] = revision(path)
+    for rel in BUILD_OUTPUTS:
+        entries.setdefault("/" + rel, None)
+    return sorted(entries.items())
+
+
+def render(entries):
+    lines = ["const PRECACHE_MANIFEST = ["]
+    for url, rev in entries:
+        lines.append(f"  {{ url: '{url}', revision: {f'{rev!r}' if rev else 'null'} }},")
+    lines.append("];")
+    return "\n".join(lines) + "\n"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate the service worker precache manifest")
+    parser.add_argument("--check", action="store_true", help="Exit 1 if service-worker.js is out of date")
+    args = parser.parse_args()
+
+    entries = collect()
+    source = SERVICE_WORKER.read_text(encoding="utf-8")
+    m = MARKERS_RE.search(source)
+    if not m:
+        print(f"ERROR: precache:start / precache:end markers not found in {SERVICE_WORKER}", file=sys.stderr)
+        sys.exit(1)
+    updated = source[:m.start(2)] + render(entries) + source[m.end(2):]
+
+    total = sum((WEB_DIR / url[1:]).stat().st_size for url, rev in entries if rev)
+    unbuilt = [url for url, rev in entries if rev is None]
+    print(f"{len(entries)} files, {total // 1024} KB precached")
+    if unbuilt:
+        print(f"  not built yet (revision null): {', '.join(unbuilt)}")
+
+    if updated == source:
+        print("  service-worker.js up to date")
+        return
+    if args.check:
+        print("service-worker.js out of date: run python3 scripts/build_precache.py", file=sys.stderr)
+        sys.exit(1)
+    write_atomic(SERVICE_WORKER, updated.encode("utf-8"))
+    print("  ✎ service-worker.js")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+"""
+catalog.py — Shared loader and indexes for web/data/exercises/*.json.
+
+Every data script loads the exercise catalog through this module, so they all
+agree on which files are category files (every *.json in the directory, one
+per category; LICENSE and image_prompts.txt are never read) and on ordering
+(categories sorted by name, records in file order).
+
+  cat = Catalog()
+  cat.records("push")                 # parses push.json only
+  cat.by_id["push_knee"]              # full indexes are built on first use
+  cat.by_category / by_pattern / by_contraindication   → tuples of ids
+
+Parsed files are kept in a pickle cache (scripts/.cache/catalog.pickle) keyed
+by each file's (mtime_ns, size), so unchanged files are never re-parsed. The
+cache is rewritten (atomically) once per load that parsed anything: loading
+every category on a cold cache writes it once, not once per file.
+
+Writes go through save_records() / Catalog.save(): records are serialized
+canonically (indent=2, UTF-8, trailing newline), files whose bytes would not
+change are left untouched (no git churn, no mtime bump, no cache
+invalidation), and changed files are replaced atomically via temp file +
+rename. Both return exactly which record ids moved. A file that would fail
+the WASM engine's schema (validate_catalog.py) is never written.
+"""
+
+import json
+import os
+import pickle
+import tempfile
+from pathlib import Path
+
+from validate_catalog import check_records
+
+EXERCISES_DIR = Path(__file__).parent.parent / "web" / "data" / "exercises"
+CACHE_PATH    = Path(__file__).parent / ".cache" / "catalog.pickle"
+CACHE_VERSION = 1
+
+
+def dumps(records):
+    """Canonical on-disk form of a category file."""
+    return json.dumps(records, ensure_ascii=False, indent=2) + "\n"
+
+
+def write_atomic(path, data):
+    """Replace `path` with `data` (bytes) via a temp file in the same directory."""
+    path = Path(path)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        if path.exists():
+            os.chmod(tmp, path.stat().st_mode & 0o777)
+        else:
+            os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+def diff_records(old, new):
+    """{'added', 'removed', 'modified'} record ids between two record lists."""
+    old_by_id = {ex["id"]: json.dumps(ex, sort_keys=True) for ex in old}
+    new_by_id = {ex["id"]: json.dumps(ex, sort_keys=True) for ex in new}
+    return {
+        "added":    [i for i in new_by_id if i not in old_by_id],
+        "removed":  [i for i in old_by_id if i not in new_by_id],
+        "modified": [i for i in new_by_id if i in old_by_id and old_by_id[i] != new_by_id[i]],
+    }
+
+
+class InvalidCatalog(ValueError):
+    """Records that build_session would reject; nothing was written."""
+
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__(f"{len(errors)} schema errors:\n  " + "\n  ".join(errors))
+
+
+def save_records(path, records):
+    """
+    Write one category file if (and only if) its canonical bytes change.
+    Returns None when the file was left untouched, else the diff_records() dict
+    (all three lists may be empty when only formatting changed).
+    Raises InvalidCatalog if the records fail the schema check.
+    """
+    path = Path(path)
+    errors, _ = check_records(records, path.name)
+    if errors:
+        raise InvalidCatalog(errors)
+    data = dumps(records).encode("utf-8")
+    old_bytes = path.read_bytes() if path.exists() else None
+    if old_bytes == data:
+        return None
+    old = json.loads(old_bytes) if old_bytes else []
+    write_atomic(path, data)
+    return diff_records(old, records)
+
+
+def format_changes(changes):
+    """One-line summary of a diff_records() dict."""
+    parts = [f"{k} {', '.join(v)}" for k, v in changes.items() if v]
+    return "; ".join(parts) or "formatting only"
+
+
+class Catalog:
+    def __init__(self, exercises_dir=EXERCISES_DIR, cache_path=CACHE_PATH, use_cache=True):
+        self.dir = Path(exercises_dir)
+        self.cache_path = Path(cache_path) if use_cache else None
+        self.categories = sorted(p.stem for p in self.dir.glob("*.json"))
+        self._files = {}      # category → list of records
+        self._cache = None    # category → ((mtime_ns, size), pickled records)
+        self._index = None
+
+    # ── Loading ──────────────────────────────────────────────────────────────
+
+    def path(self, category):
+        return self.dir / f"{category}.json"
+
+    def _load_cache(self):
+        if self._cache is not None:
+            return
+        self._cache = {}
+        if self.cache_path and self.cache_path.exists():
+            try:
+                with open(self.cache_path, "rb") as f:
+                    version, cache = pickle.load(f)
+                if version == CACHE_VERSION and isinstance(cache, dict):
+                    self._cache = cache
+            except Exception:
+                pass  # corrupt or incompatible cache: just re-parse
+
+    def _save_cache(self):
+        if not self.cache_path:
+            return
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        write_atomic(self.cache_path, pickle.dumps((CACHE_VERSION, self._cache), protocol=pickle.HIGHEST_PROTOCOL))
+
+    def _load(self, categories):
+        """Load the given categories; the cache is rewritten once if any file had to be parsed."""
+        parsed = False
+        for category in categories:
+            if category in self._files:
+                continue
+            if category not in self.categories:
+                raise KeyError(f"unknown category {category!r}")
+
+            path = self.path(category)
+            st = path.stat()
+            sig = (st.st_mtime_ns, st.st_size)
+            self._load_cache()
+            cached = self._cache.get(category)
+            if cached and cached[0] == sig:
+                records = pickle.loads(cached[1])
+            else:
+                with open(path, encoding="utf-8") as f:
+                    records = json.load(f)
+                # Stored pickled, so callers mutating records never leak into the cache
+                self._cache[category] = (sig, pickle.dumps(records, protocol=pickle.HIGHEST_PROTOCOL))
+                parsed = True
+            self._files[category] = records
+        if parsed:
+            self._save_cache()
+
+    def records(self, category):
+        """Records of one category file, parsed (or read from cache) on first access."""
+        self._load((category,))
+        return self._files[category]
+
+    def __iter__(self):
+        self._load(self.categories)
+        for category in self.categories:
+            yield from self._files[category]
+
+    def __len__(self):
+        self._load(self.categories)
+        return sum(len(self._files[c]) for c in self.categories)
+
+    def exercises(self, category=None):
+        """All records (or one category's) as a flat list."""
+        return list(self.records(category)) if category else list(self)
+
+    def save(self, categories=None):
+        """
+        Write back loaded categories (all of them, or `categories`).
+        Returns {category: diff_records()} for the files actually rewritten.
+        """
+        changed = {}
+        for category in categories or list(self._files):
+            records = self._files.get(category)
+            if records is None:
+                continue
+            changes = save_records(self.path(category), records)
+            if changes is not None:
+                changed[category] = changes
+        if changed:
+            self._index = None
+        return changed
+
+    def invalidate(self, category=None):
+        """Forget parsed data after a file was rewritten."""
+        if category is None:
+            self._files.clear()
+        else:
+            self._files.pop(category, None)
+        self._index = None
+
+    # ── Indexes ──────────────────────────────────────────────────────────────
+
+    def _build_index(self):
+        by_id, by_category, by_pattern, by_contra, category_of = {}, {}, {}, {}, {}
+        self._load(self.categories)
+        for category in self.categories:
+            ids = []
+            for ex in self.records(category):
+                by_id[ex["id"]] = ex
+                category_of[ex["id"]] = category
+                ids.append(ex["id"])
+                by_pattern.setdefault(ex.get("movement_pattern"), []).append(ex["id"])
+                for c in ex.get("contraindications", []):
+                    by_contra.setdefault(c, []).append(ex["id"])
+            by_category[category] = tuple(ids)
+        freeze = lambda d: {k: tuple(v) for k, v in d.items()}  # noqa: E731
+        self._index = {
+            "by_id": by_id,
+            "by_category": by_category,
+            "by_pattern": freeze(by_pattern),
+            "by_contraindication": freeze(by_contra),
+            "category_of": category_of,
+        }
+
+    def _get_index(self, name):
+        if self._index is None:
+            self._build_index()
+        return self._index[name]
+
+    @property
+    def by_id(self):
+        return self._get_index("by_id")
+
+    @property
+    def by_category(self):
+        return self._get_index("by_category")
+
+    @property
+    def by_pattern(self):
+        return self._get_index("by_pattern")
+
+    @property
+    def by_contraindication(self):
+        return self._get_index("by_contraindication")
+
+    def category_of(self, ex_id):
+        """Name of the file an exercise lives in."""
+        return self._get_index("category_of")[ex_id]
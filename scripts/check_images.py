@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+check_images.py — Integrity and near-duplicate check of web/icons/exercises/.
+
+Usage:
+  python3 scripts/check_images.py [--distance 10] [--closest 5] [--jobs N]
+
+Every image is fully decoded in a process pool, which catches truncated or
+corrupt downloads, then checked:
+
+  masters    <id>.png (model output): JPEG (what the API returns, see
+             optimize_images.py) or PNG, 3:1 ratio (±5%)
+  variants   <id>-<width>.<ext>: real format matches the extension, width
+             matches the name, same 3:1 ratio
+  catalog    every exercise has a master; files that belong to no exercise
+
+Near-duplicates: each master gets a 192-bit difference hash (8 × 24 grid,
+matching the strip's 3:1 shape, so the three panels each keep their own
+columns). Hashes go into a BK-tree and each image queries it for neighbours
+within --distance bits, which avoids comparing every pair. Two exercises with
+almost the same picture usually mean the model ignored the visual hint.
+Exercises that really do look alike (a forward and a reverse lunge) are
+listed in scripts/similar_images.json with the reason, and are not reported.
+A master with less than MIN_CONTRAST grey levels between its darkest and
+brightest pixel is blank (a refused or failed render, the stub backend's
+placeholder) and is reported as broken rather than compared.
+
+gen_exercise_images.py runs inspect_master() and the BK-tree on every new
+image and regenerates outputs that are broken or duplicate another exercise.
+
+Exit status 1 if anything is wrong; the ids to regenerate are printed as a
+ready-to-run gen_exercise_images.py --ids command.
+
+Requirements:
+  pip install pillow numpy
+"""
+
+import argparse
+import io
+import json
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from gen_exercise_images import OUTPUT_DIR, load_all_exercises
+from image_backends import BadImage  # noqa: F401  (re-exported for callers)
+
+ASPECT_RATIO     = 3.0
+RATIO_TOLERANCE  = 0.05
+HASH_ROWS        = 8
+HASH_COLS        = 24
+DUP_DISTANCE     = 10          # bits out of HASH_ROWS * HASH_COLS
+MIN_CONTRAST     = 16          # grey levels between the darkest and brightest pixel
+MASTER_FORMATS   = ("JPEG", "PNG")
+
+SIMILAR_PATH     = Path(__file__).parent / "similar_images.json"
+
+VARIANT_RE = re.compile(r"^(?P<id>.+)-(?P<width>\d+)\.(?P<ext>\w+)$")
+EXTENSION_FORMATS = {"jpg": ("JPEG",), "jpeg": ("JPEG",), "png": ("PNG",), "webp": ("WEBP",), "avif": ("AVIF",)}
+
+
+def dhash(im):
+    """Difference hash of a PIL image as an int of HASH_ROWS * HASH_COLS bits."""
+    import numpy as np
+    from PIL import Image
+
+    g = np.asarray(im.convert("L").resize((HASH_COLS + 1, HASH_ROWS), Image.BILINEAR), dtype=np.int16)
+    bits = (g[:, 1:] > g[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def inspect(source, formats=None, expected_width=None):
+    """
+    Decode `source` (path or bytes) completely and check it.
+    Returns (problems, info) with info = {"format", "size", "hash", "contrast"};
+    plain values only, so it can run in a worker process.
+    """
+    from PIL import Image
+
+    problems = []
+    info = {"format": None, "size": None, "hash": None, "contrast": None}
+    try:
+        with Image.open(io.BytesIO(source) if isinstance(source, bytes) else source) as im:
+            info["format"] = im.format
+            info["size"] = im.size
+            # draft() lets JPEG decode at 1/8 scale (every byte is still read,
+            # so truncation is caught): the hash only needs 25 × 8 pixels
+            im.draft("RGB", (im.width // 8, im.height // 8))
+            im.load()
+            info["hash"] = dhash(im)
+            darkest, brightest = im.convert("L").getextrema()
+            info["contrast"] = brightest - darkest
+    except Exception as e:
+        return [f"cannot decode: {e}"], info
+
+    width, height = info["size"]
+    if formats and info["format"] not in formats:
+        problems.append(f"is {info['format']}, expected {' or '.join(formats)}")
+    if expected_width and width != expected_width:
+        problems.append(f"{width} px wide, expected {expected_width}")
+    ratio = width / height
+    if abs(ratio / ASPECT_RATIO - 1) > RATIO_TOLERANCE:
+        problems.append(f"{width}x{height} is {ratio:.2f}:1, expected {ASPECT_RATIO:g}:1")
+    return problems, info
+
+
+def inspect_master(source):
+    """inspect() for model output, which must also not be blank."""
+    problems, info = inspect(source, formats=MASTER_FORMATS)
+    if info["contrast"] is not None and info["contrast"] < MIN_CONTRAST:
+        problems.append(f"blank: uniform color (contrast {info['contrast']} < {MIN_CONTRAST})")
+    return problems, info
+
+
+def inspect_file(path):
+    """Worker entry point: pick the expectations from the file name."""
+    path = Path(path)
+    m = VARIANT_RE.match(path.name)
+    if m:
+        problems, info = inspect(path, EXTENSION_FORMATS.get(m["ext"].lower()), int(m["width"]))
+    else:
+        problems, info = inspect_master(path)
+    return str(path), problems, info
+
+
+def is_blank(h):
+    return h == 0
+
+
+class BKTree:
+    """Burkhard-Keller tree over Hamming distance: radius queries without all pairs."""
+
+    def __init__(self):
+        self.root = None     # [hash, key, {distance: child}]
+
+    def add(self, h, key):
+        node = [h, key, {}]
+        if self.root is None:
+            self.root = node
+            return
+        current = self.root
+        while True:
+            d = (h ^ current[0]).bit_count()
+            child = current[2].get(d)
+            if child is None:
+                current[2][d] = node
+                return
+            current = child
+
+    def search(self, h, radius):
+        """[(distance, key)] of every entry within `radius` bits of `h`."""
+        found = []
+        stack = [self.root] if self.root else []
+        while stack:
+            node_hash, key, children = stack.pop()
+            d = (h ^ node_hash).bit_count()
+            if d <= radius:
+                found.append((d, key))
+            for child_d, child in children.items():
+                if d - radius <= child_d <= d + radius:
+                    stack.append(child)
+        return sorted(found)
+
+
+def load_similar(path=SIMILAR_PATH):
+    """Pairs of exercises whose pictures are expected to be close, as frozensets of two ids."""
+    if not Path(path).exists():
+        return frozenset()
+    return frozenset(frozenset(pair["ids"]) for pair in json.loads(Path(path).read_text(encoding="utf-8")))
+
+
+def near_duplicates(hashes, distance, similar=frozenset()):
+    """[(distance, id_a, id_b)] for every pair of masters within `distance` bits, except `similar` ones."""
+    tree = BKTree()
+    pairs = []
+    for ex_id, h in sorted(hashes.items()):
+        if is_blank(h):
+            continue
+        pairs += [
+            (d, other, ex_id) for d, other in tree.search(h, distance)
+            if frozenset((other, ex_id)) not in similar
+        ]
+        tree.add(h, ex_id)
+    return sorted(pairs)
+
+
+def closest_pairs(hashes, n):
+    """The `n` closest master pairs, for picking a --distance."""
+    if n <= 0:
+        return []
+    tree = BKTree()
+    for ex_id, h in hashes.items():
+        if not is_blank(h):
+            tree.add(h, ex_id)
+    best = {}
+    for radius in (DUP_DISTANCE, DUP_DISTANCE * 2, DUP_DISTANCE * 4, HASH_ROWS * HASH_COLS):
+        for ex_id, h in hashes.items():
+            if is_blank(h):
+                continue
+            for d, other in tree.search(h, radius):
+                if other != ex_id:
+                    best[tuple(sorted((ex_id, other)))] = d
+        if len(best) >= n:
+            break
+    return sorted((d, a, b) for (a, b), d in best.items())[:n]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check exercise images: integrity, 3:1 ratio, near-duplicates")
+    parser.add_argument(
+        "--distance", type=int, default=DUP_DISTANCE,
+        help=f"Max differing hash bits for a near-duplicate (default: {DUP_DISTANCE} of {HASH_ROWS * HASH_COLS})",
+    )
+    parser.add_argument("--closest", type=int, default=5, help="Also list the N closest pairs (default: 5)")
+    parser.add_argument("--jobs", type=int, default=None, help="Worker processes (default: CPU count)")
+    args = parser.parse_args()
+
+    try:
+        import numpy  # noqa: F401
+        from PIL import Image  # noqa: F401
+    except ImportError:
+        print("ERROR: Install Pillow and numpy: pip install pillow numpy", file=sys.stderr)
+        sys.exit(1)
+
+    started = time.perf_counter()
+    exercises = load_all_exercises()
+    ids = {ex["id"] for ex in exercises}
+    files = sorted(p for p in OUTPUT_DIR.iterdir() if p.is_file() and not p.name.startswith("."))
+
+    with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+        results = list(pool.map(inspect_file, files, chunksize=8))
+
+    errors = {}        # id or file name → [problem]
+    hashes = {}
+    orphans = []
+    for path, problems, info in results:
+        path = Path(path)
+        m = VARIANT_RE.match(path.name)
+        ex_id = m["id"] if m else path.stem
+        if ex_id not in ids:
+            orphans.append(path.name)
+            continue
+        for problem in problems:
+            errors.setdefault(ex_id, []).append(f"{path.name}: {problem}")
+        if not m and info["hash"] is not None:
+            hashes[ex_id] = info["hash"]
+    for ex_id in sorted(ids - set(hashes) - set(errors)):
+        errors.setdefault(ex_id, []).append(f"{ex_id}.png: missing")
+
+    similar = load_similar()
+    duplicates = near_duplicates(hashes, args.distance, similar)
+    known = [pair for pair in near_duplicates(hashes, args.distance) if frozenset(pair[1:]) in similar]
+    elapsed = time.perf_counter() - started
+
+    print(f"{len(files)} files, {len(hashes)} masters decoded in {elapsed:.1f}s")
+    for ex_id, problems in sorted(errors.items()):
+        for problem in problems:
+            print(f"  ERROR {problem}", file=sys.stderr)
+    for name in orphans:
+        print(f"  WARN  {name}: no exercise with this id")
+    for d, a, b in known:
+        print(f"  OK    {a} ≈ {b} ({d} bits, listed in {SIMILAR_PATH.name})")
+    for d, a, b in duplicates:
+        print(f"  DUP   {a} ≈ {b} ({d} bits)", file=sys.stderr)
+
+    if args.closest:
+        print(f"\nClosest pairs (of {HASH_ROWS * HASH_COLS} bits):")
+        for d, a, b in closest_pairs(hashes, args.closest):
+            print(f"  {d:4d}  {a} / {b}")
+
+    # Regenerating the later id of a duplicate pair keeps the other one
+    redo = sorted(set(errors) | {b for _, _, b in duplicates})
+    if redo:
+        print(f"\n✗ {len(errors)} broken, {len(duplicates)} near-duplicate pairs. Regenerate with:")
+        print(f"  python3 scripts/gen_exercise_images.py --ids {','.join(redo)}")
+        sys.exit(1)
+    print("\n✓ all images OK")
+
+
+if __name__ == "__main__":
+    main()
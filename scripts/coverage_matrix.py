@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+coverage_matrix.py — Eligible pool size of every category for every profile
+the planner can see, and the combinations that leave a category empty.
+
+Usage:
+  python3 scripts/coverage_matrix.py [--thin 2] [--csv matrix.csv]
+  python3 scripts/coverage_matrix.py --check             # exit 1 on new dead cells
+  python3 scripts/coverage_matrix.py --update-baseline   # accept the current ones
+
+When a category has no eligible exercise, ProgramBuilder skips it silently
+and the session just gets shorter. This enumerates everything eligibility
+depends on:
+
+  injury_notes     every subset of the Contraindication enum (src/exercise.rs)
+  max_difficulty   1, 2, 3 (fitness level × age bracket, see below)
+  is_postpartum    adds postpartum + diastasis_recti, admits postpartum_only
+  has_anchor       admits requires_anchor
+
+and computes the [profile × category] pool-size matrix in one NumPy pass over
+the packed eligibility index (the same one build_bundle.py ships to the WASM
+Planner). A cell is dead at 0 exercises and thin below --thin.
+
+--check compares the dead cells of profiles the onboarding can actually
+produce (injuries from web/js/ui/onboarding.js) with scripts/coverage_baseline.json
+and fails only on new ones, so known gaps do not block while regressions do.
+
+Requirements:
+  pip install numpy
+"""
+
+import argparse
+import csv
+import itertools
+import json
+import sys
+import time
+from pathlib import Path
+
+from build_bundle import pack_planner
+from catalog import Catalog, write_atomic
+from validate_catalog import eligibility_flags, load_enums, onboarding_choices
+
+BASELINE_PATH = Path(__file__).parent / "coverage_baseline.json"
+
+UI_INJURIES, _ = onboarding_choices()
+# Profile.max_difficulty(): fitness level × age bracket → cap
+DIFFICULTY_CAPS = {
+    1: "beginner 45+",
+    2: "beginner, intermediate 45+",
+    3: "intermediate",
+}
+
+
+def enumerate_profiles(injury_values):
+    """Every (injuries, max_difficulty, postpartum, anchor) combination."""
+    subsets = [
+        combo for r in range(len(injury_values) + 1)
+        for combo in itertools.combinations(injury_values, r)
+    ]
+    return list(itertools.product(subsets, sorted(DIFFICULTY_CAPS), (False, True), (False, True)))
+
+
+def pool_matrix(planner, profiles):
+    """int [len(profiles), categories] of eligible exercise counts."""
+    import numpy as np
+
+    bit = {c: 1 << i for i, c in enumerate(planner["contraindications"])}
+    flag = eligibility_flags()
+    mask = np.array(planner["mask"], dtype=np.uint16)
+    difficulty = np.array(planner["difficulty"], dtype=np.uint8)
+    flags = np.array(planner["flags"], dtype=np.uint8)
+    offsets = planner["offsets"]
+    category = np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+
+    forbidden = np.zeros(len(profiles), dtype=np.uint16)
+    max_difficulty = np.zeros(len(profiles), dtype=np.uint8)
+    excluded = np.zeros(len(profiles), dtype=np.uint8)
+    for p, (injuries, cap, postpartum, anchor) in enumerate(profiles):
+        contra = [*injuries, *(("postpartum", "diastasis_recti") if postpartum else ())]
+        forbidden[p] = sum({bit[c] for c in contra})
+        max_difficulty[p] = cap
+        excluded[p] = (
+            flag["equipment"]
+            | (0 if postpartum else flag["postpartum_only"])
+            | (0 if anchor else flag["requires_anchor"])
+        )
+
+    eligible = (
+        ((mask[None, :] & forbidden[:, None]) == 0)
+        & (difficulty[None, :] <= max_difficulty[:, None])
+        & ((flags[None, :] & excluded[:, None]) == 0)
+    )
+    one_hot = category[:, None] == np.arange(len(offsets) - 1)[None, :]
+    return eligible.astype(np.int32) @ one_hot.astype(np.int32)
+
+
+def cell_key(category, profile):
+    injuries, cap, postpartum, anchor = profile
+    return f"{category}|{'+'.join(injuries) or '-'}|d{cap}|{'pp' if postpartum else 'std'}|{'anchor' if anchor else 'no-anchor'}"
+
+
+def minimal_causes(dead):
+    """
+    Collapse dead (category, profile) cells to the smallest injury sets:
+    {category: [(injuries, [(cap, postpartum, anchor), ...]), ...]}.
+    """
+    by_condition = {}
+    for category, (injuries, cap, postpartum, anchor) in dead:
+        by_condition.setdefault((category, cap, postpartum, anchor), []).append(frozenset(injuries))
+    causes = {}
+    for (category, *condition), sets in by_condition.items():
+        for s in sets:
+            if not any(other < s for other in sets):
+                causes.setdefault(category, {}).setdefault(s, []).append(tuple(condition))
+    return {
+        category: sorted(((tuple(sorted(s)), sorted(conds)) for s, conds in found.items()),
+                         key=lambda item: (len(item[0]), item[0]))
+        for category, found in causes.items()
+    }
+
+
+def describe_conditions(conds):
+    caps = sorted({c[0] for c in conds})
+    pp = sorted({c[1] for c in conds})
+    anchor = sorted({c[2] for c in conds})
+    parts = [f"max difficulty {'/'.join(map(str, caps))}"]
+    if len(pp) == 1:
+        parts.append("post-partum" if pp[0] else "not post-partum")
+    if len(anchor) == 1:
+        parts.append("with anchor" if anchor[0] else "no anchor")
+    return ", ".join(parts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-category eligibility coverage over the profile space")
+    parser.add_argument("--thin", type=int, default=2, help="Flag cells with fewer exercises (default: 2)")
+    parser.add_argument("--csv", metavar="PATH", help="Write the full matrix as CSV")
+    parser.add_argument("--check", action="store_true",
+                        help="Exit 1 if onboarding-reachable profiles have dead cells not in the baseline")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help=f"Record current dead cells in {BASELINE_PATH.name}")
+    args = parser.parse_args()
+
+    try:
+        import numpy as np
+    except ImportError:
+        print("ERROR: Install numpy: pip install numpy", file=sys.stderr)
+        sys.exit(1)
+
+    exercises = Catalog().exercises()
+    planner = pack_planner(exercises)
+    categories, _ = load_enums()["Category"]
+    injury_values, _ = load_enums()["Contraindication"]
+
+    started = time.perf_counter()
+    profiles = enumerate_profiles(injury_values)
+    pools = pool_matrix(planner, profiles)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    reachable = np.array([set(p[0]) <= set(UI_INJURIES) for p in profiles])
+    dead = pools == 0
+    thin = (pools > 0) & (pools < args.thin)
+
+    print(f"{len(profiles)} profiles ({2 ** len(injury_values)} injury sets × {len(DIFFICULTY_CAPS)} "
+          f"difficulty caps × post-partum × anchor) × {len(categories)} categories, "
+          f"{len(exercises)} exercises ({elapsed_ms:.1f} ms)\n")
+    print(f"  {'category':9s} {'min':>4s} {'median':>6s} {'max':>4s}  {'dead':>12s}  {'thin':>12s}")
+    for c, category in enumerate(categories):
+        col = pools[:, c]
+        print(f"  {category:9s} {col.min():4d} {int(np.median(col)):6d} {col.max():4d}  "
+              f"{dead[:, c].sum():5d} ({dead[reachable, c].sum():3d} UI)  "
+              f"{thin[:, c].sum():5d} ({thin[reachable, c].sum():3d} UI)")
+    print("  (UI = profiles the onboarding can produce)")
+
+    dead_cells = [(categories[c], profiles[p]) for p, c in zip(*np.nonzero(dead))]
+    causes = minimal_causes(dead_cells)
+    if causes:
+        print("\nSmallest injury sets that empty a category:")
+        for category in categories:
+            for injuries, conds in causes.get(category, []):
+                print(f"  {category:9s} {{{', '.join(injuries) or 'no injury'}}}: {describe_conditions(conds)}")
+
+    thin_cells = [(categories[c], profiles[p]) for p, c in zip(*np.nonzero(thin & reachable[:, None]))]
+    if thin_cells:
+        print(f"\nThin cells reachable from the onboarding (< {args.thin} exercises): {len(thin_cells)}")
+        for category, profile in thin_cells[:10]:
+            print(f"  {cell_key(category, profile)}")
+        if len(thin_cells) > 10:
+            print(f"  … {len(thin_cells) - 10} more (see --csv)")
+
+    if args.csv:
+        with open(args.csv, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["injuries", "max_difficulty", "postpartum", "has_anchor", *categories])
+            for profile, row in zip(profiles, pools):
+                injuries, cap, postpartum, anchor = profile
+                writer.writerow(["+".join(injuries), cap, int(postpartum), int(anchor), *row.tolist()])
+        print(f"\nMatrix written to {args.csv}")
+
+    ui_dead = sorted(cell_key(categories[c], profiles[p]) for p, c in zip(*np.nonzero(dead & reachable[:, None])))
+    if args.update_baseline:
+        write_atomic(BASELINE_PATH, (json.dumps({"dead": ui_dead}, indent=2) + "\n").encode("utf-8"))
+        print(f"\nBaseline updated: {len(ui_dead)} known dead cells")
+    elif args.check:
+        known = set(json.loads(BASELINE_PATH.read_text(encoding="utf-8"))["dead"]) if BASELINE_PATH.exists() else set()
+        new = [key for key in ui_dead if key not in known]
+        fixed = sorted(known - set(ui_dead))
+        if fixed:
+            print(f"\n{len(fixed)} baseline dead cells now covered — run --update-baseline")
+        if new:
+            print(f"\n✗ {len(new)} new dead cells:", file=sys.stderr)
+            for key in new:
+                print(f"  {key}", file=sys.stderr)
+            sys.exit(1)
+        print(f"\n✓ no new dead cells ({len(ui_dead)} known)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+dev_server.py — Threaded static server for web/ that behaves like the
+production CDN: precompressed assets, revalidation, ranges, and optional
+network throttling, with a per-request timing log.
+
+Usage:
+  python3 scripts/precompress.py
+  python3 scripts/dev_server.py [--port 8080] [--no-compression]
+  python3 scripts/dev_server.py --profile slow-3g        # see PROFILES
+  python3 scripts/dev_server.py --latency 0.3 --bandwidth 1000
+
+Compression: for GET/HEAD of /path, if the request's Accept-Encoding allows
+it and web/path.br (then web/path.gz) exists and is not older than
+web/path, that file is sent with Content-Encoding and the Content-Type of
+the original. Every response carries Vary: Accept-Encoding.
+
+Caching: every file gets an ETag (mtime + size of the bytes actually sent,
+so the .br and .gz variants differ) and is answered 304 on If-None-Match.
+Content-hashed names (thumbs-0.1a2b3c4d.webp) are sent immutable for a
+year, everything else no-cache, i.e. revalidated on every use.
+
+Ranges: a single `bytes=` range on an uncompressed response is answered 206
+(416 when out of bounds). Range requests are never served precompressed.
+
+Throttling: --latency delays every response, --bandwidth (kbit/s) is shared
+by all connections like one access link, so parallel downloads slow each
+other down as they would on a phone.
+
+Timing log, one line per request:
+  +  412ms  GET /js/app.js  200 br   3,214 B  ttfb 401ms  total 409ms
+The offset restarts at every request for / or /index.html, so a reload
+prints the page's waterfall from zero.
+
+Requirements:
+  none
+"""
+
+import argparse
+import re
+import sys
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from functools import partial
+from http import HTTPStatus
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+WEB_DIR = Path(__file__).parent.parent / "web"
+
+# Preference order when the client accepts several
+ENCODINGS = (("br", "br"), ("gzip", "gz"))
+
+MIME_TYPES = {
+    ".wasm": "application/wasm",
+    ".js": "text/javascript",
+    ".mjs": "text/javascript",
+    ".json": "application/json",
+    ".webmanifest": "application/manifest+json",
+    ".webp": "image/webp",
+    ".avif": "image/avif",
+    ".svg": "image/svg+xml",
+}
+
+# name → (latency s, downstream kbit/s), Chrome DevTools / Lighthouse presets
+PROFILES = {
+    "slow-3g": (2.0, 400),
+    "3g":      (0.5625, 1_440),
+    "slow-4g": (0.15, 1_600),
+    "4g":      (0.04, 9_000),
+}
+
+HASHED_NAME = re.compile(r"\.[0-9a-f]{8}\.\w+$")
+RANGE_RE = re.compile(r"bytes=(\d*)-(\d*)$")
+CHUNK = 16 * 1024
+
+
+def accepted_encodings(header):
+    """Set of content codings allowed by an Accept-Encoding header (q=0 excluded)."""
+    accepted = set()
+    for item in (header or "").split(","):
+        name, _, params = item.strip().partition(";")
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        if name:
+            accepted.add(name.strip().lower())
+    return accepted
+
+
+def parse_range(header, size):
+    """(start, end) inclusive for a single `bytes=` range, None to ignore it, or "invalid"."""
+    m = RANGE_RE.match((header or "").strip())
+    if not m or not (m[1] or m[2]):
+        return None
+    if not m[1]:
+        start, end = max(0, size - int(m[2])), size - 1
+    else:
+        start, end = int(m[1]), min(int(m[2]), size - 1) if m[2] else size - 1
+    if start >= size or start > end:
+        return "invalid"
+    return start, end
+
+
+def make_etag(st, coding):
+    suffix = "" if coding == "identity" else f"-{coding}"
+    return f'"{st.st_mtime_ns:x}-{st.st_size:x}{suffix}"'
+
+
+class Link:
+    """One shared downstream pipe: bytes from every connection queue on it."""
+
+    def __init__(self, kbit_s):
+        self.bytes_per_s = kbit_s * 1000 / 8
+        self.free_at = 0.0
+        self.lock = threading.Lock()
+
+    def transmit(self, n):
+        with self.lock:
+            start = max(time.monotonic(), self.free_at)
+            self.free_at = start + n / self.bytes_per_s
+            done = self.free_at
+        time.sleep(max(0.0, done - time.monotonic()))
+
+
+class PrecompressedHandler(SimpleHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    extensions_map = {**SimpleHTTPRequestHandler.extensions_map, **MIME_TYPES}
+
+    compression = True
+    latency_s = 0.0
+    link = None
+    epoch = time.perf_counter()
+
+    # ── Request lifecycle ───────────────────────────────────────────────────
+
+    def do_GET(self):
+        self._begin()
+        super().do_GET()
+        self._log_timing()
+
+    def do_HEAD(self):
+        self._begin()
+        super().do_HEAD()
+        self._log_timing()
+
+    def _begin(self):
+        self._started = time.perf_counter()
+        self._first_byte = None
+        self._code = "-"
+        self._coding = "identity"
+        self._remaining = None
+        self._sent = 0
+        if self.path.split("?")[0] in ("/", "/index.html"):
+            type(self).epoch = self._started
+
+    def send_head(self):
+        if self.latency_s:
+            time.sleep(self.latency_s)
+        path = Path(self.translate_path(self.path))
+        if path.is_dir() and self.path.split("?")[0].endswith("/"):
+            path = path / "index.html"
+        if not path.is_file():
+            return super().send_head()   # redirect, listing or 404
+
+        content_type = self.guess_type(str(path))
+        range_header = self.headers.get("Range")
+        source, coding = path, "identity"
+        if self.compression and not range_header:
+            accepted = accepted_encodings(self.headers.get("Accept-Encoding"))
+            for name, ext in ENCODINGS:
+                packed = path.with_name(f"{path.name}.{ext}")
+                if (name in accepted or "*" in accepted) and packed.is_file() \
+                        and packed.stat().st_mtime >= path.stat().st_mtime:
+                    source, coding = packed, name
+                    break
+
+        st = source.stat()
+        etag = make_etag(st, coding)
+        self._coding = coding
+        if self._not_modified(etag, st):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self._entity_headers(path, etag, coding)
+            self.end_headers()
+            return None
+
+        start, end = 0, st.st_size - 1
+        partial_content = False
+        if range_header and self.headers.get("If-Range", etag) == etag:
+            requested = parse_range(range_header, st.st_size)
+            if requested == "invalid":
+                self.send_response(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE)
+                self.send_header("Content-Range", f"bytes */{st.st_size}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return None
+            if requested:
+                (start, end), partial_content = requested, True
+
+        f = open(source, "rb")
+        f.seek(start)
+        self._remaining = end - start + 1
+        self.send_response(HTTPStatus.PARTIAL_CONTENT if partial_content else HTTPStatus.OK)
+        self.send_header("Content-Type", content_type)
+        if partial_content:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{st.st_size}")
+        self.send_header("Content-Length", str(self._remaining))
+        self._entity_headers(path, etag, coding)
+        self.end_headers()
+        return f
+
+    def _not_modified(self, etag, st):
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match is not None:
+            tags = {t.strip().removeprefix("W/") for t in if_none_match.split(",")}
+            return etag in tags or "*" in tags
+        since = self.headers.get("If-Modified-Since")
+        if since:
+            try:
+                return int(st.st_mtime) <= parsedate_to_datetime(since).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def _entity_headers(self, path, etag, coding):
+        if coding != "identity":
+            self.send_header("Content-Encoding", coding)
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", self.date_time_string(int(path.stat().st_mtime)))
+        self.send_header("Accept-Ranges", "bytes")
+        immutable = HASHED_NAME.search(path.name)
+        self.send_header("Cache-Control", "public, max-age=31536000, immutable" if immutable else "no-cache")
+
+    def end_headers(self):
+        self.send_header("Vary", "Accept-Encoding")
+        super().end_headers()
+        self._first_byte = time.perf_counter()
+
+    def copyfile(self, source, outputfile):
+        remaining = self._remaining
+        while remaining is None or remaining > 0:
+            chunk = source.read(CHUNK if remaining is None else min(CHUNK, remaining))
+            if not chunk:
+                break
+            if self.link:
+                self.link.transmit(len(chunk))
+            outputfile.write(chunk)
+            self._sent += len(chunk)
+            if remaining is not None:
+                remaining -= len(chunk)
+
+    # ── Logging ─────────────────────────────────────────────────────────────
+
+    def log_request(self, code="-", size="-"):
+        self._code = getattr(code, "value", code)
+
+    def _log_timing(self):
+        if not hasattr(self, "_started"):
+            return
+        done = time.perf_counter()
+        ttfb = (self._first_byte or done) - self._started
+        method, _, rest = (self.requestline or "-").partition(" ")
+        path = rest.rsplit(" ", 1)[0]
+        sys.stderr.write(
+            f"+{(self._started - self.epoch) * 1000:6.0f}ms  {method:4s} {path}  {self._code} "
+            f"{self._coding:8s} {self._sent:9,d} B  ttfb {ttfb * 1000:.0f}ms  "
+            f"total {(done - self._started) * 1000:.0f}ms\n"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve web/ like production, optionally throttled")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--no-compression", action="store_true", help="Ignore .br / .gz siblings")
+    parser.add_argument("--profile", choices=PROFILES, help="Network throttling preset")
+    parser.add_argument("--latency", type=float, help="Seconds added before every response")
+    parser.add_argument("--bandwidth", type=float, help="Shared downstream bandwidth in kbit/s")
+    args = parser.parse_args()
+
+    latency, bandwidth = PROFILES.get(args.profile, (0.0, None))
+    latency = args.latency if args.latency is not None else latency
+    bandwidth = args.bandwidth if args.bandwidth is not None else bandwidth
+
+    PrecompressedHandler.compression = not args.no_compression
+    PrecompressedHandler.latency_s = latency
+    PrecompressedHandler.link = Link(bandwidth) if bandwidth else None
+    handler = partial(PrecompressedHandler, directory=str(WEB_DIR))
+    server = ThreadingHTTPServer((args.host, args.port), handler)
+
+    notes = [] if PrecompressedHandler.compression else ["compression off"]
+    if latency or bandwidth:
+        notes.append(f"{args.profile or 'throttled'}: {latency * 1000:.0f} ms"
+                     + (f", {bandwidth:,.0f} kbit/s" if bandwidth else ""))
+    print(f"Serving {WEB_DIR} on http://{args.host}:{args.port}"
+          + (f" ({'; '.join(notes)})" if notes else ""), file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+fake_gemini_server.py — Local stand-in for the Gemini generateContent and Batch
+endpoints, for exercising gen_exercise_images.py and batch_images.py offline
+(concurrency, retries, polling, timing).
+
+Usage:
+  python3 scripts/fake_gemini_server.py --port 8765 --latency 2 --fail-rate 0.2
+  GEMINI_API_KEY=fake python3 scripts/gen_exercise_images.py --category push \\
+      --base-url http://127.0.0.1:8765
+
+With --base-url, gen_exercise_images.py writes into a scratch directory
+(scripts/.image_scratch/ unless --output-dir says otherwise), never over the
+masters in web/icons/exercises/ or scripts/image_manifest.json.
+
+Every POST .../models/<model>:generateContent answers after `--latency` seconds
+with a 1792x592 JPEG (the real output size): three panels of flat shapes drawn
+from the prompt's hash, so every exercise gets a different picture that passes
+check_images.py (--blank sends one white image instead, which it rejects). A
+`--fail-rate` fraction of requests fail with 429 or 503 so the retry path can
+be observed; --seed makes the failures reproducible.
+
+  python3 scripts/fake_gemini_server.py --batch-duration 5
+  GEMINI_API_KEY=fake python3 scripts/batch_images.py run batch.jsonl \\
+      --base-url http://127.0.0.1:8765 --poll-interval 1 --output-dir /tmp/batch
+
+POST .../models/<model>:batchGenerateContent creates an in-memory job that
+stays RUNNING for `--batch-duration` seconds, then GET .../batches/<id> returns
+it SUCCEEDED with one image per request (inline, or as a JSONL responses file
+with --responses-file). `--fail-rate` turns into per-request errors.
+
+Requirements:
+  none (Pillow is used for full-size images when installed)
+"""
+
+import argparse
+import base64
+import hashlib
+import io
+import json
+import random
+import itertools
+import sys
+import threading
+import time
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+IMAGE_SIZE = (1792, 592)
+PANELS     = 3
+COLORS     = ("#2D6A4F", "#F4A261", "#CCCCCC")
+
+# 3x1 white JPEG, used when Pillow is not installed
+TINY_JPEG = base64.b64decode(
+    "/9j/4AAQSkZJRgABAQAAAQABAAD/2wBDABALDA4MChAODQ4SERATGCgaGBYWGDEjJR0oOjM9PDkzODdA"
+    "SFxOQERXRTc4UG1RV19iZ2hnPk1xeXBkeFxlZ2P/wAALCAABAAMBAREA/8QAHwAAAQUBAQEBAQEAAAAA"
+    "AAAAAAECAwQFBgcICQoL/8QAtRAAAgEDAwIEAwUFBAQAAAF9AQIDAAQRBRIhMUEGE1FhByJxFDKBkaEI"
+    "I0KxwRVS0fAkM2JyggkKFhcYGRolJicoKSo0NTY3ODk6Q0RFRkdISUpTVFVWV1hZWmNkZWZnaGlqc3R1"
+    "dnd4eXqDhIWGh4iJipKTlJWWl5iZmqKjpKWmp6ipqrKztLW2t7i5usLDxMXGx8jJytLT1NXW19jZ2uHi"
+    "4+Tl5ufo6erx8vP09fb3+Pn6/9oACAEBAAA/APQK/9k="
+)
+
+
+def make_image(seed=None):
+    """
+    JPEG of the real output size: blank white when `seed` is None, else three
+    panels of flat shapes picked by `seed`, distinct enough between seeds to
+    pass the near-duplicate check.
+    """
+    try:
+        from PIL import Image, ImageDraw
+    except ImportError:
+        return TINY_JPEG
+    width, height = IMAGE_SIZE
+    im = Image.new("RGB", IMAGE_SIZE, "white")
+    if seed is not None:
+        rng = random.Random(seed)
+        draw = ImageDraw.Draw(im)
+        panel = width // PANELS
+        for p in range(PANELS):
+            x0 = p * panel
+            if p:
+                draw.line([(x0, 0), (x0, height)], fill="black", width=4)
+            for _ in range(4):
+                x, y = x0 + rng.randrange(20, panel - 200), rng.randrange(20, height - 200)
+                w, h = rng.randrange(60, 180), rng.randrange(60, 180)
+                draw.rectangle([x, y, x + w, y + h], fill=rng.choice(COLORS), outline="black", width=4)
+    buf = io.BytesIO()
+    im.save(buf, format="JPEG", quality=80)
+    return buf.getvalue()
+
+
+@lru_cache(maxsize=512)
+def prompt_image_b64(prompt):
+    """Base64 test image for a prompt (same prompt, same picture)."""
+    seed = int.from_bytes(hashlib.sha256(prompt.encode("utf-8")).digest()[:8], "big")
+    return base64.b64encode(make_image(seed)).decode()
+
+
+def request_prompt(request):
+    """Concatenated text parts of a generateContent request body."""
+    contents = request.get("contents", [])
+    if isinstance(contents, dict):
+        contents = [contents]
+    return "".join(part.get("text", "") for c in contents for part in c.get("parts", []))
+
+
+NOT_FOUND = {"error": {"code": 404, "message": "Not found", "status": "NOT_FOUND"}}
+
+
+def make_handler(image_b64, latency, fail_rate, batch_duration=5.0, responses_file=False, seed=None):
+    """
+    Request handler class. `image_b64` is sent for every image, or None for a
+    distinct picture per prompt (prompt_image_b64). `seed` fixes the sequence
+    of injected failures.
+    """
+    rng = random.Random(seed)
+    rng_lock = threading.Lock()
+    jobs = {}               # id → {"created", "keys", "prompts", "failed"}
+    job_ids = itertools.count(1)
+    jobs_lock = threading.Lock()
+
+    def failure():
+        """(code, status) of an injected error, or None to answer normally."""
+        with rng_lock:
+            if rng.random() < fail_rate:
+                return rng.choice([(429, "RESOURCE_EXHAUSTED"), (503, "UNAVAILABLE")])
+        return None
+
+    def image_response(prompt):
+        return {
+            "candidates": [{
+                "content": {
+                    "role": "model",
+                    "parts": [{"inlineData": {
+                        "mimeType": "image/jpeg", "data": image_b64 or prompt_image_b64(prompt),
+                    }}],
+                },
+                "finishReason": "STOP",
+            }],
+        }
+
+    def batch_results(job_id):
+        job = jobs[job_id]
+        for key, prompt in zip(job["keys"], job["prompts"]):
+            if key in job["failed"]:
+                yield key, None, {"code": 500, "message": "fake failure"}
+            else:
+                yield key, image_response(prompt), None
+
+    def batch_operation(job_id):
+        job = jobs[job_id]
+        name = f"batches/{job_id}"
+        done = time.monotonic() - job["created"] >= batch_duration
+        op = {"name": name, "metadata": {
+            "name": name,
+            "state": "BATCH_STATE_SUCCEEDED" if done else "BATCH_STATE_RUNNING",
+            "batchStats": {"requestCount": str(len(job["keys"]))},
+        }}
+        if not done:
+            return op
+        op["done"] = True
+        if responses_file:
+            op["response"] = {"responsesFile": f"files/batch-{job_id}"}
+        else:
+            op["response"] = {"inlinedResponses": {"inlinedResponses": [
+                {"metadata": {"key": key}, **({"error": error} if error else {"response": response})}
+                for key, response, error in batch_results(job_id)
+            ]}}
+        return op
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            body = self.rfile.read(length)
+            path = self.path.split("?")[0]
+
+            if path.endswith(":batchGenerateContent"):
+                return self._create_batch(json.loads(body))
+
+            time.sleep(latency)
+
+            if not path.endswith(":generateContent"):
+                return self._send(404, NOT_FOUND)
+
+            injected = failure()
+            if injected:
+                code, status = injected
+                return self._send(code, {"error": {"code": code, "message": "fake failure", "status": status}})
+
+            self._send(200, image_response(request_prompt(json.loads(body or b"{}"))))
+
+        def do_GET(self):
+            path = self.path.split("?")[0]
+            if "/batches/" in path:
+                job_id = path.rsplit("/", 1)[1]
+                with jobs_lock:
+                    if job_id not in jobs:
+                        return self._send(404, NOT_FOUND)
+                    return self._send(200, batch_operation(job_id))
+            if path.startswith("/download/") and path.endswith(":download"):
+                job_id = path[:-len(":download")].rsplit("batch-", 1)[-1]
+                with jobs_lock:
+                    if job_id not in jobs:
+                        return self._send(404, NOT_FOUND)
+                    lines = [
+                        json.dumps({"key": key, **({"error": error} if error else {"response": response})})
+                        for key, response, error in batch_results(job_id)
+                    ]
+                return self._send_bytes(200, ("\n".join(lines) + "\n").encode(), "application/jsonl")
+            self._send(404, NOT_FOUND)
+
+        def _create_batch(self, payload):
+            try:
+                requests = payload["batch"]["input_config"]["requests"]["requests"]
+                keys = [r["metadata"]["key"] for r in requests]
+                prompts = [request_prompt(r["request"]) for r in requests]
+            except (KeyError, TypeError):
+                return self._send(400, {"error": {"code": 400, "message": "bad batch", "status": "INVALID_ARGUMENT"}})
+            with jobs_lock:
+                job_id = str(next(job_ids))
+                jobs[job_id] = {
+                    "created": time.monotonic(),
+                    "keys": keys,
+                    "prompts": prompts,
+                    "failed": {k for k in keys if failure()},
+                }
+                self._send(200, batch_operation(job_id))
+
+        def _send(self, code, payload):
+            self._send_bytes(code, json.dumps(payload).encode(), "application/json")
+
+        def _send_bytes(self, code, body, content_type):
+            self.send_response(code)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, fmt, *args):
+            print(f"  {self.address_string()} {fmt % args}", file=sys.stderr)
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Gemini generateContent server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=1.0, help="Seconds per request (default: 1.0)")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Fraction of 429/503 replies (default: 0)")
+    parser.add_argument(
+        "--batch-duration", type=float, default=5.0, help="Seconds a batch job stays RUNNING (default: 5)",
+    )
+    parser.add_argument(
+        "--responses-file", action="store_true", help="Return batch results as a JSONL file instead of inline",
+    )
+    parser.add_argument("--blank", action="store_true", help="Send one white image for every prompt")
+    parser.add_argument("--seed", type=int, help="Seed of the injected failures (default: random)")
+    args = parser.parse_args()
+
+    image_b64 = base64.b64encode(make_image()).decode() if args.blank else None
+    handler = make_handler(
+        image_b64, args.latency, args.fail_rate, args.batch_duration, args.responses_file, seed=args.seed,
+    )
+    server = ThreadingHTTPServer((args.host, args.port), handler)
+    print(f"Fake Gemini on http://{args.host}:{args.port} "
+          f"(latency {args.latency}s, fail rate {args.fail_rate:.0%})", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -5,19 +5,90 @@ them in OOPS JSON format for manual review and curation.
 
 Usage:
   python3 scripts/fetch_wger.py > scripts/wger_candidates.json
+  python3 scripts/fetch_wger.py --offline          # cache only, no network
+  python3 scripts/fetch_wger.py --base-url http://127.0.0.1:8766
+  python3 scripts/fetch_wger.py --sync > scripts/wger_diff.json
+  python3 scripts/fetch_wger.py --sync --since 2025-06-01
 
 Then review wger_candidates.json and copy relevant exercises into
 web/data/exercises/<category>.json
 
+Sync mode (--sync):
+  scripts/wger_state.json remembers every in-scope wger base seen (id →
+  last_update, generated OOPS id). A sync run only builds candidates for bases
+  that are new or whose last_update moved, and prints a structured diff:
+    {"new": [...], "changed": [...], "removed": [...], "curated": [...]}
+  "curated" lists new bases already present in web/data/exercises/*.json
+  (matched by _wger_id / wger_id or by generated id), which need no triage.
+  --since ISO-DATE reports every base updated after that date instead, still
+  sorted into new / curated (not in the state file) and changed (known), and
+  leaves the state as it is.
+
+  The state is rewritten atomically after each sync. Commit it together with
+  the exercises curated from that sync, so the next run, on any machine,
+  diffs against what was already triaged (--no-save for a trial run).
+
+  The wger listing has no server-side "modified since" filter, so the delta
+  transfer relies on the conditional GETs below: unchanged pages come back
+  as 304 with no body.
+
+Near-duplicates:
+  Every candidate (and every new / changed base in --sync) gets a "_similar"
+  list: up to 3 curated exercises whose name or instructions are close to
+  its own, as {"id", "similarity", "on"}, best first. The curated catalog is
+  indexed once per run with MinHash over character n-grams (minhash.py), so
+  each lookup only scores the exercises that share an LSH bucket with the
+  candidate. A best similarity of DUPLICATE_SIMILARITY or more is reported as
+  a likely duplicate (e.g. wger "Wall Sit" vs wall_sit). Names are compared
+  without spaces or punctuation, by the share of the candidate's n-grams found
+  in the curated name (containment), so a longer curated name is not
+  penalised; instructions by the Jaccard index of their n-gram sets. A
+  generic name ("Push-Up") is contained in every curated variant: those ties
+  are ordered by how close the instructions are, then by id, so read the
+  whole list, not just the first entry.
+
+Fetching:
+  exerciseinfo already embeds every translation, so one paginated listing is
+  all we need: the first page gives the count, the remaining pages are fetched
+  concurrently over persistent keep-alive connections (one per worker).
+  Responses are cached in scripts/.wger_cache/ and revalidated with
+  ETag / If-Modified-Since once older than --ttl, so re-runs are nearly free.
+  wger_fixture_server.py serves that cache locally for offline testing.
+
 API docs: https://wger.de/api/v2/
 """
 
+import argparse
+import gzip
+import hashlib
+import http.client
 import json
+import re
 import sys
-import urllib.request
+import threading
+import time
 import urllib.parse
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from catalog import Catalog, write_atomic
+from minhash import LSHIndex, containment, jaccard
+
+BASE_URL      = "https://wger.de/api/v2"
+CACHE_DIR     = Path(__file__).parent / ".wger_cache"
+STATE_PATH    = Path(__file__).parent / "wger_state.json"
 
-BASE_URL = "https://wger.de/api/v2"
+PAGE_SIZE   = 100
+WORKERS     = 8
+TIMEOUT_S   = 15
+CACHE_TTL_S = 3600   # serve cached responses without revalidating for 1 h
+
+# Curated matches at or above this similarity are reported as likely duplicates
+DUPLICATE_SIMILARITY = 0.6
+# Weaker matches are not listed in "_similar"
+MATCH_MIN_SIMILARITY = 0.3
+MATCH_LIMIT          = 3
 
 # wger equipment ID for bodyweight exercises
 BODYWEIGHT_EQUIPMENT_ID = 7
@@ -58,39 +129,150 @@ MOVEMENT_PATTERNS = {
 }
 
 
-def fetch_json(url):
-    req = urllib.request.Request(url, headers={"Accept": "application/json"})
-    with urllib.request.urlopen(req, timeout=15) as resp:
-        return json.loads(resp.read().decode())
-
-
-def fetch_all_pages(url):
-    """Fetch all pages of a paginated wger API endpoint."""
-    results = []
-    next_url = url
-    while next_url:
-        data = fetch_json(next_url)
-        results.extend(data.get("results", []))
-        next_url = data.get("next")
-    return results
-
-
-def get_translations(exercise_id):
-    """Fetch FR and EN translations for a given exercise base ID."""
-    url = f"{BASE_URL}/exercise/?format=json&exercise_base={exercise_id}&language={LANG_EN}&limit=5"
-    en_results = fetch_all_pages(url)
-    url_fr = f"{BASE_URL}/exercise/?format=json&exercise_base={exercise_id}&language={LANG_FR}&limit=5"
-    fr_results = fetch_all_pages(url_fr)
-
-    name_en = en_results[0]["name"].strip() if en_results else ""
-    desc_en = en_results[0].get("description", "").strip() if en_results else ""
-    name_fr = fr_results[0]["name"].strip() if fr_results else name_en
-    desc_fr = fr_results[0].get("description", "").strip() if fr_results else desc_en
+HTML_TAG = re.compile(r"<[^>]+>")
+
+
+def cache_key(rel):
+    """Cache file name for a request path relative to the API root."""
+    return hashlib.sha256(rel.encode("utf-8")).hexdigest()
+
+
+class WgerClient:
+    """
+    Thread-safe JSON client for the wger API: one persistent HTTP(S)
+    connection per thread, plus an on-disk response cache revalidated with
+    ETag / If-Modified-Since.
+    """
+
+    def __init__(self, base_url=BASE_URL, cache_dir=CACHE_DIR, ttl_s=CACHE_TTL_S,
+                 timeout_s=TIMEOUT_S, offline=False):
+        parts = urllib.parse.urlsplit(base_url)
+        self.https   = parts.scheme == "https"
+        self.host    = parts.netloc
+        self.prefix  = parts.path.rstrip("/")
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.ttl_s   = ttl_s
+        self.timeout_s = timeout_s
+        self.offline = offline
+        self.local   = threading.local()
+        self.lock    = threading.Lock()
+        self.stats   = Counter()   # fresh / revalidated / fetched / bytes
+
+    def _count(self, key, n=1):
+        with self.lock:
+            self.stats[key] += n
+
+    def _connection(self):
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            cls = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+            conn = self.local.conn = cls(self.host, timeout=self.timeout_s)
+        return conn
+
+    def _request(self, path, headers):
+        # A kept-alive connection may have been closed by the server: retry once
+        for attempt in (0, 1):
+            conn = self._connection()
+            try:
+                conn.request("GET", path, headers=headers)
+                resp = conn.getresponse()
+                body = resp.read()
+                return resp.status, resp, body
+            except (http.client.HTTPException, ConnectionError):
+                conn.close()
+                self.local.conn = None
+                if attempt:
+                    raise
+
+    def _load(self, key):
+        path = self.cache_dir / f"{key}.json"
+        if not path.exists():
+            return None
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def _store(self, key, entry):
+        path = self.cache_dir / f"{key}.json"
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(entry, f, ensure_ascii=False)
+        tmp.replace(path)
+
+    def get_json(self, rel):
+        """GET `rel` (relative to the API root), served from cache when possible."""
+        key = cache_key(rel)
+        entry = self._load(key)
+        now = time.time()
+        if entry and (self.offline or now - entry["fetched_at"] < self.ttl_s):
+            self._count("fresh")
+            return entry["body"]
+        if self.offline:
+            raise RuntimeError(f"not cached (offline): {rel}")
+
+        headers = {"Accept": "application/json", "Accept-Encoding": "gzip"}
+        if entry and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+        status, resp, body = self._request(f"{self.prefix}/{rel}", headers)
+        self._count("bytes", len(body))
+        if status == 304 and entry:
+            entry["fetched_at"] = now
+            self._store(key, entry)
+            self._count("revalidated")
+            return entry["body"]
+        if status != 200:
+            raise RuntimeError(f"HTTP {status} for {rel}")
+
+        if resp.getheader("Content-Encoding") == "gzip":
+            body = gzip.decompress(body)
+        entry = {
+            "rel": rel,
+            "etag": resp.getheader("ETag"),
+            "last_modified": resp.getheader("Last-Modified"),
+            "fetched_at": now,
+            "body": json.loads(body.decode("utf-8")),
+        }
+        self._store(key, entry)
+        self._count("fetched")
+        return entry["body"]
+
+    def fetch_all_pages(self, rel, pool, page_size=PAGE_SIZE):
+        """
+        Fetch every page of a paginated endpoint. Page URLs are computed from
+        the first page's `count` (not from `next`) so they can be fetched
+        concurrently and stay independent of the host.
+        """
+        sep = "&" if "?" in rel else "?"
+        first = self.get_json(f"{rel}{sep}limit={page_size}&offset=0")
+        offsets = range(page_size, first.get("count", 0), page_size)
+        pages = pool.map(lambda off: self.get_json(f"{rel}{sep}limit={page_size}&offset={off}"), offsets)
+        results = list(first.get("results", []))
+        for page in pages:
+            results.extend(page.get("results", []))
+        return results
+
+
+def get_translations(base):
+    """FR and EN name/description from the translations embedded in `exerciseinfo`."""
+    by_lang = {}
+    for tr in base.get("translations") or base.get("exercises") or []:
+        lang = tr.get("language")
+        lang = lang.get("id") if isinstance(lang, dict) else lang
+        by_lang.setdefault(lang, tr)
+
+    en = by_lang.get(LANG_EN) or {}
+    fr = by_lang.get(LANG_FR) or {}
+    name_en = (en.get("name") or "").strip()
+    desc_en = (en.get("description") or "").strip()
+    name_fr = (fr.get("name") or "").strip() or name_en
+    desc_fr = (fr.get("description") or "").strip() or desc_en
 
     # Strip HTML tags from descriptions (wger uses HTML)
-    import re
-    desc_en = re.sub(r"<[^>]+>", " ", desc_en).strip()
-    desc_fr = re.sub(r"<[^>]+>", " ", desc_fr).strip()
+    desc_en = HTML_TAG.sub(" ", desc_en).strip()
+    desc_fr = HTML_TAG.sub(" ", desc_fr).strip()
 
     return name_en, name_fr, desc_en, desc_fr
 
@@ -113,70 +295,262 @@ def guess_movement_pattern(name_en, category):
 
 def make_oops_id(name_en, category):
     """Generate a snake_case ID from name and category."""
-    import re
     slug = re.sub(r"[^a-z0-9]+", "_", name_en.lower()).strip("_")
     return f"{category[:4]}_{slug[:30]}"
 
 
-def main():
-    print("Fetching bodyweight exercise bases from wger...", file=sys.stderr)
+def make_candidate(base):
+    """OOPS candidate record for one exerciseinfo base, or None if out of scope."""
+    category_id = (base.get("category") or {}).get("id")
+    if category_id not in CATEGORY_MAP:
+        return None
+
+    category = CATEGORY_MAP[category_id]
+    name_en, name_fr, desc_en, desc_fr = get_translations(base)
+    if not name_en:
+        return None
+
+    return {
+        "id": make_oops_id(name_en, category),
+        "_wger_id": base["id"],
+        "name_fr": name_fr or name_en,
+        "name_en": name_en,
+        "category": category,
+        "movement_pattern": guess_movement_pattern(name_en, category),
+        "difficulty": 2,        # Default: medium — review manually
+        "equipment_required": False,
+        "requires_anchor": False,
+        "postpartum_only": False,
+        "contraindications": [],
+        "instructions_fr": desc_fr or "Instructions à compléter.",
+        "instructions_en": desc_en or "Instructions to be completed.",
+        # Timed vs reps: fill manually based on movement_pattern
+        # Core/mobility patterns → add duration_s; others → add reps + sets + rest_s
+        "_TODO": "Review: set difficulty, reps OR duration_s, sets, rest_s, progression_to, contraindications"
+    }
 
-    # Fetch all exercise bases with bodyweight equipment
-    url = (
-        f"{BASE_URL}/exerciseinfo/"
-        f"?format=json&equipment={BODYWEIGHT_EQUIPMENT_ID}&limit=100"
-    )
-    bases = fetch_all_pages(url)
-    print(f"Found {len(bases)} exercise bases.", file=sys.stderr)
 
-    candidates = []
-    skipped = 0
+class CatalogMatcher:
+    """
+    MinHash / LSH index of the curated catalog's names and instructions, both
+    languages, for near-duplicate lookups of wger candidates.
+    """
+
+    # Filled in by make_candidate() when wger has no description: not compared
+    PLACEHOLDERS = {"Instructions à compléter.", "Instructions to be completed."}
+
+    def __init__(self, exercises):
+        self.indexes = {
+            # rows=1: a generic name shares a bucket with its longer variants
+            "name":         LSHIndex(ngram=3, bands=64, rows=1, squash=True),
+            "instructions": LSHIndex(ngram=5, bands=32, rows=2),
+        }
+        for ex in exercises:
+            for field, index in self.indexes.items():
+                for lang in ("en", "fr"):
+                    index.add((ex["id"], f"{field}_{lang}"), ex.get(f"{field}_{lang}"))
+
+    # Names by how much of the candidate's name the curated one contains, so
+    # that "Push-Up" is as close to "Standard push-up" as to "T push-up"
+    SCORES = {"name": containment, "instructions": jaccard}
+
+    def matches(self, candidate):
+        """[{"id", "similarity", "on"}] of the closest curated exercises, best first."""
+        texts = {}
+        for field in self.indexes:
+            for lang in ("en", "fr"):
+                text = candidate.get(f"{field}_{lang}")
+                if text and text not in self.PLACEHOLDERS:
+                    texts[field, lang] = text
+        best = {}
+        for (field, lang), text in texts.items():
+            for score, (ex_id, on) in self.indexes[field].query(text, None, self.SCORES[field]):
+                if score > best.get(ex_id, (0.0, None))[0]:
+                    best[ex_id] = (score, on)
+
+        # A generic name is contained in every variant: the closest instructions break the tie
+        instructions = self.indexes["instructions"]
+        probes = {lang: instructions.shingles(text) for (field, lang), text in texts.items()
+                  if field == "instructions"}
+
+        def tie_break(ex_id):
+            return max((jaccard(hashes, instructions.sets.get((ex_id, f"instructions_{lang}"), frozenset()))
+                        for lang, hashes in probes.items()), default=0.0)
+
+        ranked = sorted(
+            ((score, tie_break(ex_id), ex_id, on) for ex_id, (score, on) in best.items()
+             if score >= MATCH_MIN_SIMILARITY),
+            key=lambda m: (-m[0], -m[1], m[2]),
+        )
+        return [{"id": ex_id, "similarity": round(score, 3), "on": on}
+                for score, _tie, ex_id, on in ranked[:MATCH_LIMIT]]
+
+    def annotate(self, candidate):
+        """Add "_similar" to a candidate; True if it is a likely duplicate."""
+        candidate["_similar"] = self.matches(candidate)
+        return bool(candidate["_similar"]) and candidate["_similar"][0]["similarity"] >= DUPLICATE_SIMILARITY
+
+
+def describe_match(candidate):
+    similar = candidate.get("_similar")
+    return f"  ≈ {similar[0]['id']} ({similar[0]['similarity']:.2f})" if similar else ""
+
+
+def load_state(path):
+    if not Path(path).exists():
+        return {"synced_at": None, "bases": {}}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_state(path, state):
+    text = json.dumps(state, ensure_ascii=False, indent=2, sort_keys=True) + "\n"
+    write_atomic(path, text.encode("utf-8"))
+
+
+def curated_keys():
+    """wger ids and OOPS ids already present in the curated catalog."""
+    catalog = Catalog()
+    wger_ids = set()
+    for ex in catalog:
+        for key in ("_wger_id", "wger_id"):
+            if ex.get(key) is not None:
+                wger_ids.add(ex[key])
+    return wger_ids, set(catalog.by_id)
+
+
+def sync_diff(bases, state, since=None, matcher=None):
+    """
+    Compare in-scope bases against the sync state; with `since`, report every
+    base updated after that date instead, new or changed per the state.
+    Returns (diff, new_state_bases); candidates are only built for the delta.
+    With a CatalogMatcher, new and changed candidates are annotated with their
+    closest curated exercises.
+    """
+    known = state["bases"]
+    wger_ids, oops_ids = curated_keys()
+    diff = {"new": [], "changed": [], "removed": [], "curated": []}
+    seen = {}
 
     for base in bases:
-        category_id = base.get("category", {}).get("id")
+        category_id = (base.get("category") or {}).get("id")
         if category_id not in CATEGORY_MAP:
-            skipped += 1
+            continue
+        key = str(base["id"])
+        last_update = base.get("last_update")
+        prev = known.get(key)
+
+        if since is not None:
+            updated = (last_update or "") > since
+            is_new, is_changed = updated and prev is None, updated and prev is not None
+        else:
+            is_new = prev is None
+            is_changed = prev is not None and prev.get("last_update") != last_update
+
+        if not (is_new or is_changed):
+            seen[key] = prev or {"last_update": last_update, "oops_id": None}
             continue
 
-        category = CATEGORY_MAP[category_id]
-        base_id = base["id"]
-
-        # Get translations
-        try:
-            name_en, name_fr, desc_en, desc_fr = get_translations(base_id)
-        except Exception as e:
-            print(f"  Warning: could not fetch translations for {base_id}: {e}", file=sys.stderr)
+        exercise = make_candidate(base)
+        seen[key] = {"last_update": last_update, "oops_id": exercise and exercise["id"]}
+        if exercise is None:
+            continue
+        exercise["_last_update"] = last_update
+        if is_new and (base["id"] in wger_ids or exercise["id"] in oops_ids):
+            diff["curated"].append(exercise)
             continue
+        if matcher:
+            matcher.annotate(exercise)
+        if is_new:
+            diff["new"].append(exercise)
+        else:
+            exercise["_previous_update"] = prev and prev.get("last_update")
+            diff["changed"].append(exercise)
+
+    if since is None:
+        for key, prev in sorted(known.items(), key=lambda kv: int(kv[0])):
+            if key not in seen:
+                diff["removed"].append({"_wger_id": int(key), **prev})
+
+    return diff, seen
+
 
-        if not name_en:
+def main():
+    parser = argparse.ArgumentParser(description="Fetch bodyweight exercise candidates from wger")
+    parser.add_argument("--base-url", default=BASE_URL, help=f"API root (default: {BASE_URL})")
+    parser.add_argument("--cache-dir", default=str(CACHE_DIR), help="On-disk response cache")
+    parser.add_argument(
+        "--ttl", type=float, default=CACHE_TTL_S,
+        help=f"Seconds a cached response is used without revalidation (default: {CACHE_TTL_S})",
+    )
+    parser.add_argument("--offline", action="store_true", help="Use cached responses only")
+    parser.add_argument("--workers", type=int, default=WORKERS, help=f"Concurrent requests (default: {WORKERS})")
+    parser.add_argument("--sync", action="store_true", help="Print only the diff against the sync state")
+    parser.add_argument("--since", help="With --sync: report bases updated after this ISO date")
+    parser.add_argument("--state", default=str(STATE_PATH), help="Sync state file")
+    parser.add_argument("--no-save", action="store_true", help="With --sync: do not update the state file")
+    args = parser.parse_args()
+    if args.since and not args.sync:
+        parser.error("--since requires --sync")
+
+    client = WgerClient(args.base_url, args.cache_dir, ttl_s=args.ttl, offline=args.offline)
+    started = time.monotonic()
+    print("Fetching bodyweight exercise bases from wger...", file=sys.stderr)
+
+    # Fetch all exercise bases with bodyweight equipment (translations included)
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        bases = client.fetch_all_pages(
+            f"exerciseinfo/?format=json&equipment={BODYWEIGHT_EQUIPMENT_ID}", pool
+        )
+    print(f"Found {len(bases)} exercise bases.", file=sys.stderr)
+
+    st = client.stats
+    http_summary = (
+        f"HTTP: {st['fetched']} fetched, {st['revalidated']} revalidated (304), "
+        f"{st['fresh']} from cache, {st['bytes'] // 1024} KB in "
+        f"{time.monotonic() - started:.1f}s"
+    )
+
+    matcher = CatalogMatcher(Catalog().exercises())
+
+    if args.sync:
+        state = load_state(args.state)
+        diff, seen = sync_diff(bases, state, since=args.since, matcher=matcher)
+        likely = [
+            ex for ex in diff["new"] + diff["changed"]
+            if ex["_similar"] and ex["_similar"][0]["similarity"] >= DUPLICATE_SIMILARITY
+        ]
+        print(
+            f"\nSync: {len(diff['new'])} new, {len(diff['changed'])} changed, "
+            f"{len(diff['removed'])} removed, {len(diff['curated'])} already curated, "
+            f"{len(likely)} likely duplicates of curated exercises.",
+            file=sys.stderr,
+        )
+        print(http_summary, file=sys.stderr)
+        if not args.since and not args.no_save:
+            save_state(args.state, {
+                "synced_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                "bases": seen,
+            })
+        print(json.dumps(diff, ensure_ascii=False, indent=2))
+        return
+
+    candidates = []
+    skipped = 0
+    duplicates = 0
+
+    for base in bases:
+        exercise = make_candidate(base)
+        if exercise is None:
             skipped += 1
             continue
-
-        movement_pattern = guess_movement_pattern(name_en, category)
-        oops_id = make_oops_id(name_en, category)
-
-        exercise = {
-            "id": oops_id,
-            "_wger_id": base_id,
-            "name_fr": name_fr or name_en,
-            "name_en": name_en,
-            "category": category,
-            "movement_pattern": movement_pattern,
-            "difficulty": 2,        # Default: medium — review manually
-            "equipment_required": False,
-            "requires_anchor": False,
-            "postpartum_only": False,
-            "contraindications": [],
-            "instructions_fr": desc_fr or "Instructions à compléter.",
-            "instructions_en": desc_en or "Instructions to be completed.",
-            # Timed vs reps: fill manually based on movement_pattern
-            # Core/mobility patterns → add duration_s; others → add reps + sets + rest_s
-            "_TODO": "Review: set difficulty, reps OR duration_s, sets, rest_s, progression_to, contraindications"
-        }
         candidates.append(exercise)
-        print(f"  [{category}] {name_en}", file=sys.stderr)
+        duplicates += matcher.annotate(exercise)
+        print(f"  [{exercise['category']}] {exercise['name_en']}{describe_match(exercise)}", file=sys.stderr)
 
-    print(f"\nDone. {len(candidates)} candidates, {skipped} skipped.", file=sys.stderr)
+    print(f"\nDone. {len(candidates)} candidates ({duplicates} likely duplicates of curated "
+          f"exercises, similarity ≥ {DUPLICATE_SIMILARITY}), {skipped} skipped.", file=sys.stderr)
+    print(http_summary, file=sys.stderr)
     print(json.dumps(candidates, ensure_ascii=False, indent=2))
 
 
@@ -9,23 +9,81 @@ Usage:
   python3 scripts/gen_exercise_images.py --ids push_pike,wall_slide   # force specific
 
 Images are saved to: web/icons/exercises/<exercise_id>.png
-image_url in JSON:    /icons/exercises/<exercise_id>.png
+image_url in JSON:    /icons/exercises/<exercise_id>.png (until optimize_images.py runs)
+
+Incremental runs:
+  scripts/image_manifest.json records, per exercise, the SHA-256 of the fully
+  rendered make_prompt(ex), the model name, the backend (and --base-url, if
+  any) and the SHA-256 of the saved image. A default run regenerates exactly
+  the images whose prompt (VISUAL_HINTS, STYLE_PREFIX, name, ...) or model
+  changed, or that did not come from the real Gemini endpoint (stub, replay,
+  fake server; entries without a backend predate the field and are Gemini
+  outputs). Images present on disk but missing
+  from the manifest are adopted as up to date. An image whose bytes no longer
+  match the recorded hash was replaced by hand and is left alone (use --ids).
+
+Concurrency:
+  Requests run on a bounded thread pool (--workers) behind a token-bucket
+  limiter (--rps). 429 / 5xx / timeouts are retried with exponential backoff
+  and full jitter; each finished image is written atomically and recorded in
+  the manifest immediately, so an interrupted batch resumes where it stopped.
+  --base-url points the client at a local fake server (fake_gemini_server.py).
+
+Scratch output:
+  --output-dir DIR writes the images and their manifest (DIR/image_manifest.json)
+  there instead of web/icons/exercises/ and scripts/image_manifest.json, and
+  leaves image_url alone. --base-url, --backend stub and --backend replay imply
+  --output-dir scripts/.image_scratch, so a test run never replaces the real
+  masters.
+
+Output checks (check_images.py):
+  Every new image is decoded and checked (JPEG/PNG, 3:1 ratio) and its
+  perceptual hash compared with the other exercises' current images. A broken
+  output or a near-duplicate of another exercise raises BadImage, which is
+  retried like a 429, i.e. regenerated. --no-image-check turns this off.
+
+Backends (see image_backends.py):
+  --backend gemini   one pooled genai.Client for the whole run (default)
+  --backend stub     offline blank images, --stub-latency to simulate the API
+  --backend replay   offline, replays recorded outputs by prompt hash
+  --cache-dir DIR    record every output under its prompt hash for replay
+
+Batch mode:
+  --batch-file PATH writes the images that would be generated as a JSONL
+  batch file (one {"id", "prompt_sha256", "prompt"} per line) instead of
+  calling the API; batch_images.py submits it as one asynchronous job and
+  applies the results through the same manifest.
 
 Requirements:
   pip install google-genai pillow
 """
 
 import argparse
-import base64
+import hashlib
 import json
 import os
+import random
 import sys
+import threading
 import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from pathlib import Path
 
-EXERCISES_DIR = Path(__file__).parent.parent / "web" / "data" / "exercises"
+from catalog import Catalog, format_changes, save_records, write_atomic
+from image_backends import (
+    BACKENDS,
+    BadImage,
+    CachingBackend,
+    GeminiBackend,
+    ReplayBackend,
+    StubBackend,
+)
+
 OUTPUT_DIR    = Path(__file__).parent.parent / "web" / "icons" / "exercises"
+MANIFEST_PATH = Path(__file__).parent / "image_manifest.json"
+SCRATCH_DIR   = Path(__file__).parent / ".image_scratch"
 URL_PREFIX    = "/icons/exercises"
+MODEL         = "nano-banana-pro-preview"
 
 # ---------------------------------------------------------------------------
 # Global style — applied to every prompt
@@ -762,19 +820,38 @@ def make_prompt(ex):
 
 # Safety: never overwrite existing images unless --force or --ids
 # Rate limit: ~2 req/s for free tier
-RATE_LIMIT_DELAY = 0.6  # seconds between API calls
+REQUESTS_PER_SECOND = 1.6
+WORKERS             = 4      # concurrent in-flight requests
+REQUEST_TIMEOUT_S   = 120    # per-request timeout (image generation is slow)
+MAX_RETRIES         = 5
+BACKOFF_BASE_S      = 1.0
+BACKOFF_MAX_S       = 60.0
+
+
+def batch_record(ex, prompt):
+    """One line of a JSONL batch file."""
+    return {"id": ex["id"], "prompt_sha256": sha256(prompt), "prompt": prompt}
+
+
+def write_batch_file(path, records):
+    text = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records)
+    write_atomic(Path(path), text.encode("utf-8"))
+
+
+def read_batch_file(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
 
 
 def load_all_exercises(category_filter=None):
+    catalog = Catalog()
     exercises = []
-    for path in sorted(EXERCISES_DIR.glob("*.json")):
-        cat = path.stem
+    for cat in catalog.categories:
         if category_filter and cat != category_filter:
             continue
-        with open(path, encoding="utf-8") as f:
-            data = json.load(f)
+        data = catalog.records(cat)
         for ex in data:
-            ex["_source_file"] = str(path)
+            ex["_source_file"] = str(catalog.path(cat))
             ex["_category"] = cat
         exercises.extend(data)
     return exercises
@@ -790,39 +867,179 @@ def save_exercises_by_file(exercises):
             by_file.setdefault(src, []).append(ex)
 
     for path, exs in by_file.items():
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(exs, f, ensure_ascii=False, indent=2)
-        print(f"  Saved {path}")
+        changes = save_records(path, exs)
+        if changes is not None:
+            print(f"  Saved {path} ({format_changes(changes)})")
+
+
+def sha256(data):
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    return hashlib.sha256(data).hexdigest()
+
+
+def manifest_path(output_dir):
+    """The manifest recording the images of `output_dir`."""
+    if Path(output_dir).resolve() == OUTPUT_DIR.resolve():
+        return MANIFEST_PATH
+    return Path(output_dir) / "image_manifest.json"
+
+
+def load_manifest(path=MANIFEST_PATH):
+    if not path.exists():
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
 
 
-def generate_image_gemini(api_key, prompt):
+def save_manifest(manifest, path=MANIFEST_PATH):
+    text = json.dumps(dict(sorted(manifest.items())), ensure_ascii=False, indent=2) + "\n"
+    write_atomic(path, text.encode("utf-8"))
+
+
+def manifest_entry(prompt, img_bytes, backend="gemini", endpoint=None, model=MODEL):
+    entry = {
+        "prompt_sha256": sha256(prompt),
+        "model": model,
+        "backend": backend,
+        "output_sha256": sha256(img_bytes),
+    }
+    if endpoint:
+        entry["endpoint"] = endpoint
+    return entry
+
+
+def from_production(entry):
+    """True if the recorded image came from the real Gemini API."""
+    return entry.get("backend", "gemini") == "gemini" and not entry.get("endpoint")
+
+
+def image_status(ex, prompt, out_path, manifest):
     """
-    Generate image using Nano Banana Pro via generateContent.
-    Returns raw PNG bytes or raises on failure.
+    Classify one exercise image against the manifest:
+      "missing"  — no file on disk
+      "adopt"    — file exists but was never recorded
+      "stale"    — rendered prompt or model changed since generation, or the
+                   image came from an offline backend or a test endpoint
+      "edited"   — file bytes differ from the recorded output (hand-replaced)
+      "ok"       — up to date
     """
-    try:
-        from google import genai
-        from google.genai import types
-    except ImportError:
-        print("ERROR: Install google-genai: pip install google-genai", file=sys.stderr)
-        sys.exit(1)
+    if not out_path.exists():
+        return "missing"
+    entry = manifest.get(ex["id"])
+    if entry is None:
+        return "adopt"
+    if entry.get("prompt_sha256") != sha256(prompt) or entry.get("model") != MODEL:
+        return "stale"
+    if not from_production(entry):
+        return "stale"
+    if entry.get("output_sha256") != sha256(out_path.read_bytes()):
+        return "edited"
+    return "ok"
 
-    client = genai.Client(api_key=api_key)
 
-    response = client.models.generate_content(
-        model="nano-banana-pro-preview",
-        contents=prompt,
-        config=types.GenerateContentConfig(
-            response_modalities=["IMAGE", "TEXT"],
-        ),
-    )
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, at most `capacity` banked."""
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+def is_retryable(exc):
+    """True for rate limiting (429), server errors (5xx), timeouts and rejected images."""
+    if isinstance(exc, BadImage):
+        return True
+    code = getattr(exc, "code", None) or getattr(exc, "status_code", None)
+    if isinstance(code, int):
+        return code == 429 or code >= 500
+    return isinstance(exc, TimeoutError) or "Timeout" in type(exc).__name__
+
+
+def backoff_delay(attempt):
+    """Exponential backoff with full jitter."""
+    return random.uniform(0, min(BACKOFF_MAX_S, BACKOFF_BASE_S * 2 ** attempt))
+
+
+def generate_with_retries(generate, prompt, limiter, retries=MAX_RETRIES, label=""):
+    for attempt in range(retries + 1):
+        limiter.acquire()
+        try:
+            return generate(prompt)
+        except Exception as e:
+            if attempt == retries or not is_retryable(e):
+                raise
+            delay = backoff_delay(attempt)
+            print(f"  {label}: retry {attempt + 1}/{retries} in {delay:.1f}s ({e})", file=sys.stderr)
+            time.sleep(delay)
+
+
+def make_image_check(jobs, images_dir=OUTPUT_DIR):
+    """
+    Return check(ex_id, img_bytes) → img_bytes, raising BadImage when the image
+    is broken or a near-duplicate of another exercise's current master in
+    `images_dir` (pairs listed in scripts/similar_images.json excepted).
+    Masters being regenerated in this run are left out of the index.
+    """
+    from check_images import DUP_DISTANCE, BKTree, inspect_file, inspect_master, is_blank, load_similar
+
+    pending = {ex["id"] for ex, _prompt, _path in jobs}
+    others = [p for p in images_dir.glob("*.png") if p.stem not in pending]
+    tree = BKTree()
+    with ProcessPoolExecutor() as pool:
+        for path, _problems, info in pool.map(inspect_file, others, chunksize=8):
+            if info["hash"] is not None and not is_blank(info["hash"]):
+                tree.add(info["hash"], Path(path).stem)
+    similar = load_similar()
+    lock = threading.Lock()
+
+    def check(ex_id, img_bytes):
+        problems, info = inspect_master(img_bytes)
+        if problems:
+            raise BadImage("; ".join(problems))
+        if is_blank(info["hash"]):
+            return img_bytes
+        with lock:
+            duplicates = [
+                (d, other) for d, other in tree.search(info["hash"], DUP_DISTANCE)
+                if other != ex_id and frozenset((ex_id, other)) not in similar
+            ]
+            if duplicates:
+                d, other = duplicates[0]
+                raise BadImage(f"near-duplicate of {other} ({d} bits)")
+            tree.add(info["hash"], ex_id)
+        return img_bytes
+
+    return check
 
-    for part in response.candidates[0].content.parts:
-        if part.inline_data and part.inline_data.data:
-            data = part.inline_data.data
-            return base64.b64decode(data) if isinstance(data, str) else data
 
-    raise RuntimeError("No image part returned by API")
+def make_backend(args, api_key, manifest):
+    """Create the single backend instance shared by every worker of this run."""
+    if args.backend == "gemini":
+        backend = GeminiBackend(
+            api_key, MODEL, base_url=args.base_url, timeout_s=args.timeout, pool_size=args.workers,
+        )
+    elif args.backend == "stub":
+        backend = StubBackend(latency_s=args.stub_latency)
+    else:
+        # Replays the real masters, whatever --output-dir receives the copies
+        return ReplayBackend(cache_dir=args.cache_dir, manifest=manifest, images_dir=OUTPUT_DIR)
+    return CachingBackend(backend, args.cache_dir) if args.cache_dir else backend
 
 
 def main():
@@ -830,74 +1047,176 @@ def main():
     parser.add_argument("--dry-run", action="store_true", help="Print prompts without calling API")
     parser.add_argument("--category", help="Only process one category (e.g. push)")
     parser.add_argument("--force", action="store_true", help="Overwrite all existing images")
+    parser.add_argument(
+        "--status", action="store_true", help="Only list each image's manifest status, then exit"
+    )
     parser.add_argument(
         "--ids",
         help="Comma-separated exercise IDs to force-regenerate (e.g. push_pike,wall_slide)",
     )
+    parser.add_argument("--workers", type=int, default=WORKERS, help=f"Concurrent requests (default: {WORKERS})")
+    parser.add_argument(
+        "--rps", type=float, default=REQUESTS_PER_SECOND,
+        help=f"Max requests per second (default: {REQUESTS_PER_SECOND})",
+    )
+    parser.add_argument(
+        "--timeout", type=float, default=REQUEST_TIMEOUT_S,
+        help=f"Per-request timeout in seconds (default: {REQUEST_TIMEOUT_S})",
+    )
+    parser.add_argument("--base-url", help="Override the API endpoint (e.g. http://127.0.0.1:8765)")
+    parser.add_argument(
+        "--output-dir",
+        help=f"Write images and their manifest here (default: web/icons/exercises, "
+             f"{SCRATCH_DIR.name}/ with --base-url or an offline backend)",
+    )
+    parser.add_argument(
+        "--backend", choices=BACKENDS, default="gemini",
+        help="gemini (default), stub (offline blank images) or replay (recorded images)",
+    )
+    parser.add_argument("--cache-dir", help="Record outputs here by prompt hash; replay reads from it")
+    parser.add_argument(
+        "--stub-latency", type=float, default=0.0, help="Simulated seconds per stub request",
+    )
+    parser.add_argument(
+        "--batch-file", metavar="PATH",
+        help="Write the pending prompts as a JSONL batch (see batch_images.py) instead of generating",
+    )
+    parser.add_argument(
+        "--no-image-check", action="store_true",
+        help="Keep outputs without checking integrity and near-duplicates (check_images.py)",
+    )
     args = parser.parse_args()
 
     api_key = os.environ.get("GEMINI_API_KEY")
-    if not api_key and not args.dry_run:
+    if not api_key and args.backend == "gemini" and not (args.dry_run or args.status or args.batch_file):
         print("ERROR: Set GEMINI_API_KEY environment variable.", file=sys.stderr)
         sys.exit(1)
 
     force_ids = set(args.ids.split(",")) if args.ids else set()
 
-    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    if args.output_dir:
+        output_dir = Path(args.output_dir)
+    else:
+        output_dir = SCRATCH_DIR if args.base_url or args.backend != "gemini" else OUTPUT_DIR
+    # Anywhere but web/icons/exercises is a test run: image_url is left alone
+    scratch = output_dir.resolve() != OUTPUT_DIR.resolve()
+    output_dir.mkdir(parents=True, exist_ok=True)
+    if scratch:
+        print(f"Writing to {output_dir} (scratch: masters, manifest and image_url untouched)", file=sys.stderr)
 
     exercises = load_all_exercises(category_filter=args.category)
     print(f"Loaded {len(exercises)} exercises.", file=sys.stderr)
 
+    manifest_file = manifest_path(output_dir)
+    manifest = load_manifest(manifest_file)
+    manifest_dirty = False
+    json_dirty = False
+
     generated = 0
     skipped   = 0
     errors    = 0
+    jobs      = []   # (ex, prompt, out_path)
 
     for ex in exercises:
         ex_id    = ex["id"]
         name_en  = ex.get("name_en", ex_id)
-        out_path = OUTPUT_DIR / f"{ex_id}.png"
+        out_path = output_dir / f"{ex_id}.png"
         url      = f"{URL_PREFIX}/{ex_id}.png"
+        prompt   = make_prompt(ex)
+        status   = image_status(ex, prompt, out_path, manifest)
+
+        if args.status:
+            print(f"  {status:8s} {ex_id}")
+            continue
 
         is_forced = args.force or ex_id in force_ids
 
-        # Skip if already has an image and not forcing
-        if ex.get("image_url") and not is_forced:
-            skipped += 1
-            continue
+        if status == "adopt":
+            manifest[ex_id] = manifest_entry(prompt, out_path.read_bytes())
+            manifest_dirty = True
+        if status == "edited" and not is_forced:
+            print(f"  Warning: {out_path.name} was replaced by hand — keeping it", file=sys.stderr)
 
-        # Skip if file already exists and not forcing
-        if out_path.exists() and not is_forced:
-            ex["image_url"] = url
+        if status in ("ok", "adopt", "edited") and not is_forced:
+            if not ex.get("image_url") and not scratch:
+                ex["image_url"] = url
+                json_dirty = True
             skipped += 1
             continue
 
-        prompt = make_prompt(ex)
-        print(f"[{ex['_category']}] {name_en}")
-
+        print(f"[{ex['_category']}] {name_en} ({'forced' if is_forced else status})")
         if args.dry_run:
             print(f"  PROMPT: {prompt}\n")
-            ex["image_url"] = url  # simulate
             generated += 1
             continue
+        jobs.append((ex, prompt, out_path))
 
-        try:
-            img_bytes = generate_image_gemini(api_key, prompt)
-            out_path.write_bytes(img_bytes)
-            ex["image_url"] = url
-            generated += 1
-            print(f"  → saved {out_path.name} ({len(img_bytes)//1024} KB)")
-            time.sleep(RATE_LIMIT_DELAY)
-        except Exception as e:
-            print(f"  ERROR: {e}", file=sys.stderr)
-            errors += 1
-            time.sleep(RATE_LIMIT_DELAY * 2)
+    if args.status:
+        return
+
+    if manifest_dirty and not args.dry_run:
+        save_manifest(manifest, manifest_file)
+
+    if args.batch_file:
+        write_batch_file(args.batch_file, [batch_record(ex, prompt) for ex, prompt, _ in jobs])
+        print(f"\n{len(jobs)} prompts → {args.batch_file}")
+        if jobs:
+            print(f"Submit with: python3 scripts/batch_images.py run {args.batch_file}")
+        for ex in exercises:
+            ex.pop("_source_file", None)
+            ex.pop("_category", None)
+        return
+
+    if jobs:
+        limiter = TokenBucket(args.rps)
+        manifest_lock = threading.Lock()
+        backend = make_backend(args, api_key, load_manifest())
+        # Replayed outputs were checked when they were generated, stub outputs are blank
+        check = None if args.no_image_check or args.backend != "gemini" else make_image_check(jobs, output_dir)
+
+        def run(job):
+            ex, prompt, out_path = job
+            generate = backend.generate
+            if check:
+                generate = lambda p: check(ex["id"], backend.generate(p))  # noqa: E731
+            img_bytes = generate_with_retries(generate, prompt, limiter, label=ex["id"])
+            write_atomic(out_path, img_bytes)
+            with manifest_lock:
+                manifest[ex["id"]] = manifest_entry(prompt, img_bytes, backend.name, args.base_url)
+                save_manifest(manifest, manifest_file)
+            return len(img_bytes)
+
+        started = time.monotonic()
+        with backend, ThreadPoolExecutor(max_workers=args.workers) as pool:
+            futures = {pool.submit(run, job): job for job in jobs}
+            try:
+                for fut in as_completed(futures):
+                    ex, _prompt, out_path = futures[fut]
+                    try:
+                        size = fut.result()
+                    except Exception as e:
+                        print(f"  ERROR {ex['id']}: {e}", file=sys.stderr)
+                        errors += 1
+                        continue
+                    if not ex.get("image_url") and not scratch:
+                        ex["image_url"] = f"{URL_PREFIX}/{out_path.name}"
+                        json_dirty = True
+                    generated += 1
+                    print(f"  → saved {out_path.name} ({size // 1024} KB)")
+            except KeyboardInterrupt:
+                print("\nInterrupted — waiting for in-flight requests; rerun to resume.", file=sys.stderr)
+                for fut in futures:
+                    fut.cancel()
+        print(f"Wall time: {time.monotonic() - started:.1f}s ({backend.name} backend)", file=sys.stderr)
 
     print(f"\nGenerated: {generated}, Skipped: {skipped}, Errors: {errors}")
 
-    if not args.dry_run and generated > 0:
+    if not args.dry_run and json_dirty:
         print("Updating JSON files...")
         save_exercises_by_file(exercises)
-        print("Done. Remember to bump CACHE_VERSION in service-worker.js!")
+    if not args.dry_run and generated > 0 and not scratch:
+        print("Done. Run `make images` to build the web variants, the thumbnail atlas,")
+        print("the catalog bundle and the service worker precache manifest.")
     else:
         # Still need to pop the internal fields even in dry-run
         for ex in exercises:
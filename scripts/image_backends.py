@@ -0,0 +1,175 @@
+"""
+image_backends.py — Image generation backends for gen_exercise_images.py.
+
+A backend turns a rendered prompt into image bytes. One backend instance is
+created per run and shared by every worker thread, so implementations must be
+thread-safe and keep their expensive state (clients, connection pools) alive
+for the whole batch.
+
+  gemini  — google-genai client, created once, pooled keep-alive connections
+  stub    — offline: returns a blank 1792x592 JPEG after an optional delay
+  replay  — offline: returns previously generated images keyed by prompt hash
+
+Any backend can be wrapped in CachingBackend to record its outputs into a
+cache directory that ReplayBackend later reads.
+"""
+
+import base64
+import hashlib
+import io
+import sys
+import time
+from pathlib import Path
+
+IMAGE_SIZE = (1792, 592)
+
+
+def prompt_key(prompt):
+    """Cache key of a rendered prompt (SHA-256 hex)."""
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+
+
+class ReplayMiss(LookupError):
+    """No recorded image for this prompt (never retried)."""
+
+
+class BadImage(Exception):
+    """A generated image failed inspection (check_images.py); retried."""
+
+
+class ImageBackend:
+    name = "base"
+
+    def generate(self, prompt):
+        """Return raw image bytes for `prompt`, or raise."""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class GeminiBackend(ImageBackend):
+    """generateContent on one long-lived genai.Client shared by all workers."""
+
+    name = "gemini"
+
+    def __init__(self, api_key, model, base_url=None, timeout_s=120, pool_size=4):
+        try:
+            import httpx
+            from google import genai
+            from google.genai import types
+        except ImportError:
+            print("ERROR: Install google-genai: pip install google-genai", file=sys.stderr)
+            sys.exit(1)
+
+        self.model = model
+        self.config = types.GenerateContentConfig(response_modalities=["IMAGE", "TEXT"])
+        self.client = genai.Client(
+            api_key=api_key,
+            http_options=types.HttpOptions(
+                base_url=base_url,
+                timeout=int(timeout_s * 1000),
+                client_args={
+                    "limits": httpx.Limits(
+                        max_connections=pool_size,
+                        max_keepalive_connections=pool_size,
+                    ),
+                },
+            ),
+        )
+
+    def generate(self, prompt):
+        response = self.client.models.generate_content(
+            model=self.model,
+            contents=prompt,
+            config=self.config,
+        )
+        for part in response.candidates[0].content.parts:
+            if part.inline_data and part.inline_data.data:
+                data = part.inline_data.data
+                return base64.b64decode(data) if isinstance(data, str) else data
+        raise RuntimeError("No image part returned by API")
+
+    def close(self):
+        self.client.close()
+
+
+class StubBackend(ImageBackend):
+    """Offline backend: a blank image of the real output size, after `latency_s`."""
+
+    name = "stub"
+
+    def __init__(self, latency_s=0.0):
+        self.latency_s = latency_s
+        try:
+            from PIL import Image
+        except ImportError:
+            print("ERROR: Install Pillow: pip install pillow", file=sys.stderr)
+            sys.exit(1)
+        buf = io.BytesIO()
+        Image.new("RGB", IMAGE_SIZE, "white").save(buf, format="JPEG", quality=80)
+        self.image = buf.getvalue()
+
+    def generate(self, prompt):
+        if self.latency_s:
+            time.sleep(self.latency_s)
+        return self.image
+
+
+class ReplayBackend(ImageBackend):
+    """
+    Offline backend replaying earlier outputs. Looks up the prompt hash in
+    `cache_dir` (written by CachingBackend), then in the manifest, whose entries
+    point at the current image when its bytes still match the recorded hash.
+    """
+
+    name = "replay"
+
+    def __init__(self, cache_dir=None, manifest=None, images_dir=None):
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.index = {}
+        for ex_id, entry in (manifest or {}).items():
+            path = Path(images_dir) / f"{ex_id}.png"
+            if path.exists():
+                self.index[entry["prompt_sha256"]] = (path, entry.get("output_sha256"))
+
+    def generate(self, prompt):
+        key = prompt_key(prompt)
+        if self.cache_dir and (self.cache_dir / key).exists():
+            return (self.cache_dir / key).read_bytes()
+        if key in self.index:
+            path, expected = self.index[key]
+            data = path.read_bytes()
+            if expected is None or hashlib.sha256(data).hexdigest() == expected:
+                return data
+        raise ReplayMiss(f"no recorded image for prompt {key[:12]}")
+
+
+class CachingBackend(ImageBackend):
+    """Wraps another backend and records each output under its prompt hash."""
+
+    def __init__(self, inner, cache_dir):
+        self.inner = inner
+        self.name = inner.name
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def generate(self, prompt):
+        data = self.inner.generate(prompt)
+        path = self.cache_dir / prompt_key(prompt)
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_bytes(data)
+        tmp.replace(path)
+        return data
+
+    def close(self):
+        self.inner.close()
+
+
+BACKENDS = ("gemini", "stub", "replay")
@@ -0,0 +1,132 @@
+"""
+minhash.py — MinHash signatures and a banded LSH index, for finding
+near-duplicate short texts without comparing every pair.
+
+  index = LSHIndex(ngram=3, bands=32, rows=2)
+  index.add("push_standard", "Standard push-up")
+  index.query("Push-Up")          # [(jaccard, "push_standard"), ...] best first
+  index.query("Push-Up", score=containment)   # share of "Push-Up" found in each
+
+Texts are normalized (lowercase, accents and punctuation stripped) and cut
+into character n-grams; with squash=True spaces are dropped too, so
+"push-up", "push up" and "pushup" shingle alike. Each shingle is hashed once
+(64-bit BLAKE2b, salted per index).
+
+Signatures use one-permutation hashing: the hash space is split into
+`bands * rows` bins, each bin keeps its smallest hash, and empty bins borrow
+from the next non-empty one (rotation densification). That costs one pass
+over the shingles instead of one per hash function, and two texts still
+agree on a bin with probability close to their Jaccard similarity J. They
+share a bucket in at least one band with probability about
+1 - (1 - J^rows)^bands, so rows and bands set the threshold (roughly
+(1/bands)^(1/rows)) at which pairs start being found.
+
+Candidates from the buckets are ranked by an exact score of their shingle
+sets, so the reported score does not depend on the signature size: Jaccard
+similarity by default, or the containment of the query in the indexed text,
+which does not penalise indexed texts for being longer ("Push-Up" is wholly
+contained in "Standard push-up" but has a Jaccard similarity of 1/3 with
+it). Buckets are still drawn by Jaccard similarity, so an index queried by
+containment wants rows=1 to keep such pairs. Lookups touch only the texts
+that share a bucket, not the whole index.
+"""
+
+import hashlib
+import random
+import re
+import unicodedata
+from collections import defaultdict
+
+SEED = 20250601
+# Added per rotation step to borrowed values, larger than any in-bin value
+ROTATION = 1 << 64
+
+NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+
+def normalize(text, squash=False):
+    text = unicodedata.normalize("NFKD", text or "").encode("ascii", "ignore").decode("ascii").lower()
+    text = NON_ALNUM.sub(" ", text).strip()
+    return text.replace(" ", "") if squash else text
+
+
+def shingles(text, ngram, squash=False, salt=b""):
+    """Set of 64-bit hashes of the character n-grams of a normalized text."""
+    text = normalize(text, squash)
+    if not text:
+        return frozenset()
+    if len(text) < ngram:
+        grams = {text}
+    else:
+        grams = {text[i:i + ngram] for i in range(len(text) - ngram + 1)}
+    return frozenset(
+        int.from_bytes(hashlib.blake2b(g.encode("ascii"), digest_size=8, salt=salt).digest(), "little")
+        for g in grams
+    )
+
+
+def jaccard(a, b):
+    return len(a & b) / len(a | b) if a and b else 0.0
+
+
+def containment(a, b):
+    """Share of the shingles of `a` that are also in `b`."""
+    return len(a & b) / len(a) if a and b else 0.0
+
+
+class LSHIndex:
+    def __init__(self, ngram=3, bands=32, rows=2, squash=False, seed=SEED):
+        self.ngram = ngram
+        self.squash = squash
+        self.bands = bands
+        self.rows = rows
+        self.salt = random.Random(seed).randbytes(16)
+        self.buckets = [defaultdict(list) for _ in range(bands)]
+        self.sets = {}       # key → shingle set
+
+    def shingles(self, text):
+        """Shingle set of `text` as this index hashes it, to score against `sets` directly."""
+        return shingles(text, self.ngram, self.squash, self.salt)
+
+    def signature(self, hashes):
+        k = self.bands * self.rows
+        bins = [None] * k
+        for h in hashes:
+            b, value = h % k, h // k
+            if bins[b] is None or value < bins[b]:
+                bins[b] = value
+        filled = [i for i, v in enumerate(bins) if v is not None]
+        if len(filled) < k:
+            for i in range(k):
+                if bins[i] is None:
+                    # nearest filled bin to the right, cyclically
+                    step = next(((j - i) % k for j in filled if j > i), filled[0] + k - i)
+                    bins[i] = bins[(i + step) % k] + step * ROTATION
+        return bins
+
+    def _bands(self, hashes):
+        sig = self.signature(hashes)
+        r = self.rows
+        return [tuple(sig[i * r:(i + 1) * r]) for i in range(self.bands)]
+
+    def add(self, key, text):
+        hashes = self.shingles(text)
+        if not hashes:
+            return
+        self.sets[key] = hashes
+        for band, bucket in zip(self._bands(hashes), self.buckets):
+            bucket[band].append(key)
+
+    def __len__(self):
+        return len(self.sets)
+
+    def query(self, text, limit=3, score=jaccard):
+        """[(score, key)] of the indexed texts sharing a bucket with `text`, best first (all if limit is None)."""
+        hashes = self.shingles(text)
+        if not hashes:
+            return []
+        found = set()
+        for band, bucket in zip(self._bands(hashes), self.buckets):
+            found.update(bucket.get(band, ()))
+        scored = sorted(((score(hashes, self.sets[key]), key) for key in found), reverse=True)
+        return scored[:limit]
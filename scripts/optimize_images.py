@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+optimize_images.py — Builds right-sized web variants of the exercise
+illustrations and points the catalog JSON at them.
+
+gen_exercise_images.py saves the model output as web/icons/exercises/<id>.png,
+but the API actually returns 1792x592 JPEGs (300–900 KB each). The session
+screen displays them at most ~540 CSS px wide (max-height 180px, 3:1), so this
+stage re-encodes every master into AVIF / WebP / JPEG at 1x and 2x widths,
+with extensions matching the real format.
+
+Usage:
+  python3 scripts/optimize_images.py [--dry-run] [--category push]
+  python3 scripts/optimize_images.py --ids push_pike,wall_slide --force
+  python3 scripts/optimize_images.py --formats webp,jpeg
+
+Outputs (next to the masters):
+  web/icons/exercises/<id>-600.avif   <id>-1200.avif
+  web/icons/exercises/<id>-600.webp   <id>-1200.webp
+  web/icons/exercises/<id>-600.jpg    <id>-1200.jpg
+
+JSON fields rewritten in web/data/exercises/*.json:
+  image_url          /icons/exercises/<id>-600.jpg?v=<rev>   (universal fallback)
+  image_srcset       { "image/avif": "<url> 600w, <url> 1200w", "image/webp": ... }
+  image_placeholder  data:image/webp;base64,...  (PLACEHOLDER_WIDTH px wide, ~200 B)
+
+Every variant URL carries ?v=<rev>, the first REVISION_LEN hex digits of the
+file's SHA-256. The service worker caches illustrations cache-first under
+their full URL, so a regenerated image gets a new URL (and catalog.json a new
+precache revision); on activation the worker drops the illustrations that
+catalog.json no longer references.
+
+The placeholder travels in catalog.json, so the session screen paints it as
+the <img> background, scaled up (hence blurred) by the browser, before the
+first byte of the illustration arrives.
+
+Requirements:
+  pip install pillow   (AVIF needs Pillow >= 11.3 built with libavif)
+"""
+
+import argparse
+import base64
+import io
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from gen_exercise_images import (
+    OUTPUT_DIR,
+    URL_PREFIX,
+    load_all_exercises,
+    save_exercises_by_file,
+    sha256,
+)
+
+# 1x matches the largest rendered width of .session-ex-img, 2x covers HiDPI phones
+WIDTHS = (600, 1200)
+
+# Low-quality placeholder: width in px (height keeps the 3:1 ratio) and WebP options
+PLACEHOLDER_WIDTH = 24
+PLACEHOLDER_OPTIONS = {"quality": 40, "method": 6}
+
+# format name → (file extension, MIME type, Pillow save options)
+FORMATS = {
+    "avif": ("avif", "image/avif", {"quality": 55, "speed": 4}),
+    "webp": ("webp", "image/webp", {"quality": 80, "method": 6}),
+    "jpeg": ("jpg",  "image/jpeg", {"quality": 82, "optimize": True, "progressive": True}),
+}
+DEFAULT_FORMATS = ("avif", "webp", "jpeg")
+
+# The fallback <img src> must decode everywhere
+FALLBACK_FORMAT = "jpeg"
+# Hex digits of the content hash in ?v=<rev>
+REVISION_LEN = 8
+
+# Pillow format name → canonical extension, used to report misnamed masters
+REAL_EXTENSIONS = {"JPEG": "jpg", "PNG": "png", "WEBP": "webp", "AVIF": "avif"}
+
+
+def _require_pillow():
+    try:
+        from PIL import Image  # noqa: F401
+    except ImportError:
+        print("ERROR: Install Pillow: pip install pillow", file=sys.stderr)
+        sys.exit(1)
+
+
+def available_formats(requested):
+    """Drop formats this Pillow build cannot encode (AVIF is optional)."""
+    from PIL import features
+
+    formats = []
+    for fmt in requested:
+        if fmt not in FORMATS:
+            raise SystemExit(f"ERROR: unknown format {fmt!r} (choose from {', '.join(FORMATS)})")
+        if fmt in ("avif", "webp") and not features.check(fmt):
+            print(f"  Warning: Pillow has no {fmt} encoder — skipping {fmt}", file=sys.stderr)
+            continue
+        formats.append(fmt)
+    if FALLBACK_FORMAT not in formats:
+        formats.append(FALLBACK_FORMAT)
+    return formats
+
+
+def master_path(ex_id):
+    return OUTPUT_DIR / f"{ex_id}.png"
+
+
+def variant_name(ex_id, width, fmt):
+    return f"{ex_id}-{width}.{FORMATS[fmt][0]}"
+
+
+def detect_format(path):
+    """Return the real image format of `path` (e.g. 'JPEG'), whatever its extension."""
+    from PIL import Image
+
+    with Image.open(path) as im:
+        return im.format
+
+
+def placeholder(im):
+    """Tiny WebP of an RGB image, as a data: URI."""
+    from PIL import Image
+
+    height = max(1, round(im.height * PLACEHOLDER_WIDTH / im.width))
+    buf = io.BytesIO()
+    im.resize((PLACEHOLDER_WIDTH, height), Image.BOX).save(buf, format="WEBP", **PLACEHOLDER_OPTIONS)
+    return "data:image/webp;base64," + base64.b64encode(buf.getvalue()).decode("ascii")
+
+
+def build_variants(master, ex_id, formats, force=False):
+    """
+    Encode every (width, format) variant of one master image.
+    Returns (real_format, [(name, bytes_written)], placeholder); unchanged
+    variants are skipped, the placeholder is always recomputed (it is cheap).
+    Runs in a worker process, so it only takes/returns plain values.
+    """
+    from PIL import Image
+
+    master = Path(master)
+    master_mtime = master.stat().st_mtime
+    written = []
+
+    with Image.open(master) as im:
+        real_format = im.format
+        src = im.convert("RGB")
+
+    for width in WIDTHS:
+        resized = None
+        for fmt in formats:
+            out = master.parent / variant_name(ex_id, width, fmt)
+            if not force and out.exists() and out.stat().st_mtime >= master_mtime:
+                continue
+            if resized is None:
+                w = min(width, src.width)
+                h = round(src.height * w / src.width)
+                resized = src.resize((w, h), Image.LANCZOS)
+            resized.save(out, format=fmt.upper(), **FORMATS[fmt][2])
+            written.append((out.name, out.stat().st_size))
+
+    return real_format, written, placeholder(src)
+
+
+def variant_url(ex_id, width, fmt, images_dir=OUTPUT_DIR):
+    """Public URL of one variant, revisioned by its content."""
+    name = variant_name(ex_id, width, fmt)
+    rev = sha256((Path(images_dir) / name).read_bytes())[:REVISION_LEN]
+    return f"{URL_PREFIX}/{name}?v={rev}"
+
+
+def srcset_fields(ex_id, formats, images_dir=OUTPUT_DIR):
+    """image_url + image_srcset values for one exercise (its variants must exist)."""
+    srcset = {}
+    for fmt in formats:
+        if fmt == FALLBACK_FORMAT:
+            continue
+        srcset[FORMATS[fmt][1]] = ", ".join(
+            f"{variant_url(ex_id, w, fmt, images_dir)} {w}w" for w in WIDTHS
+        )
+    url = variant_url(ex_id, WIDTHS[0], FALLBACK_FORMAT, images_dir)
+    return url, srcset
+
+
+def set_after(record, anchor, key, value):
+    """Set record[key], inserting it right after `anchor` when new (in place)."""
+    if key in record:
+        record[key] = value
+        return
+    items = list(record.items())
+    record.clear()
+    for k, v in items:
+        record[k] = v
+        if k == anchor:
+            record[key] = value
+    record.setdefault(key, value)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build web variants of exercise images")
+    parser.add_argument("--dry-run", action="store_true", help="Report only, write nothing")
+    parser.add_argument("--category", help="Only process one category (e.g. push)")
+    parser.add_argument("--ids", help="Comma-separated exercise IDs to process")
+    parser.add_argument("--force", action="store_true", help="Re-encode even if variants are up to date")
+    parser.add_argument(
+        "--formats",
+        default=",".join(DEFAULT_FORMATS),
+        help=f"Comma-separated output formats (default: {','.join(DEFAULT_FORMATS)})",
+    )
+    parser.add_argument("--jobs", type=int, default=None, help="Worker processes (default: CPU count)")
+    args = parser.parse_args()
+
+    _require_pillow()
+    formats = available_formats([f.strip() for f in args.formats.split(",") if f.strip()])
+    only_ids = set(args.ids.split(",")) if args.ids else None
+
+    exercises = load_all_exercises(category_filter=args.category)
+    todo = []
+    missing = 0
+    for ex in exercises:
+        if only_ids and ex["id"] not in only_ids:
+            continue
+        if not master_path(ex["id"]).exists():
+            missing += 1
+            continue
+        todo.append(ex)
+    print(f"Loaded {len(exercises)} exercises, {len(todo)} masters to process.", file=sys.stderr)
+
+    if args.dry_run:
+        for ex in todo:
+            path = master_path(ex["id"])
+            real = REAL_EXTENSIONS.get(detect_format(path), "?")
+            note = "" if real == path.suffix[1:] else f"  (really .{real})"
+            print(f"  {path.name}{note}")
+        for ex in exercises:
+            ex.pop("_source_file", None)
+            ex.pop("_category", None)
+        return
+
+    master_bytes = 0
+    variant_bytes = {fmt: 0 for fmt in formats}
+    misnamed = 0
+    changed = 0
+    processed = 0
+    failed = 0
+    placeholder_bytes = 0
+
+    with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+        futures = {
+            ex["id"]: pool.submit(build_variants, str(master_path(ex["id"])), ex["id"], formats, args.force)
+            for ex in todo
+        }
+        for ex in todo:
+            ex_id = ex["id"]
+            try:
+                real_format, written, lqip = futures[ex_id].result()
+            except Exception as e:
+                print(f"  ERROR {ex_id}: {e}", file=sys.stderr)
+                failed += 1
+                continue
+            processed += 1
+            if REAL_EXTENSIONS.get(real_format) != "png":
+                misnamed += 1
+            for name, size in written:
+                print(f"  → {name} ({size // 1024} KB)")
+
+            master_bytes += master_path(ex_id).stat().st_size
+            for fmt in formats:
+                variant_bytes[fmt] += (OUTPUT_DIR / variant_name(ex_id, WIDTHS[0], fmt)).stat().st_size
+
+            url, srcset = srcset_fields(ex_id, formats)
+            if (ex.get("image_url"), ex.get("image_srcset"), ex.get("image_placeholder")) != (url, srcset, lqip):
+                ex["image_url"] = url
+                ex["image_srcset"] = srcset
+                set_after(ex, "image_srcset", "image_placeholder", lqip)
+                changed += 1
+            placeholder_bytes += len(lqip)
+
+    print(f"\nProcessed: {processed}, Failed: {failed}, Missing masters: {missing}, Misnamed masters: {misnamed}")
+    if processed:
+        print(f"Masters: {master_bytes // 1024} KB")
+        for fmt, size in variant_bytes.items():
+            print(f"  {fmt:5s} @{WIDTHS[0]}w: {size // 1024} KB ({size / master_bytes:.1%})")
+        print(f"  placeholders: {placeholder_bytes // processed} B per exercise (base64 data URI)")
+
+    if changed:
+        print(f"Updating JSON files ({changed} exercises)...")
+        save_exercises_by_file(exercises)
+        print("Run scripts/build_bundle.py to refresh the PWA catalog.")
+    else:
+        for ex in exercises:
+            ex.pop("_source_file", None)
+            ex.pop("_category", None)
+
+
+if __name__ == "__main__":
+    main()
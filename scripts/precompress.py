@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+precompress.py — Writes maximum-level .br and .gz siblings next to every
+compressible asset in web/, and reports what they save.
+
+Usage:
+  python3 scripts/precompress.py [--force] [--clean]
+  python3 scripts/dev_server.py            # serves them by content negotiation
+
+Covers what the PWA downloads: the precache manifest's files
+(build_precache.py) plus service-worker.js, limited to text-like formats and
+WASM. Images are already compressed and left alone.
+
+  .gz   zlib level 9, mtime 0 (byte-identical across runs)
+  .br   Brotli quality 11, text or generic mode by type (optional: pip install brotli)
+
+A sibling is rewritten only when older than its source (or with --force) and
+dropped when it would not be smaller than the source. --clean deletes the
+siblings of those same assets, nothing else under web/. The siblings are
+build outputs and are not committed.
+
+Requirements:
+  none (pip install brotli for .br)
+"""
+
+import argparse
+import gzip
+import sys
+from pathlib import Path
+
+from build_precache import SERVICE_WORKER, WEB_DIR, collect
+from catalog import write_atomic
+
+COMPRESSIBLE = {".html", ".css", ".js", ".mjs", ".json", ".svg", ".wasm", ".webmanifest", ".txt"}
+ENCODINGS = ("br", "gz")
+
+
+def load_brotli():
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+
+def compress(data, encoding, suffix, brotli=None):
+    if encoding == "gz":
+        return gzip.compress(data, compresslevel=9, mtime=0)
+    mode = brotli.MODE_GENERIC if suffix == ".wasm" else brotli.MODE_TEXT
+    return brotli.compress(data, quality=11, mode=mode)
+
+
+def assets():
+    """Compressible files the app downloads, as paths under web/."""
+    paths = [WEB_DIR / url[1:] for url, rev in collect() if rev] + [SERVICE_WORKER]
+    return sorted(p for p in paths if p.suffix in COMPRESSIBLE and p.exists())
+
+
+def sibling(path, encoding):
+    return path.with_name(f"{path.name}.{encoding}")
+
+
+def precompress(path, encodings, brotli=None, force=False):
+    """
+    Bring the siblings of one asset up to date.
+    Returns ({encoding: bytes served}, number of siblings written).
+    """
+    data = path.read_bytes()
+    sizes, written = {}, 0
+    for enc in encodings:
+        out = sibling(path, enc)
+        if not force and out.exists() and out.stat().st_mtime >= path.stat().st_mtime:
+            sizes[enc] = out.stat().st_size
+            continue
+        packed = compress(data, enc, path.suffix, brotli)
+        if len(packed) >= len(data):
+            out.unlink(missing_ok=True)
+            sizes[enc] = len(data)
+            continue
+        write_atomic(out, packed)
+        sizes[enc] = len(packed)
+        written += 1
+    return sizes, written
+
+
+def clean(paths):
+    """Delete the .br / .gz siblings of `paths`; returns the deleted files."""
+    removed = [out for p in paths for enc in ENCODINGS if (out := sibling(p, enc)).exists()]
+    for out in removed:
+        out.unlink()
+    return removed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompress web assets (.br, .gz)")
+    parser.add_argument("--force", action="store_true", help="Recompress even if siblings are up to date")
+    parser.add_argument("--clean", action="store_true", help="Delete the .br / .gz siblings of the assets and exit")
+    args = parser.parse_args()
+
+    if args.clean:
+        print(f"Removed {len(clean(assets()))} compressed siblings.")
+        return
+
+    brotli = load_brotli()
+    encodings = ENCODINGS if brotli else ("gz",)
+    if not brotli:
+        print("  Warning: brotli not installed — writing .gz only (pip install brotli)", file=sys.stderr)
+
+    totals = {"raw": 0, **{enc: 0 for enc in encodings}}
+    written = 0
+    print(f"  {'file':40s} {'raw':>9s}" + "".join(f" {enc:>9s}" for enc in encodings))
+    for path in assets():
+        sizes, n = precompress(path, encodings, brotli, args.force)
+        written += n
+        raw = path.stat().st_size
+        totals["raw"] += raw
+        for enc in encodings:
+            totals[enc] += sizes[enc]
+        print(f"  {path.relative_to(WEB_DIR).as_posix():40s} {raw:9,d}"
+              + "".join(f" {sizes[enc]:9,d}" for enc in encodings))
+
+    raw = totals["raw"]
+    print(f"  {'total':40s} {raw:9,d}" + "".join(f" {totals[enc]:9,d}" for enc in encodings))
+    print("\n" + ", ".join(f"{enc}: {totals[enc] / raw:.1%} of raw" for enc in encodings)
+          + f" ({written} files written)")
+
+
+if __name__ == "__main__":
+    main()
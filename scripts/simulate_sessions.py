@@ -0,0 +1,546 @@
+#!/usr/bin/env python3
+"""
+simulate_sessions.py — Runs ProgramBuilder::build_session (src/program.rs)
+over the whole profile space, vectorized with NumPy.
+
+Usage:
+  python3 scripts/simulate_sessions.py [--seeds 5040] [--json report.json]
+  python3 scripts/simulate_sessions.py --baseline report.json   # diff vs. a saved report
+  python3 scripts/simulate_sessions.py --check                  # cross-check vs. Rust plans (cargo)
+
+Profile space (everything ProgramBuilder or the JS pre-filter reads):
+  age_bracket × fitness_level × minutes_per_session × is_postpartum
+  × injury_notes (every subset of the onboarding choices) × has_anchor
+  × day_seed in [0, --seeds)
+sex, lang and workout_days are not read by the builder and are not simulated.
+
+The selection logic is mirrored twice: build_session() is a line-by-line
+scalar port used as the reference, simulate() evaluates it for all seeds and
+session lengths of a profile at once. Nothing the Rust side decides is
+copied here: sets, reps, rest, timing constants and the category priority
+order are read from src/program.rs, difficulty caps, age brackets and the
+45+ rest bonus from src/profile.rs, the seconds-per-rep estimate from
+src/session.rs, the category and contraindication enums and timed patterns
+from src/exercise.rs, and the injury and session-length choices from
+web/js/ui/onboarding.js. Only the selection logic itself is ported by hand.
+
+--check runs the emit_fixture_plans test of src/program.rs (cargo test
+-- --nocapture), which prints the plans the Rust builder makes for its own
+fixture catalog and for web/data/catalog.json over a grid of profiles, and
+requires build_session() to reproduce every one (ids, sets, reps, durations,
+rest). It then requires simulate() to agree with build_session() plan for plan
+(both catalogs, every profile, the first seeds). Run it after touching either
+side; it needs cargo.
+
+Report: empty plans, categories with no eligible exercise, how the time
+budget is used (fill rate, categories dropped because they did not fit),
+consecutive days with an identical plan, and per-exercise selection counts
+(never-selected exercises, balance within each category).
+
+Requirements:
+  pip install numpy
+"""
+
+import argparse
+import itertools
+import json
+import re
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from catalog import Catalog
+from validate_catalog import (
+    COMMENT_RE, RUST_SOURCE, SchemaError, onboarding_choices, parse_enums, parse_rust, snake_case,
+    timed_patterns,
+)
+
+ROOT = Path(__file__).parent.parent
+PROGRAM_RS = ROOT / "src" / "program.rs"
+PROFILE_RS = ROOT / "src" / "profile.rs"
+SESSION_RS = ROOT / "src" / "session.rs"
+RUST_PLANS_TEST = "program::tests::emit_fixture_plans"
+RUST_PLANS_MARKER = "FIXTURE_PLANS "
+
+TIMED_PATTERNS = timed_patterns()
+INJURIES, MINUTE_OPTIONS = onboarding_choices()
+
+
+def rust_constants(path=PROGRAM_RS):
+    """`const NAME: u32 = N;` items of program.rs."""
+    text = Path(path).read_text(encoding="utf-8")
+    return {name: int(value) for name, value in re.findall(r"const (\w+): u\d+ = (\d+);", text)}
+
+
+def rust_arms(path, fn, enum):
+    """`enum::Variant => expr` arms of `fn fn(&self)` in a Rust source: {Variant: expr}."""
+    source = COMMENT_RE.sub("", Path(path).read_text(encoding="utf-8"))
+    body = re.search(rf"fn {fn}\(&self\)[^{{]*\{{(.*?)\n    \}}", source, re.S)
+    if not body:
+        raise SchemaError(f"fn {fn} not found in {path}")
+    return dict(re.findall(rf"{enum}::(\w+) => ([^\n]*?),?[ \t]*\n", body.group(1)))
+
+
+def rust_enum(path, name):
+    """Serialized values of `pub enum name` in a Rust source, in declaration order."""
+    enums = parse_enums(Path(path).read_text(encoding="utf-8"))
+    if name not in enums:
+        raise SchemaError(f"enum {name} not found in {path}")
+    return enums[name][0]
+
+
+def priority_order(path=PROGRAM_RS):
+    """is_postpartum → category order, from the priority_order of build_session()."""
+    source = COMMENT_RE.sub("", Path(path).read_text(encoding="utf-8"))
+    m = re.search(r"let priority_order: &\[Category\] = if is_postpartum \{(.*?)\} else \{(.*?)\};", source, re.S)
+    if not m:
+        raise SchemaError(f"priority_order not found in {path}")
+    return {pp: tuple(snake_case(v) for v in re.findall(r"Category::(\w+)", m.group(2 - pp)))
+            for pp in (False, True)}
+
+
+def rep_estimate(path=SESSION_RS):
+    """(reps when unset, seconds per rep) of SessionExercise::estimated_duration_s()."""
+    m = re.search(r"self\.reps\.unwrap_or\((\d+)\) as u32 \* (\d+)", Path(path).read_text(encoding="utf-8"))
+    if not m:
+        raise SchemaError(f"estimated_duration_s not found in {path}")
+    return int(m.group(1)), int(m.group(2))
+
+
+def level_rules():
+    """
+    fitness_level → (sets, reps per set, max difficulty) and → rest_s, from
+    sets_and_rest() / reps_per_set() (program.rs) and max_difficulty() (profile.rs).
+    """
+    consts = rust_constants()
+    reps = rust_arms(PROGRAM_RS, "reps_per_set", "FitnessLevel")
+    difficulty = rust_arms(PROFILE_RS, "max_difficulty", "FitnessLevel")
+    levels, rest = {}, {}
+    for variant, arm in rust_arms(PROGRAM_RS, "sets_and_rest", "FitnessLevel").items():
+        sets_rest = re.fullmatch(r"\((\d+), (\w+)\)", arm)
+        if not sets_rest:
+            raise SchemaError(f"unexpected sets_and_rest arm for {variant}: {arm}")
+        level = snake_case(variant)
+        levels[level] = (int(sets_rest.group(1)), int(reps[variant]), int(difficulty[variant]))
+        rest[level] = consts[sets_rest.group(2)]
+    return levels, rest
+
+
+_CONST = rust_constants()
+TRANSITION_S = _CONST["TRANSITION_S"]
+# fitness_level → (sets, reps per set, max difficulty), fitness_level → rest_s
+LEVELS, REST_S = level_rules()
+AGE_45_REST_BONUS_S = int(rust_arms(PROFILE_RS, "rest_bonus_s", "AgeBracket")["Age45Plus"])
+CATEGORIES = rust_enum(RUST_SOURCE, "Category")
+PRIORITY = priority_order()          # is_postpartum → category order
+AGE_BRACKETS = rust_enum(PROFILE_RS, "AgeBracket")
+DEFAULT_REPS, SECONDS_PER_REP = rep_estimate()
+
+
+def contraindication_bits():
+    """Contraindication value → bit, in src/exercise.rs declaration order."""
+    enums, _ = parse_rust(RUST_SOURCE.read_text(encoding="utf-8"))
+    values, _ = enums["Contraindication"]
+    return {v: 1 << i for i, v in enumerate(values)}
+
+
+# ── Scalar reference ─────────────────────────────────────────────────────────
+
+def sets_rest_reps(profile):
+    sets, reps, _ = LEVELS[profile["fitness_level"]]
+    rest = REST_S[profile["fitness_level"]]
+    if profile["age_bracket"] == "45_plus":
+        rest += AGE_45_REST_BONUS_S
+    return sets, rest, reps
+
+
+def max_difficulty(profile):
+    base = LEVELS[profile["fitness_level"]][2]
+    return max(base - 1, 1) if profile["age_bracket"] == "45_plus" else base
+
+
+def all_contraindications(profile):
+    contra = list(profile["injury_notes"])
+    if profile["is_postpartum"]:
+        contra += ["postpartum", "diastasis_recti"]
+    return contra
+
+
+def estimated_duration_s(item):
+    work = item["duration_s"] if item["duration_s"] is not None else (item["reps"] or DEFAULT_REPS) * SECONDS_PER_REP
+    return work * item["sets"] + item["rest_s"] * max(item["sets"] - 1, 0)
+
+
+def build_session(profile, exercises, day_seed):
+    """ProgramBuilder::build_session, one plan at a time (list of SessionExercise dicts)."""
+    budget = profile["minutes_per_session"] * 60
+    contra = all_contraindications(profile)
+    max_diff = max_difficulty(profile)
+    pp = profile["is_postpartum"]
+    eligible = [
+        e for e in exercises
+        if not e["equipment_required"]
+        and (pp or not e["postpartum_only"])
+        and not any(c in contra for c in e["contraindications"])
+        and e["difficulty"] <= max_diff
+    ]
+    sets, rest_s, reps = sets_rest_reps(profile)
+
+    selected, used = [], 0
+    for category in PRIORITY[pp]:
+        if used >= budget:
+            break
+        matching = [e for e in eligible if e["category"] == category]
+        if not matching:
+            continue
+        ex = matching[day_seed % len(matching)]
+        timed = ex["movement_pattern"] in TIMED_PATTERNS
+        item = {
+            "exercise_id": ex["id"],
+            "sets": sets,
+            "reps": None if timed else reps,
+            "duration_s": ex["duration_s"] if timed else None,
+            "rest_s": rest_s,
+        }
+        needed = estimated_duration_s(item) + TRANSITION_S
+        if used + needed <= budget:
+            used += needed
+            selected.append(item)
+    return selected
+
+
+# ── Vectorized ───────────────────────────────────────────────────────────────
+
+def builder_profiles():
+    """Every (age, level, postpartum, injuries, has_anchor) combination."""
+    injury_sets = [
+        combo for r in range(len(INJURIES) + 1) for combo in itertools.combinations(INJURIES, r)
+    ]
+    return list(itertools.product(AGE_BRACKETS, LEVELS, (False, True), injury_sets, (False, True)))
+
+
+def as_profile(age, level, pp, injuries, minutes):
+    return {
+        "age_bracket": age, "fitness_level": level, "is_postpartum": pp,
+        "injury_notes": list(injuries), "minutes_per_session": minutes,
+    }
+
+
+class CatalogArrays:
+    """Columns of the exercise list, in the order build_session sees it."""
+
+    def __init__(self, exercises):
+        import numpy as np
+
+        bits = contraindication_bits()
+        self.ids = [e["id"] for e in exercises]
+        self.category = np.array([CATEGORIES.index(e["category"]) for e in exercises], dtype=np.int8)
+        self.difficulty = np.array([e["difficulty"] for e in exercises], dtype=np.int8)
+        self.duration_s = np.array([e["duration_s"] for e in exercises], dtype=np.int32)
+        self.equipment = np.array([e["equipment_required"] for e in exercises], dtype=bool)
+        self.pp_only = np.array([e["postpartum_only"] for e in exercises], dtype=bool)
+        self.anchor = np.array([bool(e.get("requires_anchor")) for e in exercises], dtype=bool)
+        self.timed = np.array([e["movement_pattern"] in TIMED_PATTERNS for e in exercises], dtype=bool)
+        self.contra = np.array(
+            [sum(bits.get(c, 0) for c in e["contraindications"]) for e in exercises], dtype=np.uint32
+        )
+        self.bits = bits
+
+    def __len__(self):
+        return len(self.ids)
+
+    def eligible(self, age, level, pp, injuries, anchor):
+        user = sum(self.bits[c] for c in all_contraindications(as_profile(age, level, pp, injuries, 0)))
+        max_diff = max_difficulty(as_profile(age, level, pp, injuries, 0))
+        return (
+            ~self.equipment
+            & (pp | ~self.pp_only)
+            & ((self.contra & user) == 0)
+            & (self.difficulty <= max_diff)
+            & (anchor | ~self.anchor)
+        )
+
+    def cost(self, age, level):
+        """estimated_duration_s + TRANSITION_S of every exercise for this level/age."""
+        sets, rest, reps = sets_rest_reps(as_profile(age, level, False, (), 0))
+        work = self.duration_s.copy()
+        work[~self.timed] = reps * SECONDS_PER_REP
+        return work * sets + rest * (sets - 1) + TRANSITION_S
+
+
+def simulate(arrays, profile, seeds, minutes):
+    """
+    All plans of one builder profile.
+    Returns (picks, n_eligible): picks is int [len(minutes), len(seeds), 6]
+    with exercise indexes in priority order (-1 = nothing selected);
+    n_eligible is the number of eligible exercises per priority slot.
+    """
+    import numpy as np
+
+    age, level, pp, injuries, anchor = profile
+    mask = arrays.eligible(*profile)
+    cost = arrays.cost(age, level)
+    budget = np.asarray(minutes, dtype=np.int64)[:, None] * 60
+    used = np.zeros((len(minutes), len(seeds)), dtype=np.int64)
+    picks = np.full((len(minutes), len(seeds), len(CATEGORIES)), -1, dtype=np.int32)
+    n_eligible = np.zeros(len(CATEGORIES), dtype=np.int32)
+
+    for slot, category in enumerate(PRIORITY[pp]):
+        idx = np.flatnonzero(mask & (arrays.category == CATEGORIES.index(category)))
+        n_eligible[slot] = len(idx)
+        if not len(idx):
+            continue
+        chosen = idx[seeds % len(idx)]
+        needed = cost[chosen][None, :]
+        fits = (used < budget) & (used + needed <= budget)
+        used += np.where(fits, needed, 0)
+        picks[:, :, slot] = np.where(fits, chosen[None, :], -1)
+    return picks, n_eligible, used
+
+
+def run(exercises, n_seeds, minutes=MINUTE_OPTIONS):
+    """Simulate the full profile space and return the report dict."""
+    import numpy as np
+
+    arrays = CatalogArrays(exercises)
+    seeds = np.arange(n_seeds, dtype=np.int64)
+    profiles = builder_profiles()
+    n_minutes = len(minutes)
+
+    selected = np.zeros(len(arrays), dtype=np.int64)
+    empty_plans = 0
+    plans_by_minutes = np.zeros(n_minutes, dtype=np.int64)
+    exercises_by_minutes = np.zeros(n_minutes, dtype=np.int64)
+    fill_by_minutes = np.zeros(n_minutes, dtype=np.float64)
+    empty_category = dict.fromkeys(CATEGORIES, 0)
+    dropped_for_time = dict.fromkeys(CATEGORIES, 0)
+    identical_next_day = 0
+    empty_examples = []
+
+    started = time.perf_counter()
+    for profile in profiles:
+        picks, n_eligible, used = simulate(arrays, profile, seeds, minutes)
+        order = PRIORITY[profile[2]]
+        taken = picks >= 0
+        counts = taken.sum(axis=2)
+
+        selected += np.bincount(picks[taken], minlength=len(arrays))
+        empty = counts == 0
+        empty_plans += int(empty.sum())
+        if empty.any() and len(empty_examples) < 5:
+            m = int(np.argmax(empty.any(axis=1)))
+            empty_examples.append({"profile": as_profile(*profile[:4], minutes[m]), "has_anchor": profile[4]})
+        plans_by_minutes += len(seeds)
+        exercises_by_minutes += counts.sum(axis=1)
+        fill_by_minutes += (used / (np.asarray(minutes)[:, None] * 60)).sum(axis=1)
+        for slot, category in enumerate(order):
+            if n_eligible[slot] == 0:
+                empty_category[category] += 1
+            else:
+                dropped_for_time[category] += int((~taken[:, :, slot]).sum())
+        identical_next_day += int((picks[:, 1:] == picks[:, :-1]).all(axis=2).sum())
+    elapsed = time.perf_counter() - started
+
+    total_plans = len(profiles) * n_minutes * n_seeds
+    by_category = {}
+    for c, category in enumerate(CATEGORIES):
+        members = [i for i in range(len(arrays)) if arrays.category[i] == c]
+        counts = {arrays.ids[i]: int(selected[i]) for i in members}
+        picked = [n for n in counts.values() if n]
+        by_category[category] = {
+            "exercises": len(members),
+            "never_selected": sorted(k for k, n in counts.items() if not n),
+            "max_over_min": round(max(picked) / min(picked), 2) if picked else None,
+        }
+
+    return {
+        "catalog_size": len(arrays),
+        "profiles": len(profiles),
+        "minutes": list(minutes),
+        "seeds": n_seeds,
+        "plans": total_plans,
+        "elapsed_s": round(elapsed, 3),
+        "empty_plans": empty_plans,
+        "empty_plan_examples": empty_examples,
+        "empty_category_profiles": empty_category,
+        "dropped_for_time": dropped_for_time,
+        "identical_next_day": identical_next_day,
+        "next_day_pairs": len(profiles) * n_minutes * max(n_seeds - 1, 0),
+        "by_minutes": {
+            str(m): {
+                "exercises_per_plan": round(exercises_by_minutes[i] / plans_by_minutes[i], 3),
+                "budget_fill": round(fill_by_minutes[i] / plans_by_minutes[i], 4),
+            }
+            for i, m in enumerate(minutes)
+        },
+        "by_category": by_category,
+        "selections": {arrays.ids[i]: int(n) for i, n in enumerate(selected)},
+    }
+
+
+def print_report(report):
+    plans = report["plans"]
+    rate = plans / report["elapsed_s"] if report["elapsed_s"] else float("inf")
+    print(f"Simulated {plans:,} plans ({report['profiles']} profiles × {len(report['minutes'])} lengths × "
+          f"{report['seeds']} seeds) in {report['elapsed_s']:.2f}s ({rate / 1e6:.1f}M plans/s)\n")
+
+    print(f"Empty plans: {report['empty_plans']:,} ({report['empty_plans'] / plans:.2%})")
+    for ex in report["empty_plan_examples"]:
+        print(f"  e.g. {ex}")
+    pairs = report["next_day_pairs"]
+    if pairs:
+        print(f"Same plan as the previous day: {report['identical_next_day'] / pairs:.2%} of day pairs")
+
+    print("\nBy session length:")
+    for m, row in report["by_minutes"].items():
+        print(f"  {m:>3} min  {row['exercises_per_plan']:.2f} exercises/plan  "
+              f"{row['budget_fill']:.0%} of budget used")
+
+    print("\nBy category:")
+    for category in CATEGORIES:
+        row = report["by_category"][category]
+        empty = report["empty_category_profiles"][category] / report["profiles"]
+        dropped = report["dropped_for_time"][category] / plans
+        ratio = row["max_over_min"]
+        print(f"  {category:9s} {row['exercises']:3d} ex  empty for {empty:6.1%} of profiles  "
+              f"dropped for time in {dropped:6.1%} of plans  "
+              f"balance max/min {ratio if ratio is not None else '—'}")
+        if row["never_selected"]:
+            print(f"            never selected: {', '.join(row['never_selected'])}")
+
+
+def print_diff(report, baseline):
+    """Key metrics vs. a previously saved report."""
+    print("\nVs. baseline:")
+    for key in ("catalog_size", "empty_plans", "identical_next_day"):
+        print(f"  {key:20s} {baseline.get(key)} → {report[key]}")
+    for m, row in report["by_minutes"].items():
+        old = baseline.get("by_minutes", {}).get(m)
+        if old:
+            print(f"  {m:>3} min fill        {old['budget_fill']:.1%} → {row['budget_fill']:.1%}")
+    for category in CATEGORIES:
+        old = set(baseline.get("by_category", {}).get(category, {}).get("never_selected", []))
+        new = set(report["by_category"][category]["never_selected"])
+        if old != new:
+            print(f"  {category}: never selected +{sorted(new - old)} -{sorted(old - new)}")
+
+
+# ── Cross-check ──────────────────────────────────────────────────────────────
+
+def rust_plans():
+    """
+    Output of the emit_fixture_plans test of src/program.rs:
+    {"catalogs": {"full": [Exercise]}, "cases": [{catalog, profile, day_seed, plan}]}.
+    "catalog" cases were built by the Rust planner from web/data/catalog.json.
+    """
+    cmd = ["cargo", "test", "--quiet", "--lib", RUST_PLANS_TEST, "--", "--exact", "--nocapture"]
+    try:
+        proc = subprocess.run(cmd, cwd=ROOT, capture_output=True, text=True)
+    except FileNotFoundError:
+        raise RuntimeError("cargo not found (install Rust: https://rustup.rs)") from None
+    for line in proc.stdout.splitlines():
+        _, marker, payload = line.partition(RUST_PLANS_MARKER)
+        if marker and proc.returncode == 0:
+            return json.loads(payload)
+    tail = "\n".join((proc.stderr or proc.stdout).strip().splitlines()[-5:])
+    raise RuntimeError(f"{' '.join(cmd)} failed:\n{tail}")
+
+
+def compare_rust(fixtures, exercises):
+    """build_session() vs. every plan of rust_plans(); returns mismatch strings."""
+    catalogs = {"catalog": exercises, **fixtures["catalogs"]}
+    mismatches = []
+    for case in fixtures["cases"]:
+        profile = case["profile"]
+        usable = [e for e in catalogs[case["catalog"]] if profile["has_anchor"] or not e.get("requires_anchor")]
+        expected = build_session(profile, usable, case["day_seed"])
+        if expected != case["plan"] and len(mismatches) < 10:
+            mismatches.append(f"{case['catalog']} {profile} seed {case['day_seed']}: "
+                              f"Rust {case['plan']} ≠ {expected}")
+    return mismatches
+
+
+def cross_check(exercises, n_seeds, minutes, label):
+    """simulate() vs. build_session() for every profile; returns mismatch strings."""
+    import numpy as np
+
+    arrays = CatalogArrays(exercises)
+    seeds = np.arange(n_seeds, dtype=np.int64)
+    mismatches = []
+    for profile in builder_profiles():
+        picks, _, _ = simulate(arrays, profile, seeds, minutes)
+        usable = [e for e in exercises if profile[4] or not e.get("requires_anchor")]
+        for m, minutes_per_session in enumerate(minutes):
+            p = as_profile(*profile[:4], minutes_per_session)
+            for s in range(n_seeds):
+                expected = [e["exercise_id"] for e in build_session(p, usable, s)]
+                got = [arrays.ids[i] for i in picks[m, s] if i >= 0]
+                if got != expected and len(mismatches) < 10:
+                    mismatches.append(f"{label} {p} anchor={profile[4]} seed {s}: {got} ≠ {expected}")
+    return mismatches
+
+
+def check(exercises):
+    failed = 0
+    catalogs = [("catalog", exercises)]
+    try:
+        fixtures = rust_plans()
+    except RuntimeError as e:
+        print(f"  ✗ Rust plans: {e}")
+        failed += 1
+    else:
+        mismatches = compare_rust(fixtures, exercises)
+        print(f"  {'✓' if not mismatches else '✗'} scalar = Rust on {len(fixtures['cases']):,} plans "
+              f"({RUST_PLANS_TEST})")
+        for msg in mismatches:
+            print(f"      {msg}", file=sys.stderr)
+        failed += bool(mismatches)
+        catalogs.insert(0, ("fixture", fixtures["catalogs"]["full"]))
+    minutes = (1, *MINUTE_OPTIONS)
+    for label, catalog in catalogs:
+        mismatches = cross_check(catalog, 24, minutes, label)
+        plans = len(builder_profiles()) * len(minutes) * 24
+        print(f"  {'✓' if not mismatches else '✗'} vectorized = scalar on {label} ({plans:,} plans)")
+        for msg in mismatches:
+            print(f"      {msg}", file=sys.stderr)
+        failed += bool(mismatches)
+    if failed:
+        print(f"\n{failed} check(s) failed", file=sys.stderr)
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate build_session over the profile space")
+    parser.add_argument("--seeds", type=int, default=5040,
+                        help="day_seed values per profile (default: 5040, a multiple of every "
+                             "category size up to 10)")
+    parser.add_argument("--json", metavar="PATH", help="Write the report as JSON")
+    parser.add_argument("--baseline", metavar="PATH", help="Compare with a report written by --json")
+    parser.add_argument("--check", action="store_true", help="Cross-check against plans printed by the Rust tests")
+    args = parser.parse_args()
+
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        print("ERROR: Install numpy: pip install numpy", file=sys.stderr)
+        sys.exit(1)
+
+    exercises = Catalog().exercises()
+    if args.check:
+        check(exercises)
+        return
+
+    report = run(exercises, args.seeds)
+    print_report(report)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            print_diff(report, json.load(f))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+            f.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+validate_catalog.py — Checks web/data/exercises/*.json against the schema the
+WASM engine actually deserializes.
+
+Usage:
+  python3 scripts/validate_catalog.py [files...]
+
+build_session (src/lib.rs) parses the whole catalog as Vec<Exercise> and
+rejects all of it on the first bad record. The allowed values are not
+duplicated here: enums and the Exercise struct are read from src/exercise.rs
+(serde attributes included) and compiled into one check per field, so adding a
+variant on the Rust side is enough.
+
+  errors    would make serde fail: missing field, wrong type, unknown enum value
+  warnings  accepted by serde but probably wrong: a contraindication that
+            falls into the #[serde(other)] variant
+
+Every write goes through catalog.save_records(), which refuses to write a
+catalog with errors; build_bundle.py runs the same checks.
+"""
+
+import ast
+import json
+import re
+import sys
+import time
+from functools import lru_cache
+from pathlib import Path
+
+RUST_SOURCE = Path(__file__).parent.parent / "src" / "exercise.rs"
+ELIGIBILITY_SOURCE = Path(__file__).parent.parent / "src" / "eligibility.rs"
+ONBOARDING_SOURCE = Path(__file__).parent.parent / "web" / "js" / "ui" / "onboarding.js"
+STRUCT_NAME = "Exercise"
+
+ENUM_RE   = re.compile(r"((?:#\[[^\]]*\]\s*)*)pub enum (\w+)\s*\{(.*?)\n\}", re.S)
+STRUCT_RE = re.compile(r"pub struct (\w+)\s*\{(.*?)\n\}", re.S)
+ITEM_RE   = re.compile(r"((?:#\[[^\]]*\]\s*)*)(?:pub\s+)?(\w+)\s*(?::\s*([^,]+?))?\s*,", re.S)
+RENAME_RE = re.compile(r'rename\s*=\s*"([^"]+)"')
+COMMENT_RE = re.compile(r"//[^\n]*")
+
+INT_RANGES = {
+    "u8": (0, 2**8 - 1), "u16": (0, 2**16 - 1), "u32": (0, 2**32 - 1), "u64": (0, 2**64 - 1),
+    "i8": (-2**7, 2**7 - 1), "i16": (-2**15, 2**15 - 1), "i32": (-2**31, 2**31 - 1),
+    "i64": (-2**63, 2**63 - 1),
+}
+
+
+class SchemaError(ValueError):
+    """The Rust source could not be understood."""
+
+
+def snake_case(name):
+    return re.sub(r"(?<!^)(?=[A-Z])", "_", name).lower()
+
+
+def parse_enums(source):
+    """Extract {enum: (serialized values, other_variant)} from Rust source text."""
+    source = COMMENT_RE.sub("", source)
+    enums = {}
+    for attrs, name, body in ENUM_RE.findall(source):
+        snake = "rename_all" in attrs and "snake_case" in attrs
+        values, other = [], None
+        for item_attrs, variant, _ in ITEM_RE.findall(body + ","):
+            if "serde(other)" in item_attrs.replace(" ", ""):
+                other = variant
+                continue
+            rename = RENAME_RE.search(item_attrs)
+            values.append(rename.group(1) if rename else snake_case(variant) if snake else variant)
+        enums[name] = (tuple(values), other)
+    return enums
+
+
+def parse_rust(source):
+    """
+    Extract {enum: (values, other_variant)} and {field: (type, has_default)}
+    for STRUCT_NAME from Rust source text.
+    """
+    enums = parse_enums(source)
+    source = COMMENT_RE.sub("", source)
+    structs = dict(STRUCT_RE.findall(source))
+    if STRUCT_NAME not in structs:
+        raise SchemaError(f"struct {STRUCT_NAME} not found in {RUST_SOURCE}")
+    fields = {}
+    for attrs, field, rust_type in ITEM_RE.findall(structs[STRUCT_NAME]):
+        if not rust_type:
+            raise SchemaError(f"cannot parse field {field!r} of {STRUCT_NAME}")
+        fields[field] = (rust_type.strip(), "serde(default" in attrs.replace(" ", ""))
+    return enums, fields
+
+
+def compile_type(rust_type, enums):
+    """
+    Return check(value) → (error or None, warning or None) for a Rust type.
+    """
+    m = re.fullmatch(r"(Vec|Option)<(.+)>", rust_type)
+    if m:
+        outer, inner = m.groups()
+        check_inner = compile_type(inner, enums)
+        if outer == "Option":
+            return lambda v: (None, None) if v is None else check_inner(v)
+
+        def check_vec(v):
+            if not isinstance(v, list):
+                return f"expected a list, got {type(v).__name__}", None
+            warnings = []
+            for i, item in enumerate(v):
+                err, warn = check_inner(item)
+                if err:
+                    return f"[{i}] {err}", None
+                if warn:
+                    warnings.append(warn)
+            return None, "; ".join(warnings) or None
+        return check_vec
+
+    if rust_type == "String":
+        return lambda v: (None, None) if isinstance(v, str) else (f"expected a string, got {v!r}", None)
+    if rust_type == "bool":
+        return lambda v: (None, None) if isinstance(v, bool) else (f"expected true/false, got {v!r}", None)
+    if rust_type in INT_RANGES:
+        lo, hi = INT_RANGES[rust_type]
+
+        def check_int(v):
+            if isinstance(v, bool) or not isinstance(v, int):
+                return f"expected an integer ({rust_type}), got {v!r}", None
+            if not lo <= v <= hi:
+                return f"{v} out of range for {rust_type}", None
+            return None, None
+        return check_int
+    if rust_type in enums:
+        values, other = enums[rust_type]
+        allowed = frozenset(values)
+
+        def check_enum(v):
+            if not isinstance(v, str):
+                return f"expected a {rust_type} string, got {v!r}", None
+            if v in allowed:
+                return None, None
+            if other:
+                return None, f"{v!r} is not a known {rust_type} (read as {other})"
+            return f"{v!r} is not a {rust_type} ({', '.join(values)})", None
+        return check_enum
+    raise SchemaError(f"unsupported Rust type {rust_type!r}")
+
+
+@lru_cache(maxsize=None)
+def load_enums(rust_source=RUST_SOURCE):
+    """{enum: (serialized values, serde(other) variant or None)}, declaration order."""
+    enums, _ = parse_rust(Path(rust_source).read_text(encoding="utf-8"))
+    return enums
+
+
+def timed_patterns(rust_source=RUST_SOURCE):
+    """MovementPattern values listed in `fn is_timed` (shown in seconds, not reps)."""
+    source = COMMENT_RE.sub("", Path(rust_source).read_text(encoding="utf-8"))
+    body = re.search(r"fn is_timed\(&self\)[^{]*\{(.*?)\n    \}", source, re.S)
+    if not body:
+        raise SchemaError(f"MovementPattern::is_timed not found in {rust_source}")
+    return frozenset(snake_case(v) for v in re.findall(r"MovementPattern::(\w+)", body.group(1)))
+
+
+def eligibility_flags(rust_source=ELIGIBILITY_SOURCE):
+    """`FLAG_*` bit constants of src/eligibility.rs, e.g. {"equipment": 1, ...}."""
+    source = Path(rust_source).read_text(encoding="utf-8")
+    return {
+        name.lower(): 1 << int(shift)
+        for name, shift in re.findall(r"pub const FLAG_(\w+): u8 = 1 << (\d+);", source)
+    }
+
+
+def onboarding_choices(js_source=ONBOARDING_SOURCE):
+    """(injury_notes values, minutes_per_session values) offered by the onboarding."""
+    source = Path(js_source).read_text(encoding="utf-8")
+    choices = []
+    for name in ("injuries", "minuteOptions"):
+        array = re.search(rf"const {name} = (\[[^\]]*\]);", source)
+        if not array:
+            raise SchemaError(f"const {name} not found in {js_source}")
+        choices.append(tuple(ast.literal_eval(array.group(1))))
+    return tuple(choices)
+
+
+@lru_cache(maxsize=None)
+def load_schema(rust_source=RUST_SOURCE):
+    """Parse and compile the Exercise schema: {field: (required, check)}."""
+    enums, fields = parse_rust(Path(rust_source).read_text(encoding="utf-8"))
+    return {
+        field: (not has_default and not rust_type.startswith("Option<"), compile_type(rust_type, enums))
+        for field, (rust_type, has_default) in fields.items()
+    }
+
+
+def check_records(records, label="", schema=None):
+    """
+    Validate one category file's records. Returns (errors, warnings), each a
+    list of "label[index] id: field: message" strings.
+    """
+    schema = schema or load_schema()
+    errors, warnings = [], []
+    if not isinstance(records, list):
+        return [f"{label}: expected a JSON array"], []
+    for i, ex in enumerate(records):
+        where = f"{label}[{i}] {ex.get('id', '<no id>') if isinstance(ex, dict) else ''}".rstrip()
+        if not isinstance(ex, dict):
+            errors.append(f"{where}: expected an object")
+            continue
+        for field, (required, check) in schema.items():
+            if field not in ex:
+                if required:
+                    errors.append(f"{where}: missing field {field!r}")
+                continue
+            err, warn = check(ex[field])
+            if err:
+                errors.append(f"{where}: {field}: {err}")
+            if warn:
+                warnings.append(f"{where}: {field}: {warn}")
+    return errors, warnings
+
+
+def main():
+    from catalog import Catalog
+
+    started = time.perf_counter()
+    if len(sys.argv) > 1:
+        files = [(Path(p).name, json.loads(Path(p).read_text(encoding="utf-8"))) for p in sys.argv[1:]]
+    else:
+        catalog = Catalog()
+        files = [(catalog.path(c).name, catalog.records(c)) for c in catalog.categories]
+
+    schema = load_schema()
+    errors, warnings, total = [], [], 0
+    for label, records in files:
+        errs, warns = check_records(records, label, schema)
+        errors += errs
+        warnings += warns
+        total += len(records)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    for msg in warnings:
+        print(f"  WARN  {msg}")
+    for msg in errors:
+        print(f"  ERROR {msg}", file=sys.stderr)
+    print(f"{total} records in {len(files)} files, {len(schema)} fields checked "
+          f"against {RUST_SOURCE.relative_to(RUST_SOURCE.parent.parent)}: "
+          f"{len(errors)} errors, {len(warnings)} warnings ({elapsed_ms:.1f} ms)")
+    if errors:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+wger_fixture_server.py — Serves recorded wger API responses locally, so
+fetch_wger.py can be run and timed without the network.
+
+Usage:
+  python3 scripts/fetch_wger.py > /dev/null                 # records into scripts/.wger_cache/
+  python3 scripts/wger_fixture_server.py --port 8766 --latency 0.2
+  python3 scripts/fetch_wger.py --base-url http://127.0.0.1:8766 --ttl 0
+
+  python3 scripts/wger_fixture_server.py --dir tests/py/fixtures/wger
+  python3 scripts/fetch_wger.py --base-url http://127.0.0.1:8766 --cache-dir /tmp/wger --ttl 0
+
+Each cache entry written by WgerClient stores the request path relative to
+the API root; the server answers that path with the recorded body and ETag,
+and with 304 Not Modified when the client's If-None-Match matches. Bodies
+are gzip-encoded when the client accepts it, as wger.de does.
+
+tests/py/fixtures/wger/ is a small committed set in the same format: ten
+exerciseinfo bases, as one page of 100 (what fetch_wger.py requests) and as
+three pages of FIXTURE_PAGE_SIZE (for the concurrent page fan-out).
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import sys
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from fetch_wger import CACHE_DIR, cache_key
+
+FIXTURES_DIR      = Path(__file__).parent.parent / "tests" / "py" / "fixtures" / "wger"
+FIXTURE_PAGE_SIZE = 4
+
+
+def make_handler(fixtures_dir, latency):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            time.sleep(latency)
+            path = fixtures_dir / f"{cache_key(self.path.lstrip('/'))}.json"
+            if not path.exists():
+                return self._send(404, b'{"detail": "Not found."}')
+
+            with open(path, encoding="utf-8") as f:
+                entry = json.load(f)
+            body = json.dumps(entry["body"], ensure_ascii=False).encode("utf-8")
+            etag = entry.get("etag") or f'"{hashlib.sha256(body).hexdigest()[:16]}"'
+
+            if self.headers.get("If-None-Match") == etag:
+                return self._send(304, b"", etag)
+            coding = None
+            if "gzip" in self.headers.get("Accept-Encoding", ""):
+                body, coding = gzip.compress(body), "gzip"
+            self._send(200, body, etag, coding)
+
+        def _send(self, code, body, etag=None, coding=None):
+            self.send_response(code)
+            if code != 304:
+                self.send_header("Content-Type", "application/json")
+            if coding:
+                self.send_header("Content-Encoding", coding)
+            self.send_header("Content-Length", str(len(body)))
+            if etag:
+                self.send_header("ETag", etag)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, fmt, *args):
+            print(f"  {fmt % args}", file=sys.stderr)
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve recorded wger responses")
+    parser.add_argument("--dir", default=str(CACHE_DIR), help="Recorded responses (WgerClient cache)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds per request (default: 0)")
+    args = parser.parse_args()
+
+    fixtures_dir = Path(args.dir)
+    count = len(list(fixtures_dir.glob("*.json")))
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(fixtures_dir, args.latency))
+    print(f"Serving {count} recorded responses on http://{args.host}:{args.port}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
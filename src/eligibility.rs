@@ -0,0 +1,270 @@
+//! Index d'éligibilité compact du catalogue.
+//!
+//! Une entrée par exercice, triée par catégorie (ordre de `Category`) : les
+//! exercices d'une catégorie forment une tranche contiguë `offsets[c]..offsets[c + 1]`.
+//! Chaque entrée porte un masque de contre-indications, une difficulté et des
+//! drapeaux ; tester l'éligibilité revient à trois opérations bit à bit, et
+//! choisir un exercice ne parcourt que la tranche de sa catégorie, sans allocation.
+//!
+//! Produit par scripts/build_bundle.py (section `planner` de catalog.json),
+//! ou reconstruit à partir d'une liste d'exercices (`from_exercises`).
+
+use std::ops::Range;
+
+use serde::{Deserialize, Serialize};
+
+use crate::exercise::{Category, Contraindication, Exercise, CATEGORY_COUNT};
+use crate::profile::Profile;
+
+pub const FLAG_EQUIPMENT: u8 = 1 << 0;
+pub const FLAG_POSTPARTUM_ONLY: u8 = 1 << 1;
+pub const FLAG_TIMED: u8 = 1 << 2;
+pub const FLAG_REQUIRES_ANCHOR: u8 = 1 << 3;
+
+#[derive(Debug, Clone, Default, Serialize, Deserialize)]
+pub struct PackedCatalog {
+    /// Contre-indication de chaque bit de `mask` (doit suivre `Contraindication::ALL`)
+    pub contraindications: Vec<Contraindication>,
+    /// Début de chaque tranche de catégorie, puis le nombre total d'exercices
+    pub offsets: [u32; CATEGORY_COUNT + 1],
+    pub ids: Vec<String>,
+    pub mask: Vec<u16>,
+    pub difficulty: Vec<u8>,
+    pub flags: Vec<u8>,
+    /// Durée d'une série (exercices en temps)
+    pub duration_s: Vec<u32>,
+}
+
+/// Règles d'éligibilité d'un profil, réduites à des masques.
+#[derive(Debug, Clone, Copy)]
+pub struct Eligibility {
+    forbidden: u16,
+    excluded_flags: u8,
+    max_difficulty: u8,
+}
+
+impl Eligibility {
+    pub fn for_profile(profile: &Profile) -> Self {
+        let forbidden = profile
+            .all_contraindications()
+            .iter()
+            .fold(0, |mask, c| mask | c.bit());
+        let mut excluded_flags = FLAG_EQUIPMENT;
+        // Les exercices post-partum uniquement sont exclus des autres profils
+        if !profile.is_postpartum {
+            excluded_flags |= FLAG_POSTPARTUM_ONLY;
+        }
+        if !profile.has_anchor {
+            excluded_flags |= FLAG_REQUIRES_ANCHOR;
+        }
+        Self {
+            forbidden,
+            excluded_flags,
+            max_difficulty: profile.max_difficulty(),
+        }
+    }
+}
+
+impl PackedCatalog {
+    /// Construit l'index à partir d'exercices dans n'importe quel ordre ;
+    /// l'ordre relatif au sein d'une catégorie est conservé.
+    pub fn from_exercises(exercises: &[Exercise]) -> Self {
+        let mut order: Vec<&Exercise> = exercises.iter().collect();
+        order.sort_by_key(|e| e.category.index());
+
+        let mut packed = PackedCatalog {
+            contraindications: Contraindication::ALL.to_vec(),
+            ..Default::default()
+        };
+        for e in &order {
+            let mut flags = 0;
+            if e.equipment_required {
+                flags |= FLAG_EQUIPMENT;
+            }
+            if e.postpartum_only {
+                flags |= FLAG_POSTPARTUM_ONLY;
+            }
+            if e.movement_pattern.is_timed() {
+                flags |= FLAG_TIMED;
+            }
+            if e.requires_anchor {
+                flags |= FLAG_REQUIRES_ANCHOR;
+            }
+            packed.ids.push(e.id.clone());
+            packed.mask.push(e.contraindications.iter().fold(0, |m, c| m | c.bit()));
+            packed.difficulty.push(e.difficulty);
+            packed.flags.push(flags);
+            packed.duration_s.push(e.duration_s);
+            packed.offsets[e.category.index() + 1] += 1;
+        }
+        for c in 0..CATEGORY_COUNT {
+            packed.offsets[c + 1] += packed.offsets[c];
+        }
+        packed
+    }
+
+    /// Vérifie la cohérence d'un index désérialisé (longueurs, tranches, ordre des bits).
+    pub fn validate(&self) -> Result<(), String> {
+        for (i, c) in self.contraindications.iter().enumerate() {
+            if c.bit() != 1 << i {
+                return Err(format!("contraindication bit {i} is {c:?}, expected {:?}", Contraindication::ALL.get(i)));
+            }
+        }
+        let n = self.ids.len();
+        if self.mask.len() != n || self.difficulty.len() != n || self.flags.len() != n || self.duration_s.len() != n {
+            return Err(format!("column lengths differ from {n} ids"));
+        }
+        if self.offsets[0] != 0 || self.offsets[CATEGORY_COUNT] as usize != n {
+            return Err(format!("offsets {:?} do not span {n} exercises", self.offsets));
+        }
+        if self.offsets.windows(2).any(|w| w[0] > w[1]) {
+            return Err(format!("offsets {:?} are not sorted", self.offsets));
+        }
+        Ok(())
+    }
+
+    pub fn len(&self) -> usize {
+        self.ids.len()
+    }
+
+    pub fn is_empty(&self) -> bool {
+        self.ids.is_empty()
+    }
+
+    pub fn category_range(&self, category: &Category) -> Range<usize> {
+        let c = category.index();
+        self.offsets[c] as usize..self.offsets[c + 1] as usize
+    }
+
+    #[inline]
+    pub fn is_eligible(&self, i: usize, rules: &Eligibility) -> bool {
+        self.mask[i] & rules.forbidden == 0
+            && self.flags[i] & rules.excluded_flags == 0
+            && self.difficulty[i] <= rules.max_difficulty
+    }
+
+    pub fn is_timed(&self, i: usize) -> bool {
+        self.flags[i] & FLAG_TIMED != 0
+    }
+
+    /// Le `seed % n`-ième des `n` exercices éligibles de la catégorie.
+    pub fn pick(&self, category: &Category, rules: &Eligibility, seed: usize) -> Option<usize> {
+        let range = self.category_range(category);
+        let count = range.clone().filter(|&i| self.is_eligible(i, rules)).count();
+        if count == 0 {
+            return None;
+        }
+        range.filter(|&i| self.is_eligible(i, rules)).nth(seed % count)
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+    use crate::exercise::MovementPattern;
+    use crate::profile::{AgeBracket, FitnessLevel, Lang, Sex};
+
+    fn make_exercise(id: &str, category: Category, contraindications: Vec<Contraindication>) -> Exercise {
+        Exercise {
+            id: id.to_string(),
+            name_fr: String::new(),
+            name_en: String::new(),
+            category,
+            movement_pattern: MovementPattern::Mobility,
+            difficulty: 1,
+            duration_s: 40,
+            equipment_required: false,
+            postpartum_only: false,
+            contraindications,
+            instructions_fr: String::new(),
+            instructions_en: String::new(),
+            requires_anchor: false,
+        }
+    }
+
+    fn make_profile(injuries: Vec<Contraindication>) -> Profile {
+        Profile {
+            sex: Sex::Female,
+            age_bracket: AgeBracket::Under35,
+            fitness_level: FitnessLevel::Beginner,
+            workout_days: vec![0, 2, 4],
+            minutes_per_session: 30,
+            is_postpartum: false,
+            injury_notes: injuries,
+            has_anchor: false,
+            lang: Lang::Fr,
+            disclaimer_accepted_at: None,
+        }
+    }
+
+    fn catalog() -> Vec<Exercise> {
+        vec![
+            make_exercise("mob_1", Category::Mobility, vec![]),
+            make_exercise("push_1", Category::Push, vec![Contraindication::Wrist]),
+            make_exercise("core_1", Category::Core, vec![]),
+            make_exercise("push_2", Category::Push, vec![]),
+        ]
+    }
+
+    #[test]
+    fn from_exercises_groups_by_category_keeping_order() {
+        let packed = PackedCatalog::from_exercises(&catalog());
+        assert_eq!(packed.ids, vec!["push_1", "push_2", "core_1", "mob_1"]);
+        assert_eq!(packed.category_range(&Category::Push), 0..2);
+        assert_eq!(packed.category_range(&Category::Pull), 2..2);
+        assert_eq!(packed.category_range(&Category::Mobility), 3..4);
+        assert!(packed.validate().is_ok());
+    }
+
+    #[test]
+    fn flags_and_masks_are_packed() {
+        let mut exercises = catalog();
+        exercises[0].requires_anchor = true;
+        let packed = PackedCatalog::from_exercises(&exercises);
+        assert_eq!(packed.mask[0], Contraindication::Wrist.bit());
+        assert!(packed.is_timed(3));
+        assert_eq!(packed.flags[3] & FLAG_REQUIRES_ANCHOR, FLAG_REQUIRES_ANCHOR);
+    }
+
+    #[test]
+    fn pick_skips_ineligible_exercises() {
+        let packed = PackedCatalog::from_exercises(&catalog());
+        let rules = Eligibility::for_profile(&make_profile(vec![Contraindication::Wrist]));
+        for seed in 0..4 {
+            assert_eq!(packed.pick(&Category::Push, &rules, seed), Some(1));
+        }
+        assert_eq!(packed.pick(&Category::Pull, &rules, 0), None);
+    }
+
+    #[test]
+    fn pick_cycles_through_eligible_exercises() {
+        let packed = PackedCatalog::from_exercises(&catalog());
+        let rules = Eligibility::for_profile(&make_profile(vec![]));
+        assert_eq!(packed.pick(&Category::Push, &rules, 0), Some(0));
+        assert_eq!(packed.pick(&Category::Push, &rules, 1), Some(1));
+        assert_eq!(packed.pick(&Category::Push, &rules, 2), Some(0));
+    }
+
+    #[test]
+    fn anchor_exercises_need_an_anchor() {
+        let mut exercises = catalog();
+        exercises[3].requires_anchor = true; // push_2
+        let packed = PackedCatalog::from_exercises(&exercises);
+        let mut profile = make_profile(vec![]);
+        let rules = Eligibility::for_profile(&profile);
+        assert!(!packed.is_eligible(1, &rules));
+        profile.has_anchor = true;
+        assert!(packed.is_eligible(1, &Eligibility::for_profile(&profile)));
+    }
+
+    #[test]
+    fn validate_rejects_inconsistent_index() {
+        let mut packed = PackedCatalog::from_exercises(&catalog());
+        packed.offsets[CATEGORY_COUNT] = 99;
+        assert!(packed.validate().is_err());
+
+        let mut packed = PackedCatalog::from_exercises(&catalog());
+        packed.contraindications.swap(0, 1);
+        assert!(packed.validate().is_err());
+    }
+}
@@ -11,6 +11,17 @@ pub enum Category {
     Mobility,
 }
 
+/// Nombre de variantes de `Category` (tranches de l'index d'éligibilité)
+pub const CATEGORY_COUNT: usize = 6;
+
+impl Category {
+    /// Position dans l'ordre de déclaration, qui est aussi l'ordre des
+    /// tranches de `PackedCatalog` (scripts/build_bundle.py le lit ici).
+    pub fn index(&self) -> usize {
+        self.clone() as usize
+    }
+}
+
 #[derive(Debug, Clone, Serialize, Deserialize, PartialEq)]
 #[serde(rename_all = "snake_case")]
 pub enum MovementPattern {
@@ -28,6 +39,21 @@ pub enum MovementPattern {
     PelvicFloor,
 }
 
+impl MovementPattern {
+    /// Les exercices isométriques / mobilité sont affichés en temps,
+    /// les exercices dynamiques en répétitions.
+    pub fn is_timed(&self) -> bool {
+        matches!(
+            self,
+            MovementPattern::CoreAntiExtension
+                | MovementPattern::CoreAntiRotation
+                | MovementPattern::CoreFlexion
+                | MovementPattern::PelvicFloor
+                | MovementPattern::Mobility
+        )
+    }
+}
+
 #[derive(Debug, Clone, Serialize, Deserialize, PartialEq)]
 #[serde(rename_all = "snake_case")]
 pub enum Contraindication {
@@ -43,10 +69,34 @@ pub enum Contraindication {
     Unknown,
 }
 
+impl Contraindication {
+    /// Toutes les variantes, dans l'ordre de déclaration (= ordre des bits)
+    pub const ALL: [Contraindication; 9] = [
+        Contraindication::Postpartum,
+        Contraindication::Back,
+        Contraindication::LowerBack,
+        Contraindication::Knee,
+        Contraindication::Hip,
+        Contraindication::Shoulder,
+        Contraindication::Wrist,
+        Contraindication::DiastasisRecti,
+        Contraindication::Unknown,
+    ];
+
+    /// Bit de la contre-indication dans les masques de `PackedCatalog`
+    pub fn bit(&self) -> u16 {
+        1 << (self.clone() as u16)
+    }
+}
+
 #[derive(Debug, Clone, Serialize, Deserialize)]
 pub struct Exercise {
     pub id: String,
+    /// Textes affichés : absents du JSON envoyé par la PWA, qui ne transmet
+    /// que les champs structurels (les noms vivent dans web/locales/exercises.<lang>.json)
+    #[serde(default)]
     pub name_fr: String,
+    #[serde(default)]
     pub name_en: String,
     pub category: Category,
     pub movement_pattern: MovementPattern,
@@ -58,8 +108,13 @@ pub struct Exercise {
     /// Si true : exercice inclus uniquement pour les profils post-partum
     pub postpartum_only: bool,
     pub contraindications: Vec<Contraindication>,
+    #[serde(default)]
     pub instructions_fr: String,
+    #[serde(default)]
     pub instructions_en: String,
+    /// Nécessite un point d'ancrage (porte, barre) : exclu si le profil n'en a pas
+    #[serde(default)]
+    pub requires_anchor: bool,
 }
 
 impl Exercise {
@@ -95,6 +150,7 @@ mod tests {
             contraindications,
             instructions_fr: String::new(),
             instructions_en: String::new(),
+            requires_anchor: false,
         }
     }
 
@@ -140,6 +196,19 @@ mod tests {
         assert!(ex.is_suitable_for_difficulty(3));
     }
 
+    #[test]
+    fn contraindication_bits_follow_declaration_order() {
+        for (i, c) in Contraindication::ALL.iter().enumerate() {
+            assert_eq!(c.bit(), 1 << i);
+        }
+    }
+
+    #[test]
+    fn category_index_follows_declaration_order() {
+        assert_eq!(Category::Push.index(), 0);
+        assert_eq!(Category::Mobility.index(), CATEGORY_COUNT - 1);
+    }
+
     #[test]
     fn multiple_contraindications_any_match_blocks() {
         let ex = make_exercise(vec![Contraindication::Knee, Contraindication::Wrist], 1);
@@ -1,8 +1,10 @@
+mod eligibility;
 mod exercise;
 mod profile;
 mod program;
 mod session;
 
+pub use eligibility::PackedCatalog;
 pub use exercise::Exercise;
 pub use profile::Profile;
 pub use program::ProgramBuilder;
@@ -39,6 +41,45 @@ pub fn build_session(
         .map_err(|e| JsValue::from_str(&e))
 }
 
+/// Générateur de séances sur l'index compact du catalogue (section `planner`
+/// de catalog.json), parsé une seule fois : chaque séance ne coûte ensuite que
+/// le parse du profil et quelques opérations bit à bit par exercice.
+#[wasm_bindgen]
+pub struct Planner {
+    catalog: eligibility::PackedCatalog,
+}
+
+impl Planner {
+    pub fn from_json(catalog_json: &str) -> Result<Planner, String> {
+        let catalog: eligibility::PackedCatalog = serde_json::from_str(catalog_json)
+            .map_err(|e| format!("Catalog parse error: {e}"))?;
+        catalog.validate().map_err(|e| format!("Catalog index error: {e}"))?;
+        Ok(Planner { catalog })
+    }
+
+    pub fn build_session_inner(&self, profile_json: &str, day_seed: u32) -> Result<String, String> {
+        let profile: profile::Profile = serde_json::from_str(profile_json)
+            .map_err(|e| format!("Profile parse error: {e}"))?;
+
+        let plan = program::ProgramBuilder::with_catalog(&profile, &self.catalog).build_session(day_seed);
+
+        serde_json::to_string(&plan).map_err(|e| format!("Serialize error: {e}"))
+    }
+}
+
+#[wasm_bindgen]
+impl Planner {
+    #[wasm_bindgen(constructor)]
+    pub fn new(catalog_json: &str) -> Result<Planner, JsValue> {
+        Planner::from_json(catalog_json).map_err(|e| JsValue::from_str(&e))
+    }
+
+    pub fn build_session(&self, profile_json: &str, day_seed: u32) -> Result<String, JsValue> {
+        self.build_session_inner(profile_json, day_seed)
+            .map_err(|e| JsValue::from_str(&e))
+    }
+}
+
 #[cfg(test)]
 mod tests {
     use super::*;
@@ -107,6 +148,44 @@ mod tests {
         assert!(result.is_err());
     }
 
+    #[test]
+    fn build_session_accepts_structural_fields_only() {
+        let exercises = r#"[{
+            "id": "push_1",
+            "category": "push",
+            "movement_pattern": "horizontal_push",
+            "difficulty": 1,
+            "duration_s": 30,
+            "equipment_required": false,
+            "postpartum_only": false,
+            "contraindications": []
+        }]"#;
+        let json = build_session_inner(PROFILE_JSON, exercises, 0).unwrap();
+        assert!(json.contains("push_1"));
+    }
+
+    #[test]
+    fn planner_matches_build_session() {
+        let exercises: Vec<Exercise> = serde_json::from_str(EXERCISES_JSON).unwrap();
+        let packed = serde_json::to_string(&PackedCatalog::from_exercises(&exercises)).unwrap();
+        let planner = Planner::from_json(&packed).unwrap();
+        for seed in 0..5 {
+            assert_eq!(
+                planner.build_session_inner(PROFILE_JSON, seed).unwrap(),
+                build_session_inner(PROFILE_JSON, EXERCISES_JSON, seed).unwrap()
+            );
+        }
+    }
+
+    #[test]
+    fn planner_rejects_inconsistent_catalog() {
+        let exercises: Vec<Exercise> = serde_json::from_str(EXERCISES_JSON).unwrap();
+        let mut packed = PackedCatalog::from_exercises(&exercises);
+        packed.difficulty.pop();
+        let json = serde_json::to_string(&packed).unwrap();
+        assert!(Planner::from_json(&json).is_err());
+    }
+
     #[test]
     fn build_session_empty_exercises_returns_empty_plan() {
         let result = build_session_inner(PROFILE_JSON, "[]", 0);
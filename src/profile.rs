@@ -49,6 +49,9 @@ pub struct Profile {
     pub minutes_per_session: u8,
     pub is_postpartum: bool,
     pub injury_notes: Vec<Contraindication>,
+    /// Point d'ancrage disponible (porte, barre) pour les exercices `requires_anchor`
+    #[serde(default)]
+    pub has_anchor: bool,
     pub lang: Lang,
     pub disclaimer_accepted_at: Option<String>,
 }
@@ -116,6 +119,7 @@ mod tests {
             minutes_per_session: 30,
             is_postpartum: postpartum,
             injury_notes: vec![],
+            has_anchor: false,
             lang: Lang::Fr,
             disclaimer_accepted_at: None,
         }
@@ -1,4 +1,7 @@
-use crate::exercise::{Category, Exercise, MovementPattern};
+use std::borrow::Cow;
+
+use crate::eligibility::{Eligibility, PackedCatalog};
+use crate::exercise::{Category, Exercise};
 use crate::profile::Profile;
 use crate::session::{SessionExercise, SessionPlan};
 
@@ -9,12 +12,23 @@ const INTERMEDIATE_REST_S: u32 = 45;
 
 pub struct ProgramBuilder<'a> {
     profile: &'a Profile,
-    exercises: &'a [Exercise],
+    catalog: Cow<'a, PackedCatalog>,
 }
 
 impl<'a> ProgramBuilder<'a> {
-    pub fn new(profile: &'a Profile, exercises: &'a [Exercise]) -> Self {
-        Self { profile, exercises }
+    pub fn new(profile: &'a Profile, exercises: &[Exercise]) -> Self {
+        Self {
+            profile,
+            catalog: Cow::Owned(PackedCatalog::from_exercises(exercises)),
+        }
+    }
+
+    /// Réutilise un index déjà construit (chargé une fois depuis catalog.json).
+    pub fn with_catalog(profile: &'a Profile, catalog: &'a PackedCatalog) -> Self {
+        Self {
+            profile,
+            catalog: Cow::Borrowed(catalog),
+        }
     }
 
     /// Génère une séance adaptée au profil.
@@ -22,26 +36,9 @@ impl<'a> ProgramBuilder<'a> {
     /// (utiliser le numéro de jour : `Date.now() / 86_400_000 | 0` côté JS).
     pub fn build_session(&self, day_seed: u32) -> SessionPlan {
         let budget_s = self.profile.minutes_per_session as u32 * 60;
-        let contraindications = self.profile.all_contraindications();
-        let max_difficulty = self.profile.max_difficulty();
+        let rules = Eligibility::for_profile(self.profile);
         let is_postpartum = self.profile.is_postpartum;
 
-        let eligible: Vec<&Exercise> = self
-            .exercises
-            .iter()
-            .filter(|e| !e.equipment_required)
-            .filter(|e| {
-                // Les exercices post-partum uniquement sont exclus des autres profils
-                if e.postpartum_only {
-                    is_postpartum
-                } else {
-                    true
-                }
-            })
-            .filter(|e| e.is_suitable_for_contraindications(&contraindications))
-            .filter(|e| e.is_suitable_for_difficulty(max_difficulty))
-            .collect();
-
         let (sets, rest_s) = self.sets_and_rest();
         let seed = day_seed as usize;
 
@@ -75,23 +72,14 @@ impl<'a> ProgramBuilder<'a> {
                 break;
             }
 
-            if let Some(exercise) = self.pick_from_category(&eligible, category, seed) {
-                // Les exercices isométriques / mobilité sont affichés en temps,
-                // les exercices dynamiques en répétitions.
-                let is_timed = matches!(
-                    exercise.movement_pattern,
-                    MovementPattern::CoreAntiExtension
-                        | MovementPattern::CoreAntiRotation
-                        | MovementPattern::CoreFlexion
-                        | MovementPattern::PelvicFloor
-                        | MovementPattern::Mobility
-                );
+            if let Some(i) = self.catalog.pick(category, &rules, seed) {
+                let is_timed = self.catalog.is_timed(i);
 
                 let candidate = SessionExercise {
-                    exercise_id: exercise.id.clone(),
+                    exercise_id: self.catalog.ids[i].clone(),
                     sets,
                     reps: if is_timed { None } else { Some(self.reps_per_set()) },
-                    duration_s: if is_timed { Some(exercise.duration_s) } else { None },
+                    duration_s: if is_timed { Some(self.catalog.duration_s[i]) } else { None },
                     rest_s,
                 };
 
@@ -123,25 +111,6 @@ impl<'a> ProgramBuilder<'a> {
             FitnessLevel::Intermediate => 12,
         }
     }
-
-    fn pick_from_category<'b>(
-        &self,
-        eligible: &[&'b Exercise],
-        category: &Category,
-        seed: usize,
-    ) -> Option<&'b Exercise> {
-        let matching: Vec<&Exercise> = eligible
-            .iter()
-            .filter(|e| &e.category == category)
-            .copied()
-            .collect();
-
-        if matching.is_empty() {
-            return None;
-        }
-
-        Some(matching[seed % matching.len()])
-    }
 }
 
 #[cfg(test)]
@@ -170,6 +139,7 @@ mod tests {
             contraindications,
             instructions_fr: String::new(),
             instructions_en: String::new(),
+            requires_anchor: false,
         }
     }
 
@@ -182,6 +152,7 @@ mod tests {
             minutes_per_session: minutes,
             is_postpartum: postpartum,
             injury_notes: vec![],
+            has_anchor: false,
             lang: Lang::Fr,
             disclaimer_accepted_at: Some("2026-01-01".to_string()),
         }
@@ -325,6 +296,20 @@ mod tests {
         }
     }
 
+    #[test]
+    fn shared_catalog_gives_same_plan_as_exercise_list() {
+        let profile = make_profile(FitnessLevel::Beginner, 30, true);
+        let catalog = full_catalog();
+        let packed = PackedCatalog::from_exercises(&catalog);
+        for seed in 0..10 {
+            let a = ProgramBuilder::new(&profile, &catalog).build_session(seed);
+            let b = ProgramBuilder::with_catalog(&profile, &packed).build_session(seed);
+            let ids_a: Vec<&str> = a.exercises.iter().map(|e| e.exercise_id.as_str()).collect();
+            let ids_b: Vec<&str> = b.exercises.iter().map(|e| e.exercise_id.as_str()).collect();
+            assert_eq!(ids_a, ids_b);
+        }
+    }
+
     #[test]
     fn very_short_session_may_be_empty_if_no_exercise_fits() {
         let profile = make_profile(FitnessLevel::Beginner, 1, false); // 1 minute
@@ -333,4 +318,56 @@ mod tests {
         let plan = ProgramBuilder::new(&profile, &catalog).build_session(0);
         assert!(plan.is_empty(), "Aucun exercice ne tient dans 1 minute");
     }
+
+    /// Imprime sur une ligne `FIXTURE_PLANS {json}` les plans de full_catalog() et du
+    /// catalogue livré (web/data/catalog.json) sur une grille de profils ; relu par
+    /// `scripts/simulate_sessions.py --check` :
+    /// cargo test --lib program::tests::emit_fixture_plans -- --exact --nocapture
+    #[test]
+    fn emit_fixture_plans() {
+        let bundle: serde_json::Value =
+            serde_json::from_str(include_str!("../web/data/catalog.json")).unwrap();
+        let shipped: PackedCatalog = serde_json::from_value(bundle["planner"].clone()).unwrap();
+        shipped.validate().unwrap();
+        let full = full_catalog();
+
+        let mut cases = Vec::new();
+        for catalog in ["full", "catalog"] {
+            for level in [FitnessLevel::Beginner, FitnessLevel::Intermediate] {
+                for age in [AgeBracket::Under35, AgeBracket::Age3544, AgeBracket::Age45Plus] {
+                    for postpartum in [false, true] {
+                        for injuries in [
+                            vec![],
+                            vec![Contraindication::Knee, Contraindication::Wrist],
+                            vec![Contraindication::LowerBack, Contraindication::Shoulder],
+                        ] {
+                            for has_anchor in [false, true] {
+                                for minutes in [1, 15, 30, 60] {
+                                    let mut profile = make_profile(level.clone(), minutes, postpartum);
+                                    profile.age_bracket = age.clone();
+                                    profile.injury_notes = injuries.clone();
+                                    profile.has_anchor = has_anchor;
+                                    for day_seed in 0..6 {
+                                        let plan = match catalog {
+                                            "full" => ProgramBuilder::new(&profile, &full),
+                                            _ => ProgramBuilder::with_catalog(&profile, &shipped),
+                                        }
+                                        .build_session(day_seed);
+                                        cases.push(serde_json::json!({
+                                            "catalog": catalog,
+                                            "profile": profile,
+                                            "day_seed": day_seed,
+                                            "plan": plan.exercises,
+                                        }));
+                                    }
+                                }
+                            }
+                        }
+                    }
+                }
+            }
+        }
+        let fixtures = serde_json::json!({ "catalogs": { "full": full }, "cases": cases });
+        println!("FIXTURE_PLANS {fixtures}");
+    }
 }
@@ -0,0 +1,169 @@
+/**
+ * tests/js/catalog.test.mjs
+ * Tests unitaires pour decodeCatalog (Node.js built-in test runner)
+ *
+ * Exécuter : node --test tests/js/catalog.test.mjs
+ *
+ * Le décodage du bundle compilé (scripts/build_bundle.py) doit redonner
+ * exactement les enregistrements de web/data/exercises/*.json, sans les
+ * textes de l'autre langue (les champs null sont omis, comme absents).
+ */
+import { test, describe } from 'node:test';
+import assert from 'node:assert/strict';
+import { readFileSync, readdirSync } from 'node:fs';
+import { decodeCatalog, nextUnmastered, thumbStyle } from '../../web/js/catalog.js';
+
+const WEB = new URL('../../web/', import.meta.url);
+const readJson = (path) => JSON.parse(readFileSync(new URL(path, WEB), 'utf-8'));
+
+const bundle = readJson('data/catalog.json');
+const strings = { fr: readJson('locales/exercises.fr.json'), en: readJson('locales/exercises.en.json') };
+const source = readdirSync(new URL('data/exercises/', WEB))
+  .filter((f) => f.endsWith('.json'))
+  .sort()
+  .flatMap((f) => readJson(`data/exercises/${f}`));
+
+const OTHER = { fr: 'en', en: 'fr' };
+const withoutNulls = (ex) => Object.fromEntries(Object.entries(ex).filter(([, v]) => v !== null));
+
+describe('decodeCatalog — bundle à jour', () => {
+  test('même nombre d\'exercices que les sources', () => {
+    assert.equal(bundle.rows.length, source.length);
+  });
+
+  test('tables de textes liées au même hash', () => {
+    assert.equal(strings.fr.hash, bundle.hash);
+    assert.equal(strings.en.hash, bundle.hash);
+  });
+
+  test('index planner : tranches par catégorie couvrant tout le catalogue', () => {
+    const { offsets, ids, mask, difficulty, flags, duration_s } = bundle.planner;
+    const categories = ['push', 'pull', 'squat', 'hinge', 'core', 'mobility']; // ordre de Category
+    assert.equal(offsets.at(-1), source.length);
+    for (const column of [mask, difficulty, flags, duration_s]) assert.equal(column.length, ids.length);
+    categories.forEach((category, c) => {
+      const slice = ids.slice(offsets[c], offsets[c + 1]);
+      const expected = source.filter((ex) => ex.category === category).map((ex) => ex.id);
+      assert.deepEqual(slice, expected, category);
+    });
+  });
+
+  test('index planner : masque de contre-indications', () => {
+    const { contraindications, ids, mask } = bundle.planner;
+    const byId = Object.fromEntries(source.map((ex) => [ex.id, ex]));
+    ids.forEach((id, i) => {
+      const expected = byId[id].contraindications.reduce((m, c) => m | (1 << contraindications.indexOf(c)), 0);
+      assert.equal(mask[i], expected, id);
+    });
+  });
+
+  test('aucun texte dans le bundle structurel', () => {
+    assert.ok(!bundle.fields.some((f) => /^(name|instructions)_/.test(f)));
+  });
+
+  test('index id → ligne cohérent', () => {
+    source.forEach((ex, i) => assert.equal(bundle.index[ex.id], i));
+  });
+
+  test('chaque exercice illustré a un aperçu WebP minuscule (optimize_images.py)', () => {
+    for (const ex of source.filter((e) => e.image_url)) {
+      assert.match(ex.image_placeholder ?? '', /^data:image\/webp;base64,[A-Za-z0-9+/]+=*$/, ex.id);
+      assert.ok(ex.image_placeholder.length < 400, `${ex.id} : ${ex.image_placeholder.length} o`);
+    }
+  });
+});
+
+for (const lang of ['fr', 'en']) {
+  describe(`decodeCatalog — ${lang}`, () => {
+    const decoded = decodeCatalog(bundle, strings[lang], lang);
+
+    test('champs structurels et textes de la langue identiques aux sources', () => {
+      decoded.forEach((ex, i) => {
+        const expected = withoutNulls(source[i]);
+        delete expected[`name_${OTHER[lang]}`];
+        delete expected[`instructions_${OTHER[lang]}`];
+        assert.deepEqual(ex, expected);
+      });
+    });
+
+  });
+}
+
+describe('decodeCatalog — table de textes absente ou incomplète', () => {
+  test('sans table : nom = id, consignes vides', () => {
+    const [ex] = decodeCatalog(bundle, null, 'fr');
+    assert.equal(ex.name_fr, ex.id);
+    assert.equal(ex.instructions_fr, '');
+  });
+
+  test('id absent de la table : nom = id, les autres gardent leur texte', () => {
+    const [first, second] = source;
+    const partial = { ...strings.fr, exercises: { [second.id]: strings.fr.exercises[second.id] } };
+    const decoded = decodeCatalog(bundle, partial, 'fr');
+    assert.equal(decoded[0].name_fr, first.id);
+    assert.equal(decoded[1].name_fr, second.name_fr);
+  });
+});
+
+describe('nextUnmastered — chaînes précalculées', () => {
+  const decoded = decodeCatalog(bundle, strings.fr, 'fr');
+  const byId = Object.fromEntries(decoded.map((ex) => [ex.id, ex]));
+
+  // Référence : parcours de progression_to tant que l'exercice est maîtrisé
+  const walk = (id, mastered) => {
+    while (byId[id].progression_to && mastered.has(id)) id = byId[id].progression_to;
+    return id;
+  };
+
+  test('non maîtrisé : inchangé', () => {
+    assert.equal(nextUnmastered(byId.push_knee, new Set()), 'push_knee');
+  });
+
+  test('maîtrisé : premier échelon non maîtrisé', () => {
+    const mastered = new Set(['push_knee', 'push_standard']);
+    assert.equal(nextUnmastered(byId.push_knee, mastered), 'push_close');
+  });
+
+  test('toute la chaîne maîtrisée : sommet', () => {
+    const ex = byId.push_knee;
+    const mastered = new Set([ex.id, ...ex.progression_path]);
+    assert.equal(nextUnmastered(ex, mastered), ex.ladder);
+  });
+
+  test('identique au parcours de progression_to pour chaque exercice', () => {
+    for (const ex of decoded) {
+      const mastered = new Set([ex.id, ...ex.progression_path.slice(0, 1)]);
+      assert.equal(nextUnmastered(ex, mastered), walk(ex.id, mastered), ex.id);
+    }
+  });
+});
+
+describe('thumbStyle — atlas de vignettes', () => {
+  const thumbs = {
+    cell: 96,
+    sheets: [{ url: '/icons/atlas/thumbs-0.abc.webp', width: 1152, height: 192 }],
+    thumbs: { push_knee: [0, 192, 96] },
+  };
+
+  test('position et taille mises à l\'échelle de l\'affichage', () => {
+    assert.equal(
+      thumbStyle(thumbs, 'push_knee', 48),
+      'width:48px;height:48px;background-image:url(/icons/atlas/thumbs-0.abc.webp);'
+        + 'background-position:-96px -48px;background-size:576px 96px',
+    );
+  });
+
+  test('exercice absent ou atlas non construit : chaîne vide', () => {
+    assert.equal(thumbStyle(thumbs, 'inconnu', 48), '');
+    assert.equal(thumbStyle(null, 'push_knee', 48), '');
+  });
+
+  test('chaque exercice du bundle a une vignette dans une planche', () => {
+    if (!bundle.thumbs) return;
+    for (const ex of source) {
+      const [sheet, x, y] = bundle.thumbs.thumbs[ex.id];
+      const { width, height } = bundle.thumbs.sheets[sheet];
+      assert.ok(x + bundle.thumbs.cell <= width && y + bundle.thumbs.cell <= height, ex.id);
+    }
+  });
+});
@@ -0,0 +1,160 @@
+/**
+ * tests/js/service-worker.test.mjs
+ * Tests du précache révisionné de web/service-worker.js (Node.js built-in test runner)
+ *
+ * Exécuter : node --test tests/js/service-worker.test.mjs
+ *
+ * Le worker est évalué dans un contexte vm avec des fausses Cache Storage et
+ * fetch : une mise à jour ne doit télécharger que les fichiers dont la
+ * révision a changé (manifeste généré par scripts/build_precache.py), et
+ * l'activation ne garder que les illustrations référencées par catalog.json.
+ */
+import { test, describe } from 'node:test';
+import assert from 'node:assert/strict';
+import { readFileSync } from 'node:fs';
+import vm from 'node:vm';
+
+const ORIGIN = 'https://oops.test';
+const SOURCE = readFileSync(new URL('../../web/service-worker.js', import.meta.url), 'utf-8');
+const CATALOG = JSON.parse(readFileSync(new URL('../../web/data/catalog.json', import.meta.url), 'utf-8'));
+
+class FakeCache {
+  constructor() { this.entries = new Map(); }
+  href(key) { return new URL(typeof key === 'string' ? key : key.url, ORIGIN).href; }
+  async match(key) { return this.entries.get(this.href(key)); }
+  async put(key, response) { this.entries.set(this.href(key), response); }
+  async delete(key) { return this.entries.delete(this.href(key)); }
+  async keys() { return [...this.entries.keys()].map((url) => ({ url })); }
+}
+
+class FakeCacheStorage {
+  constructor() { this.caches = new Map(); }
+  async open(name) {
+    if (!this.caches.has(name)) this.caches.set(name, new FakeCache());
+    return this.caches.get(name);
+  }
+  async keys() { return [...this.caches.keys()]; }
+  async has(name) { return this.caches.has(name); }
+  async delete(name) { return this.caches.delete(name); }
+  async match(key) {
+    for (const cache of this.caches.values()) {
+      const hit = await cache.match(key);
+      if (hit) return hit;
+    }
+    return undefined;
+  }
+}
+
+/** Évalue le worker ; renvoie ses handlers et la liste des URL téléchargées. */
+function loadWorker(source, caches) {
+  const handlers = {};
+  const fetched = [];
+  const self = {
+    location: { origin: ORIGIN },
+    addEventListener: (type, fn) => { handlers[type] = fn; },
+    skipWaiting: async () => {},
+    clients: { claim: async () => {} },
+  };
+  const fetch = async (url) => {
+    fetched.push(typeof url === 'string' ? url : url.url);
+    const response = {
+      ok: true,
+      body: url,
+      json: async () => (url === '/data/catalog.json' ? CATALOG : {}),
+      clone: () => response,
+    };
+    return response;
+  };
+  vm.runInNewContext(source, { self, caches, fetch, URL, Map, Set, Promise });
+  const run = async (type, event = {}) => {
+    let done;
+    handlers[type]({ ...event, waitUntil: (p) => { done = p; }, respondWith: (p) => { done = p; } });
+    return done;
+  };
+  return { run, fetched };
+}
+
+const manifest = [...SOURCE.matchAll(/\{ url: '([^']+)', revision: (?:'([^']+)'|null) \}/g)]
+  .map(([, url, revision]) => ({ url, revision: revision ?? null }));
+const revisioned = manifest.filter((e) => e.revision);
+
+describe('service worker — précache révisionné', () => {
+  test('le manifeste généré est présent et sans doublon', () => {
+    assert.ok(revisioned.length > 10);
+    assert.equal(new Set(manifest.map((e) => e.url)).size, manifest.length);
+    assert.ok(manifest.some((e) => e.url === '/index.html'));
+  });
+
+  test('première installation : tout est téléchargé', async () => {
+    const caches = new FakeCacheStorage();
+    const sw = loadWorker(SOURCE, caches);
+    await sw.run('install');
+    assert.equal(sw.fetched.length, manifest.length);
+  });
+
+  test('mise à jour : seuls les fichiers modifiés sont re-téléchargés', async () => {
+    const caches = new FakeCacheStorage();
+    const v1 = loadWorker(SOURCE, caches);
+    await v1.run('install');
+    await v1.run('activate');
+
+    const changed = revisioned[0];
+    const v2 = loadWorker(SOURCE.replace(`revision: '${changed.revision}'`, "revision: 'ffffffffff'"), caches);
+    await v2.run('install');
+    const nulls = manifest.filter((e) => !e.revision).map((e) => e.url);
+    assert.deepEqual(v2.fetched.sort(), [changed.url, ...nulls].sort());
+
+    await v2.run('activate');
+    const precache = await caches.open('oops-precache');
+    assert.equal(await precache.match(`${changed.url}?__rev=${changed.revision}`), undefined);
+    assert.ok(await precache.match(`${changed.url}?__rev=ffffffffff`));
+  });
+
+  test('activation : les anciens caches versionnés sont supprimés', async () => {
+    const caches = new FakeCacheStorage();
+    await caches.open('oops-v42');
+    const sw = loadWorker(SOURCE, caches);
+    await sw.run('install');
+    await sw.run('activate');
+    assert.deepEqual((await caches.keys()).sort(), ['oops-precache']);
+  });
+
+  test('fetch : "/" et les fichiers précachés sont servis depuis leur révision', async () => {
+    const caches = new FakeCacheStorage();
+    const sw = loadWorker(SOURCE, caches);
+    await sw.run('install');
+    const before = sw.fetched.length;
+    const response = await sw.run('fetch', { request: { method: 'GET', url: `${ORIGIN}/` } });
+    assert.equal(response.body, '/index.html');
+    assert.equal(sw.fetched.length, before);
+  });
+
+  test('activation : les illustrations absentes du catalogue sont supprimées', async () => {
+    const imageUrl = CATALOG.rows.map((row) => row[CATALOG.fields.indexOf('image_url')]).find(Boolean);
+    assert.match(imageUrl, /^\/icons\/exercises\/.+\?v=[0-9a-f]+$/);
+    const [path] = imageUrl.split('?');
+    const dexie = 'https://cdn.jsdelivr.net/npm/dexie@4/dist/dexie.mjs';
+
+    const caches = new FakeCacheStorage();
+    const runtime = await caches.open('oops-runtime');
+    for (const url of [imageUrl, `${path}?v=00000000`, path, dexie]) await runtime.put(url, { ok: true, body: url });
+    const sw = loadWorker(SOURCE, caches);
+    await sw.run('install');
+    await sw.run('activate');
+
+    const kept = (await runtime.keys()).map(({ url }) => url).sort();
+    assert.deepEqual(kept, [`${ORIGIN}${imageUrl}`, dexie].sort());
+  });
+
+  test('fetch : une illustration révisionnée est servie depuis le cache d\'exécution', async () => {
+    const caches = new FakeCacheStorage();
+    const sw = loadWorker(SOURCE, caches);
+    const request = { method: 'GET', url: `${ORIGIN}/icons/exercises/plank-600.jpg?v=12345678` };
+    await sw.run('fetch', { request });
+    await new Promise((resolve) => setTimeout(resolve));
+    const before = sw.fetched.length;
+    const response = await sw.run('fetch', { request });
+    assert.equal(response.body, request);
+    assert.equal(sw.fetched.length, before);
+  });
+});
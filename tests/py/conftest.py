@@ -0,0 +1,41 @@
+"""Shared fixtures for the tests of scripts/ (run with: make test-py)."""
+
+import sys
+import threading
+from contextlib import contextmanager
+from http.server import ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).parent.parent.parent
+sys.path[:0] = [str(ROOT / "scripts"), str(ROOT)]
+
+
+@contextmanager
+def local_server(handler):
+    """Serve `handler` on an ephemeral port with logging off; yields the base URL."""
+    quiet = type(handler.__name__, (handler,), {"log_message": lambda self, fmt, *args: None})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), quiet)
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def serve():
+    """serve(handler) → base URL of a local server, shut down after the test."""
+    servers = []
+
+    def start(handler):
+        cm = local_server(handler)
+        servers.append(cm)
+        return cm.__enter__()
+
+    yield start
+    for cm in reversed(servers):
+        cm.__exit__(None, None, None)
@@ -0,0 +1,66 @@
+"""add_progressions.py: compile_graph on small synthetic graphs, and CHAINS against the catalog."""
+
+import add_progressions
+from add_progressions import compile_graph
+from catalog import Catalog
+
+
+def exercise(ex_id, category="push", difficulty=1):
+    return {"id": ex_id, "category": category, "difficulty": difficulty}
+
+
+def test_derived_fields():
+    exercises = [exercise("a"), exercise("b", difficulty=2), exercise("c", difficulty=3),
+                 exercise("side"), exercise("alone")]
+    chains = {"a": "b", "side": "b", "b": "c", "c": None, "alone": None}
+    fields, errors, warnings = compile_graph(exercises, chains)
+    assert (errors, warnings) == ([], [])
+    assert fields["a"] == {"progression_to": "b", "regression_from": [], "progression_path": ["b", "c"],
+                           "ladder": "c", "ladder_depth": 0}
+    assert fields["b"]["regression_from"] == ["a", "side"]
+    assert fields["b"]["ladder_depth"] == 1
+    assert (fields["c"]["ladder"], fields["c"]["ladder_depth"], fields["c"]["progression_path"]) == ("c", 2, [])
+    assert fields["alone"] == {"progression_to": None, "regression_from": [], "progression_path": [],
+                               "ladder": "alone", "ladder_depth": 0}
+
+
+def test_dangling_cross_category_and_missing_entries():
+    exercises = [exercise("a"), exercise("b"), exercise("row", "pull"), exercise("orphan")]
+    chains = {"a": "ghost", "b": "row", "row": None, "removed": None}
+    fields, errors, _ = compile_graph(exercises, chains)
+    assert fields is None
+    assert errors == [
+        "orphan : absent de CHAINS (mettre None si fin de chaîne)",
+        "a → ghost : cible inexistante",
+        "b → row : change de catégorie (push → pull)",
+        "removed : dans CHAINS mais absent du catalogue",
+    ]
+
+
+def test_each_cycle_is_reported_once():
+    exercises = [exercise(i) for i in ("entry", "c", "a", "b", "x", "y")]
+    chains = {"entry": "c", "c": "a", "a": "b", "b": "c", "x": "y", "y": "x"}
+    fields, errors, _ = compile_graph(exercises, chains)
+    assert fields is None
+    assert errors == ["cycle : a → b → c → a", "cycle : x → y → x"]
+
+
+def test_warnings():
+    exercises = [exercise("easy"), exercise("hard", difficulty=3), exercise("harder", difficulty=2),
+                 exercise("top", difficulty=3)]
+    chains = {"easy": None, "hard": "harder", "harder": "top", "top": None}
+    fields, errors, warnings = compile_graph(exercises, chains)
+    assert errors == [] and fields is not None
+    assert warnings == [
+        "hard → harder : cible plus facile (3 → 2)",
+        "hard : inaccessible depuis un exercice de difficulté 1",
+        "harder : inaccessible depuis un exercice de difficulté 1",
+        "top : inaccessible depuis un exercice de difficulté 1",
+    ]
+
+
+def test_chains_compile_against_the_catalog():
+    fields, errors, _ = compile_graph(Catalog().exercises(), add_progressions.CHAINS)
+    assert errors == []
+    for ex in Catalog().exercises():
+        assert {k: ex.get(k) for k in fields[ex["id"]]} == fields[ex["id"]]
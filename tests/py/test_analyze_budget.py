@@ -0,0 +1,36 @@
+"""analyze_budget.py: the hand-maintained BOOT_STEPS against web/js."""
+
+import shutil
+
+import analyze_budget
+
+
+def test_boot_steps_match_the_sources():
+    assert analyze_budget.check_boot_steps() == []
+
+
+def test_reordered_or_removed_calls_are_reported(tmp_path, monkeypatch):
+    js = tmp_path / "js"
+    shutil.copytree(analyze_budget.JS_DIR, js)
+    app = js / "app.js"
+    source = app.read_text(encoding="utf-8")
+    # i18n now loads before the WASM engine, and the catalog no longer loads at boot
+    source = source.replace("await init();", "").replace("await initI18n(lang);", "await initI18n(lang);\n  await init();")
+    app.write_text(source.replace("await loadExercises(lang);", ""), encoding="utf-8")
+    monkeypatch.setattr(analyze_budget, "JS_DIR", js)
+    monkeypatch.setattr(analyze_budget, "APP_JS", app)
+
+    problems = analyze_budget.check_boot_steps()
+    assert "boot() awaits initI18n(lang) earlier than BOOT_STEPS lists it" in problems
+    assert "boot() no longer awaits loadExercises(lang)" in problems
+
+
+def test_urls_no_script_requests_are_reported(tmp_path, monkeypatch):
+    js = tmp_path / "js"
+    shutil.copytree(analyze_budget.JS_DIR, js)
+    catalog = js / "catalog.js"
+    catalog.write_text(catalog.read_text(encoding="utf-8").replace("/data/catalog.json", "/data/bundle.json"),
+                       encoding="utf-8")
+    monkeypatch.setattr(analyze_budget, "JS_DIR", js)
+    monkeypatch.setattr(analyze_budget, "APP_JS", js / "app.js")
+    assert analyze_budget.check_boot_steps() == ["/data/catalog.json: not requested by any script in web/js"]
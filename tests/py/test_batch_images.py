@@ -0,0 +1,97 @@
+"""batch_images.py: submit → poll → apply against fake_gemini_server.py, into a temp dir."""
+
+import base64
+import json
+import sys
+
+import pytest
+
+import batch_images
+import gen_exercise_images as gen
+from catalog import Catalog
+from fake_gemini_server import make_handler, make_image
+
+pytest.importorskip("PIL")
+
+
+@pytest.fixture
+def batch_file(tmp_path):
+    path = tmp_path / "batch.jsonl"
+    records = Catalog().records("push")[:4]
+    gen.write_batch_file(path, [gen.batch_record(ex, gen.make_prompt(ex)) for ex in records])
+    return path
+
+
+def run_batch(monkeypatch, batch_file, url, *extra):
+    monkeypatch.setenv("GEMINI_API_KEY", "fake")
+    monkeypatch.setattr(sys, "argv", [
+        "batch_images.py", "run", str(batch_file), "--base-url", url, "--poll-interval", "0.01", *extra,
+    ])
+    batch_images.main()
+
+
+@pytest.mark.parametrize("responses_file", [False, True], ids=["inline", "responses-file"])
+def test_run_submits_polls_and_applies(serve, tmp_path, batch_file, monkeypatch, capsys, responses_file):
+    url = serve(make_handler(None, 0.0, 0.0, batch_duration=0.05, responses_file=responses_file))
+    out = tmp_path / "images"
+    real_manifest = gen.MANIFEST_PATH.read_bytes()
+    push_json = Catalog().path("push").read_bytes()
+
+    run_batch(monkeypatch, batch_file, url, "--output-dir", str(out))
+    stdout, stderr = capsys.readouterr()
+
+    ids = [r["id"] for r in gen.read_batch_file(batch_file)]
+    assert "Saved: 4, Skipped: 0, Errors: 0" in stdout
+    assert "BATCH_STATE_RUNNING" in stderr            # polled at least once before it finished
+    assert json.loads(batch_images.job_path(batch_file).read_text())["count"] == len(ids)
+    assert sorted(p.stem for p in out.glob("*.png")) == sorted(ids)
+    manifest = json.loads((out / "image_manifest.json").read_text())
+    assert sorted(manifest) == sorted(ids)
+    for ex_id, entry in manifest.items():
+        assert entry["output_sha256"] == gen.sha256((out / f"{ex_id}.png").read_bytes())
+        assert entry["endpoint"] == url
+        assert not gen.from_production(entry)
+    # the real masters, manifest and image_url are untouched
+    assert gen.MANIFEST_PATH.read_bytes() == real_manifest
+    assert Catalog().path("push").read_bytes() == push_json
+
+
+def test_base_url_defaults_to_scratch_dir(serve, tmp_path, batch_file, monkeypatch, capsys):
+    url = serve(make_handler(None, 0.0, 0.0, batch_duration=0))
+    scratch = tmp_path / "scratch"
+    monkeypatch.setattr(batch_images, "SCRATCH_DIR", scratch)
+    run_batch(monkeypatch, batch_file, url)
+    capsys.readouterr()
+    assert len(list(scratch.glob("*.png"))) == 4
+    assert len(json.loads((scratch / "image_manifest.json").read_text())) == 4
+
+
+def test_blank_results_are_not_applied(serve, tmp_path, batch_file, monkeypatch, capsys):
+    blank = base64.b64encode(make_image()).decode()
+    url = serve(make_handler(blank, 0.0, 0.0, batch_duration=0))
+    out = tmp_path / "images"
+    with pytest.raises(SystemExit) as exit_info:
+        run_batch(monkeypatch, batch_file, url, "--output-dir", str(out))
+    stdout, stderr = capsys.readouterr()
+    assert exit_info.value.code == 1
+    assert "Saved: 0, Skipped: 0, Errors: 4" in stdout
+    assert "blank: uniform color" in stderr
+    assert list(out.glob("*.png")) == []
+
+
+def test_manifest_records_the_submitted_model(serve, tmp_path, batch_file, monkeypatch, capsys):
+    url = serve(make_handler(None, 0.0, 0.0, batch_duration=0))
+    client = batch_images.BatchClient("fake", gen.MODEL, base_url=url)
+    batch_images.submit(client, batch_file)
+    job = batch_images.load_job(batch_file)
+    op = batch_images.wait(client, job["name"], 0.01)
+    records = gen.read_batch_file(batch_file)
+    out = tmp_path / "images"
+    out.mkdir()
+    batch_images.apply_results(client, op, records, out, model="older-model")
+    capsys.readouterr()
+
+    manifest = json.loads((out / "image_manifest.json").read_text())
+    ex = next(e for e in Catalog().records("push") if e["id"] == records[0]["id"])
+    assert manifest[ex["id"]]["model"] == "older-model"
+    assert gen.image_status(ex, gen.make_prompt(ex), out / f"{ex['id']}.png", manifest) == "stale"
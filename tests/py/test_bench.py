@@ -0,0 +1,36 @@
+"""bench.py: a short run leaves the repo alone and --check records a missing baseline."""
+
+import json
+import sys
+
+import bench
+from catalog import CACHE_PATH
+
+
+def run_bench(monkeypatch, baseline, *extra):
+    monkeypatch.setattr(sys, "argv", [
+        "bench.py", "--sizes", "real", "--stages", "catalog_load_cold,wger_dedupe",
+        "--repeat", "1", "--baseline", str(baseline), *extra,
+    ])
+    bench.main()
+
+
+def test_check_records_a_missing_baseline(tmp_path, monkeypatch, capsys):
+    baseline = tmp_path / "bench_baseline.json"
+    cache_before = CACHE_PATH.stat().st_mtime_ns if CACHE_PATH.exists() else None
+
+    run_bench(monkeypatch, baseline, "--check")
+    assert "recorded this run" in capsys.readouterr().out
+    assert sorted(json.loads(baseline.read_text())["results"]) == ["real/catalog_load_cold", "real/wger_dedupe"]
+
+    run_bench(monkeypatch, baseline, "--check", "--threshold", "1000")
+    assert "No regression" in capsys.readouterr().out
+    # the stages index the workspace copy, never the repo's pickle cache
+    assert (CACHE_PATH.stat().st_mtime_ns if CACHE_PATH.exists() else None) == cache_before
+
+
+def test_without_check_a_missing_baseline_is_only_reported(tmp_path, monkeypatch, capsys):
+    baseline = tmp_path / "bench_baseline.json"
+    run_bench(monkeypatch, baseline)
+    assert "--update-baseline first" in capsys.readouterr().out
+    assert not baseline.exists()
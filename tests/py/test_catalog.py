@@ -0,0 +1,116 @@
+"""catalog.py: the pickle cache and canonical writes, on a copy of the catalog."""
+
+import copy
+import shutil
+
+import pytest
+
+import catalog
+from catalog import Catalog
+
+
+@pytest.fixture
+def exercises_dir(tmp_path):
+    path = tmp_path / "exercises"
+    path.mkdir()
+    for category in ("core", "push"):
+        shutil.copy(catalog.EXERCISES_DIR / f"{category}.json", path)
+    return path
+
+
+@pytest.fixture
+def cache_path(tmp_path):
+    return tmp_path / "cache" / "catalog.pickle"
+
+
+@pytest.fixture
+def cache_writes(monkeypatch):
+    writes = []
+    write_atomic = catalog.write_atomic
+    monkeypatch.setattr(catalog, "write_atomic", lambda path, data: (writes.append(path), write_atomic(path, data)))
+    return writes
+
+
+def no_parsing(monkeypatch):
+    monkeypatch.setattr(catalog.json, "load", lambda f: pytest.fail(f"parsed {f.name}"))
+
+
+def test_cold_load_writes_the_cache_once(exercises_dir, cache_path, cache_writes):
+    cat = Catalog(exercises_dir, cache_path)
+    assert len(cat.by_id) == len(Catalog().records("core")) + len(Catalog().records("push"))
+    assert cache_writes == [cache_path]
+    assert not list(cache_path.parent.glob("*.tmp"))
+
+
+def test_unchanged_files_come_from_the_cache(exercises_dir, cache_path, cache_writes, monkeypatch):
+    expected = Catalog(exercises_dir, cache_path).exercises()
+    cache_writes.clear()
+    with monkeypatch.context() as m:
+        no_parsing(m)
+        assert Catalog(exercises_dir, cache_path).exercises() == expected
+    assert cache_writes == []
+
+
+def test_edited_file_is_parsed_again(exercises_dir, cache_path, cache_writes, monkeypatch):
+    Catalog(exercises_dir, cache_path).exercises()
+    push = exercises_dir / "push.json"
+    push.write_text(push.read_text(encoding="utf-8").replace('"id": "push_knee"', '"id": "push_knee_2"'),
+                    encoding="utf-8")
+    cache_writes.clear()
+
+    cat = Catalog(exercises_dir, cache_path)
+    assert "push_knee_2" in cat.by_category["push"]
+    assert cache_writes == [cache_path]
+    with monkeypatch.context() as m:
+        no_parsing(m)
+        assert "push_knee_2" in Catalog(exercises_dir, cache_path).by_id
+
+
+def test_mutations_do_not_leak_into_the_cache(exercises_dir, cache_path):
+    cat = Catalog(exercises_dir, cache_path)
+    first = cat.records("push")[0]
+    original = copy.deepcopy(first)
+    first["difficulty"] = 99
+    first["contraindications"].append("wrist")
+    assert Catalog(exercises_dir, cache_path).records("push")[0] == original
+
+
+def test_without_cache(exercises_dir, cache_path):
+    assert len(Catalog(exercises_dir, cache_path, use_cache=False)) > 0
+    assert not cache_path.exists()
+    with pytest.raises(KeyError):
+        Catalog(exercises_dir, cache_path).records("pull")
+
+
+def test_save_records_leaves_identical_bytes_alone(exercises_dir):
+    path = exercises_dir / "push.json"
+    before = path.stat().st_mtime_ns
+    assert catalog.save_records(path, Catalog(exercises_dir, use_cache=False).records("push")) is None
+    assert path.stat().st_mtime_ns == before
+
+
+def test_save_records_reports_what_moved(exercises_dir):
+    path = exercises_dir / "push.json"
+    records = Catalog(exercises_dir, use_cache=False).records("push")
+    records[0]["difficulty"] += 1
+    added = {**records[1], "id": "push_new"}
+    removed = records.pop(2)["id"]
+    records.append(added)
+
+    changes = catalog.save_records(path, records)
+    assert changes == {"added": ["push_new"], "removed": [removed], "modified": [records[0]["id"]]}
+    assert path.read_text(encoding="utf-8") == catalog.dumps(records)
+    assert catalog.format_changes({"added": [], "removed": [], "modified": []}) == "formatting only"
+
+
+def test_save_records_refuses_schema_errors(exercises_dir):
+    path = exercises_dir / "push.json"
+    before = path.read_bytes()
+    records = Catalog(exercises_dir, use_cache=False).records("push")
+    records[0]["difficulty"] = 300
+    del records[1]["category"]
+    with pytest.raises(catalog.InvalidCatalog) as exc_info:
+        catalog.save_records(path, records)
+    assert len(exc_info.value.errors) == 2
+    assert path.read_bytes() == before
+    assert sorted(p.name for p in exercises_dir.iterdir()) == ["core.json", "push.json"]
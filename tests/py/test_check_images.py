@@ -0,0 +1,92 @@
+"""check_images.py: difference hash, BK-tree, near-duplicates and the similar-pairs list."""
+
+import io
+import random
+import shutil
+
+import pytest
+
+import check_images
+from check_images import BKTree, dhash, inspect_master, load_similar, near_duplicates
+from gen_exercise_images import OUTPUT_DIR, load_all_exercises, make_image_check
+from image_backends import BadImage
+
+Image = pytest.importorskip("PIL.Image")
+pytest.importorskip("numpy")
+
+BITS = check_images.HASH_ROWS * check_images.HASH_COLS
+
+
+def gradient(width=240, height=80, reverse=False):
+    im = Image.new("L", (width, height))
+    im.putdata([(255 - x if reverse else x) * 255 // width for _y in range(height) for x in range(width)])
+    return im
+
+
+def jpeg(im):
+    buf = io.BytesIO()
+    im.convert("RGB").save(buf, "JPEG")
+    return buf.getvalue()
+
+
+def test_dhash_of_uniform_image_is_blank():
+    assert dhash(Image.new("RGB", (300, 100), "white")) == 0
+    assert check_images.is_blank(dhash(Image.new("RGB", (300, 100), (40, 90, 200))))
+
+
+def test_dhash_follows_horizontal_gradients():
+    assert dhash(gradient()) == (1 << BITS) - 1        # every pixel brighter than its left neighbour
+    assert dhash(gradient(reverse=True)) == 0
+
+
+def test_dhash_is_stable_under_resizing():
+    im = Image.open(OUTPUT_DIR / "squat_bodyweight.png")
+    small = im.resize((im.width // 3, im.height // 3))
+    assert (dhash(im) ^ dhash(small)).bit_count() <= 4
+
+
+def test_bktree_matches_brute_force():
+    rng = random.Random(0)
+    hashes = {f"ex{i}": rng.getrandbits(BITS) for i in range(200)}
+    # a few near copies so that small radii find something
+    for i in range(10):
+        hashes[f"copy{i}"] = hashes[f"ex{i}"] ^ (1 << rng.randrange(BITS))
+    tree = BKTree()
+    for key, h in hashes.items():
+        tree.add(h, key)
+    for radius in (0, 1, 5, 80, 96):
+        for probe in list(hashes.values())[::23]:
+            expected = sorted(((probe ^ h).bit_count(), key) for key, h in hashes.items()
+                              if (probe ^ h).bit_count() <= radius)
+            assert tree.search(probe, radius) == expected
+
+
+def test_near_duplicates_skips_blank_and_similar_pairs():
+    hashes = {"a": 0b1111, "b": 0b0111, "c": 0b1 << 100, "blank_1": 0, "blank_2": 0}
+    assert near_duplicates(hashes, 1) == [(1, "a", "b")]
+    assert near_duplicates(hashes, 1, frozenset({frozenset(("a", "b"))})) == []
+    assert near_duplicates(hashes, 0) == []
+
+
+def test_similar_pairs_name_existing_exercises():
+    ids = {ex["id"] for ex in load_all_exercises()}
+    similar = load_similar()
+    assert frozenset(("lunge_forward", "lunge_reverse")) in similar
+    assert all(len(pair) == 2 and pair <= ids for pair in similar)
+
+
+def test_inspect_master_rejects_uniform_images():
+    problems, info = inspect_master(jpeg(Image.new("RGB", (300, 100), (128, 128, 128))))
+    assert info["contrast"] < check_images.MIN_CONTRAST
+    assert any(p.startswith("blank") for p in problems)
+    assert inspect_master(jpeg(gradient(300, 100)))[0] == []
+
+
+def test_image_check_honours_similar_pairs(tmp_path):
+    shutil.copy(OUTPUT_DIR / "lunge_forward.png", tmp_path / "lunge_forward.png")
+    img = (OUTPUT_DIR / "lunge_forward.png").read_bytes()
+    jobs = [({"id": ex_id}, None, None) for ex_id in ("lunge_reverse", "squat_bodyweight")]
+    check = make_image_check(jobs, tmp_path)
+    assert check("lunge_reverse", img) == img
+    with pytest.raises(BadImage, match="near-duplicate of lunge_forward"):
+        check("squat_bodyweight", img)
@@ -0,0 +1,78 @@
+"""coverage_matrix.py: the vectorised pool matrix against a per-profile filter, and --check."""
+
+import json
+import random
+import sys
+
+import pytest
+
+import coverage_matrix
+from build_bundle import pack_planner
+from catalog import Catalog
+from coverage_matrix import enumerate_profiles, pool_matrix
+from validate_catalog import load_enums
+
+pytest.importorskip("numpy")
+
+CATEGORIES, _ = load_enums()["Category"]
+INJURIES, _ = load_enums()["Contraindication"]
+
+
+def synthetic_catalog(n=60, seed=0):
+    rng = random.Random(seed)
+    return [
+        {
+            "id": f"ex_{i}", "category": rng.choice(CATEGORIES), "movement_pattern": "horizontal_push",
+            "difficulty": rng.randint(1, 3), "duration_s": None,
+            "equipment_required": rng.random() < 0.1, "postpartum_only": rng.random() < 0.1,
+            "requires_anchor": rng.random() < 0.2,
+            "contraindications": rng.sample([*INJURIES, "not_an_injury"], rng.randint(0, 3)),
+        }
+        for i in range(n)
+    ]
+
+
+def eligible(ex, profile):
+    injuries, cap, postpartum, anchor = profile
+    forbidden = {*injuries, *(("postpartum", "diastasis_recti") if postpartum else ())}
+    return (
+        not ex["equipment_required"]
+        and (postpartum or not ex["postpartum_only"])
+        and (anchor or not ex["requires_anchor"])
+        and ex["difficulty"] <= cap
+        and not forbidden & set(ex["contraindications"])
+    )
+
+
+def test_pool_matrix_matches_a_per_profile_filter():
+    exercises = synthetic_catalog()
+    profiles = enumerate_profiles(INJURIES[:5])
+    pools = pool_matrix(pack_planner(exercises), profiles)
+    assert pools.shape == (len(profiles), len(CATEGORIES))
+    for p, profile in enumerate(profiles):
+        expected = [sum(1 for ex in exercises if ex["category"] == c and eligible(ex, profile)) for c in CATEGORIES]
+        assert pools[p].tolist() == expected, profile
+
+
+def run_main(monkeypatch, *args):
+    monkeypatch.setattr(sys, "argv", ["coverage_matrix.py", *args])
+    coverage_matrix.main()
+
+
+def test_check_fails_on_a_new_dead_cell(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(coverage_matrix, "BASELINE_PATH", tmp_path / "baseline.json")
+    run_main(monkeypatch, "--update-baseline")
+    known = json.loads((tmp_path / "baseline.json").read_text())["dead"]
+    run_main(monkeypatch, "--check")
+    assert "no new dead cells" in capsys.readouterr().out
+
+    # every pull exercise now needs difficulty 2: beginners 45+ have none left
+    exercises = [{**ex, "difficulty": max(ex["difficulty"], 2)} if ex["category"] == "pull" else ex
+                 for ex in Catalog().exercises()]
+    monkeypatch.setattr(Catalog, "exercises", lambda self, category=None: exercises)
+    with pytest.raises(SystemExit) as exit_info:
+        run_main(monkeypatch, "--check")
+    assert exit_info.value.code == 1
+    stderr = capsys.readouterr().err
+    assert "pull|-|d1|std|no-anchor" in stderr
+    assert not any(key in stderr for key in known)
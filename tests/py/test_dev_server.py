@@ -0,0 +1,113 @@
+"""dev_server.py: header parsing, and the handler on a temp web/ served on an ephemeral port."""
+
+import gzip
+import http.client
+import os
+from urllib.parse import urlsplit
+
+import pytest
+
+import dev_server
+from dev_server import accepted_encodings, parse_range
+
+SOURCE = b"export const answer = 42;\n" * 40
+
+
+def test_parse_range():
+    assert parse_range("bytes=0-3", 10) == (0, 3)
+    assert parse_range("bytes=5-", 10) == (5, 9)
+    assert parse_range("bytes=0-99", 10) == (0, 9)       # clamped to the end
+    assert parse_range("bytes=-4", 10) == (6, 9)         # suffix: the last 4 bytes
+    assert parse_range("bytes=-20", 10) == (0, 9)
+    assert parse_range("bytes=10-", 10) == "invalid"
+    assert parse_range("bytes=5-3", 10) == "invalid"
+    assert parse_range("bytes=-0", 10) == "invalid"
+    for ignored in (None, "", "bytes=-", "items=0-1", "bytes=0-1,4-5"):
+        assert parse_range(ignored, 10) is None
+
+
+def test_accepted_encodings():
+    assert accepted_encodings("gzip, deflate, br") == {"gzip", "deflate", "br"}
+    assert accepted_encodings("br;q=0, gzip;q=0.5") == {"gzip"}
+    assert accepted_encodings("gzip; q=0.0, BR") == {"br"}
+    assert accepted_encodings("*") == {"*"}
+    assert accepted_encodings("gzip;q=oops") == set()
+    assert accepted_encodings(None) == set()
+
+
+@pytest.fixture
+def web(tmp_path):
+    (tmp_path / "app.js").write_bytes(SOURCE)
+    (tmp_path / "app.js.gz").write_bytes(gzip.compress(SOURCE, mtime=0))
+    (tmp_path / "app.js.br").write_bytes(b"brotli bytes")
+    (tmp_path / "thumbs-0.1a2b3c4d.webp").write_bytes(b"RIFF")
+    return tmp_path
+
+
+@pytest.fixture
+def get(serve, web):
+    class Handler(dev_server.PrecompressedHandler):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, directory=str(web), **kwargs)
+
+    url = urlsplit(serve(Handler))
+
+    def request(path, **headers):
+        conn = http.client.HTTPConnection(url.hostname, url.port, timeout=5)
+        conn.putrequest("GET", path, skip_accept_encoding=True)
+        for name, value in headers.items():
+            conn.putheader(name.replace("_", "-"), value)
+        conn.endheaders()
+        response = conn.getresponse()
+        body = response.read()
+        conn.close()
+        return response.status, response.headers, body
+
+    return request
+
+
+def test_precompressed_siblings_follow_accept_encoding(get):
+    status, headers, body = get("/app.js", Accept_Encoding="gzip, br")
+    assert (status, headers["Content-Encoding"], body) == (200, "br", b"brotli bytes")
+    assert headers["Content-Type"] == "text/javascript"
+    assert headers["Vary"] == "Accept-Encoding"
+
+    _, headers, body = get("/app.js", Accept_Encoding="br;q=0, gzip")
+    assert headers["Content-Encoding"] == "gzip" and gzip.decompress(body) == SOURCE
+    assert get("/app.js", Accept_Encoding="*")[1]["Content-Encoding"] == "br"
+    _, headers, body = get("/app.js")
+    assert "Content-Encoding" not in headers and body == SOURCE
+
+
+def test_stale_siblings_are_not_served(get, web):
+    mtime = (web / "app.js").stat().st_mtime
+    os.utime(web / "app.js.br", (mtime - 10, mtime - 10))      # older than app.js: stale
+    os.utime(web / "app.js.gz", (mtime + 10, mtime + 10))
+    assert get("/app.js", Accept_Encoding="br, gzip")[1]["Content-Encoding"] == "gzip"
+    os.utime(web / "app.js.gz", (mtime - 10, mtime - 10))
+    _, headers, body = get("/app.js", Accept_Encoding="br, gzip")
+    assert "Content-Encoding" not in headers and body == SOURCE
+
+
+def test_ranges_are_served_uncompressed(get):
+    status, headers, body = get("/app.js", Range="bytes=-4", Accept_Encoding="br")
+    assert (status, body) == (206, SOURCE[-4:])
+    assert headers["Content-Range"] == f"bytes {len(SOURCE) - 4}-{len(SOURCE) - 1}/{len(SOURCE)}"
+    assert "Content-Encoding" not in headers
+
+    status, headers, _ = get("/app.js", Range=f"bytes={len(SOURCE)}-")
+    assert (status, headers["Content-Range"]) == (416, f"bytes */{len(SOURCE)}")
+
+
+def test_cache_control_and_revalidation(get):
+    _, headers, _ = get("/thumbs-0.1a2b3c4d.webp")
+    assert headers["Cache-Control"] == "public, max-age=31536000, immutable"
+    assert headers["Content-Type"] == "image/webp"
+
+    _, headers, _ = get("/app.js", Accept_Encoding="gzip")
+    assert headers["Cache-Control"] == "no-cache"
+    status, not_modified, body = get("/app.js", Accept_Encoding="gzip", If_None_Match=headers["ETag"])
+    assert (status, body) == (304, b"")
+    assert not_modified["ETag"] == headers["ETag"]
+    # the identity response has its own ETag
+    assert get("/app.js", If_None_Match=headers["ETag"])[0] == 200
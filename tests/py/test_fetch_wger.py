@@ -0,0 +1,163 @@
+"""fetch_wger.py against the recorded fixtures in tests/py/fixtures/wger (wger_fixture_server.py)."""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import fetch_wger
+from catalog import Catalog
+from fetch_wger import WgerClient, make_candidate
+from wger_fixture_server import FIXTURE_PAGE_SIZE, FIXTURES_DIR, make_handler
+
+LISTING = f"exerciseinfo/?format=json&equipment={fetch_wger.BODYWEIGHT_EQUIPMENT_ID}"
+FIXTURE_COUNT = 10
+
+
+@pytest.fixture
+def wger_url(serve):
+    return serve(make_handler(FIXTURES_DIR, 0.0))
+
+
+def fetch(client, page_size=FIXTURE_PAGE_SIZE):
+    with ThreadPoolExecutor(max_workers=fetch_wger.WORKERS) as pool:
+        return client.fetch_all_pages(LISTING, pool, page_size=page_size)
+
+
+def test_pages_are_fanned_out_from_count(wger_url, tmp_path):
+    client = WgerClient(wger_url, tmp_path, ttl_s=0)
+    bases = fetch(client)
+    assert len(bases) == FIXTURE_COUNT
+    assert len({b["id"] for b in bases}) == FIXTURE_COUNT
+    assert client.stats["fetched"] == 3        # offsets 0, 4, 8
+    assert len(list(tmp_path.glob("*.json"))) == 3
+
+
+def test_default_page_size_matches_the_single_page_fixture(wger_url, tmp_path):
+    client = WgerClient(wger_url, tmp_path, ttl_s=0)
+    assert len(fetch(client, page_size=fetch_wger.PAGE_SIZE)) == FIXTURE_COUNT
+    assert client.stats["fetched"] == 1
+
+
+def test_gzip_bodies_are_decoded(wger_url, tmp_path):
+    rel = f"{LISTING}&limit={fetch_wger.PAGE_SIZE}&offset=0"
+    client = WgerClient(wger_url, tmp_path, ttl_s=0)
+    assert client.get_json(rel)["count"] == FIXTURE_COUNT
+    recorded = (FIXTURES_DIR / f"{fetch_wger.cache_key(rel)}.json").read_bytes()
+    # what went over the wire is the gzip-encoded body, well under the JSON size
+    assert 0 < client.stats["bytes"] < len(recorded) / 2
+
+
+def test_revalidation_answers_304_from_cache(wger_url, tmp_path):
+    first = fetch(WgerClient(wger_url, tmp_path, ttl_s=0))
+    client = WgerClient(wger_url, tmp_path, ttl_s=0)
+    assert fetch(client) == first
+    assert client.stats["revalidated"] == 3
+    assert client.stats["fetched"] == 0
+    assert client.stats["bytes"] == 0
+
+
+def test_fresh_cache_is_not_revalidated(wger_url, tmp_path):
+    fetch(WgerClient(wger_url, tmp_path, ttl_s=0))
+    client = WgerClient(wger_url, tmp_path, ttl_s=3600)
+    fetch(client)
+    assert client.stats["fresh"] == 3
+    assert client.stats["revalidated"] == client.stats["fetched"] == 0
+
+
+def test_offline_reads_the_cache_only(wger_url, tmp_path):
+    online = fetch(WgerClient(wger_url, tmp_path, ttl_s=0))
+    assert fetch(WgerClient("http://127.0.0.1:9", tmp_path, offline=True)) == online
+    with pytest.raises(RuntimeError, match="offline"):
+        WgerClient("http://127.0.0.1:9", tmp_path / "empty", offline=True).get_json(LISTING)
+
+
+def test_candidates_from_fixtures(wger_url, tmp_path):
+    candidates = {c["_wger_id"]: c for c in map(make_candidate, fetch(WgerClient(wger_url, tmp_path)))
+                  if c}
+    assert 82 not in candidates                 # Arms: no OOPS category
+    assert len(candidates) == FIXTURE_COUNT - 1
+    push = candidates[91]
+    assert (push["id"], push["category"], push["name_fr"]) == ("push_push_up", "push", "Pompe")
+    assert "<p>" not in push["instructions_en"]
+    assert candidates[166]["name_fr"] == "Pike Push-Up"       # no French translation: English
+    assert candidates[1091]["instructions_en"] == "Instructions to be completed."
+
+
+@pytest.fixture
+def bases(wger_url, tmp_path):
+    return fetch(WgerClient(wger_url, tmp_path / "cache"))
+
+
+@pytest.fixture
+def no_curated(monkeypatch):
+    monkeypatch.setattr(fetch_wger, "curated_keys", lambda: (set(), set()))
+
+
+def ids(records):
+    return sorted(r["_wger_id"] for r in records)
+
+
+def test_sync_against_state(bases, no_curated):
+    _diff, seen = fetch_wger.sync_diff(bases, {"bases": {}})
+    state = {"bases": dict(seen)}
+    state["bases"]["91"] = {**seen["91"], "last_update": "2020-01-01T00:00:00Z"}
+    state["bases"]["5"] = {"last_update": "2020-01-01T00:00:00Z", "oops_id": "push_gone"}
+    del state["bases"]["238"]
+
+    diff, seen = fetch_wger.sync_diff(bases, state)
+    assert ids(diff["new"]) == [238]
+    assert ids(diff["changed"]) == [91]
+    assert diff["changed"][0]["_previous_update"] == "2020-01-01T00:00:00Z"
+    assert ids(diff["removed"]) == [5]
+    assert "5" not in seen and "238" in seen
+
+
+def test_since_classifies_against_state(bases, monkeypatch):
+    monkeypatch.setattr(fetch_wger, "curated_keys", lambda: ({1325}, set()))
+    _diff, seen = fetch_wger.sync_diff(bases, {"bases": {}})
+    state = {"bases": {k: v for k, v in seen.items() if k not in ("111", "1325")}}
+
+    # updated after 2024-03-01: 91 (known), 111 (unknown), 238 (known), 1325 (unknown, curated)
+    diff, _seen = fetch_wger.sync_diff(bases, state, since="2024-03-01")
+    assert ids(diff["new"]) == [111]
+    assert ids(diff["curated"]) == [1325]
+    assert ids(diff["changed"]) == [91, 238]
+    assert diff["removed"] == []
+
+
+def test_state_is_saved_atomically(tmp_path):
+    path = tmp_path / "wger_state.json"
+    state = {"synced_at": "2025-01-01T00:00:00Z", "bases": {"91": {"last_update": "x", "oops_id": "push_push_up"}}}
+    fetch_wger.save_state(path, state)
+    assert fetch_wger.load_state(path) == state
+    assert [p.name for p in tmp_path.iterdir()] == ["wger_state.json"]
+    assert fetch_wger.load_state(tmp_path / "missing.json") == {"synced_at": None, "bases": {}}
+
+
+@pytest.fixture(scope="module")
+def matcher():
+    return fetch_wger.CatalogMatcher(Catalog().exercises())
+
+
+def similar_ids(candidate):
+    return [m["id"] for m in candidate["_similar"]]
+
+
+def test_generic_names_match_their_longer_variants(wger_url, tmp_path, matcher):
+    candidates = {c["_wger_id"]: c for c in map(make_candidate, fetch(WgerClient(wger_url, tmp_path))) if c}
+    push, plank, squats = candidates[91], candidates[238], candidates[111]
+    for candidate in (push, plank, squats):
+        assert matcher.annotate(candidate)
+    # contained in every push-up variant: the instructions pick the closest ones
+    assert "push_standard" in similar_ids(push)
+    assert "push_t" not in similar_ids(push)
+    assert "plank" in similar_ids(plank) and "side_plank" not in similar_ids(plank)
+    assert similar_ids(squats)[0] == "squat_bodyweight"
+    assert matcher.annotate(candidates[1200]) and similar_ids(candidates[1200])[0] == "wall_sit"
+
+
+def test_unrelated_names_are_not_duplicates(matcher):
+    for name in ("Pull-Up", "Burpee", "Dragon flag"):
+        candidate = {"name_en": name, "instructions_en": "Instructions to be completed."}
+        assert not matcher.annotate(candidate)
+        assert all(m["similarity"] < fetch_wger.DUPLICATE_SIMILARITY for m in candidate["_similar"])
@@ -0,0 +1,164 @@
+"""gen_exercise_images.py: token bucket, retries, and a full run against fake_gemini_server.py."""
+
+import json
+import sys
+import time
+
+import pytest
+
+import gen_exercise_images as gen
+from catalog import Catalog
+from fake_gemini_server import make_handler
+
+pytest.importorskip("PIL")
+
+
+class ApiError(Exception):
+    def __init__(self, code):
+        super().__init__(f"HTTP {code}")
+        self.code = code
+
+
+@pytest.fixture(autouse=True)
+def fast_backoff(monkeypatch):
+    monkeypatch.setattr(gen, "BACKOFF_BASE_S", 0.001)
+    monkeypatch.setattr(gen, "BACKOFF_MAX_S", 0.01)
+
+
+def test_token_bucket_spaces_requests():
+    bucket = gen.TokenBucket(rate=50)
+    started = time.monotonic()
+    for _ in range(11):
+        bucket.acquire()
+    # the first token is banked, the next ten wait 1/50 s each
+    assert time.monotonic() - started >= 0.19
+
+
+def test_token_bucket_bursts_up_to_capacity():
+    bucket = gen.TokenBucket(rate=1, capacity=5)
+    started = time.monotonic()
+    for _ in range(5):
+        bucket.acquire()
+    assert time.monotonic() - started < 0.1
+
+
+def test_retries_429_and_5xx_then_succeeds():
+    replies = [ApiError(429), ApiError(503), b"image"]
+
+    def generate(prompt):
+        reply = replies.pop(0)
+        if isinstance(reply, Exception):
+            raise reply
+        return reply
+
+    assert gen.generate_with_retries(generate, "p", gen.TokenBucket(1000)) == b"image"
+    assert replies == []
+
+
+def test_does_not_retry_client_errors():
+    calls = []
+
+    def generate(prompt):
+        calls.append(prompt)
+        raise ApiError(400)
+
+    with pytest.raises(ApiError):
+        gen.generate_with_retries(generate, "p", gen.TokenBucket(1000))
+    assert len(calls) == 1
+
+
+def test_gives_up_after_max_retries():
+    calls = []
+
+    def generate(prompt):
+        calls.append(prompt)
+        raise ApiError(429)
+
+    with pytest.raises(ApiError):
+        gen.generate_with_retries(generate, "p", gen.TokenBucket(1000), retries=3)
+    assert len(calls) == 4
+
+
+def test_backoff_is_bounded(monkeypatch):
+    monkeypatch.setattr(gen, "BACKOFF_BASE_S", 1.0)
+    monkeypatch.setattr(gen, "BACKOFF_MAX_S", 8.0)
+    delays = [gen.backoff_delay(attempt) for attempt in range(10) for _ in range(20)]
+    assert all(0 <= d <= 8.0 for d in delays)
+    assert max(gen.backoff_delay(0) for _ in range(50)) <= 1.0
+
+
+def test_run_against_fake_server_with_failures(serve, tmp_path, monkeypatch, capsys):
+    # seed 0 injects 3 failures in the first 16 draws: retried, never exhausted
+    url = serve(make_handler(None, 0.0, fail_rate=0.3, seed=0))
+    out = tmp_path / "images"
+    real_manifest = gen.MANIFEST_PATH.read_bytes()
+    push_json = Catalog().path("push").read_bytes()
+
+    monkeypatch.setenv("GEMINI_API_KEY", "fake")
+    monkeypatch.setattr(sys, "argv", [
+        "gen_exercise_images.py", "--category", "push", "--base-url", url,
+        "--output-dir", str(out), "--workers", "3", "--rps", "200",
+    ])
+    gen.main()
+    stdout, stderr = capsys.readouterr()
+
+    ids = [ex["id"] for ex in Catalog().records("push")]
+    assert "Errors: 0" in stdout
+    assert "retry 1/" in stderr                       # the 429/503 path was taken
+    assert sorted(p.stem for p in out.glob("*.png")) == sorted(ids)
+    manifest = json.loads((out / "image_manifest.json").read_text())
+    assert sorted(manifest) == sorted(ids)
+    for ex_id, entry in manifest.items():
+        assert entry["output_sha256"] == gen.sha256((out / f"{ex_id}.png").read_bytes())
+    # the real masters, manifest and image_url are untouched
+    assert gen.MANIFEST_PATH.read_bytes() == real_manifest
+    assert Catalog().path("push").read_bytes() == push_json
+
+
+def test_base_url_defaults_to_scratch_dir(serve, tmp_path, monkeypatch, capsys):
+    url = serve(make_handler(None, 0.0, fail_rate=0.0))
+    scratch = tmp_path / "scratch"
+    monkeypatch.setattr(gen, "SCRATCH_DIR", scratch)
+    monkeypatch.setenv("GEMINI_API_KEY", "fake")
+    monkeypatch.setattr(sys, "argv", [
+        "gen_exercise_images.py", "--ids", "push_wall", "--category", "push", "--base-url", url,
+        "--rps", "200", "--no-image-check",
+    ])
+    gen.main()
+    capsys.readouterr()
+    assert (scratch / "push_wall.png").exists()
+    assert "push_wall" in json.loads((scratch / "image_manifest.json").read_text())
+
+
+def test_offline_backends_default_to_scratch_and_stay_stale(tmp_path, monkeypatch, capsys):
+    scratch = tmp_path / "scratch"
+    monkeypatch.setattr(gen, "SCRATCH_DIR", scratch)
+    monkeypatch.setattr(sys, "argv", [
+        "gen_exercise_images.py", "--backend", "stub", "--category", "push", "--rps", "200",
+    ])
+    gen.main()
+    capsys.readouterr()
+
+    manifest = json.loads((scratch / "image_manifest.json").read_text())
+    ex = Catalog().records("push")[0]
+    entry = manifest[ex["id"]]
+    assert entry["backend"] == "stub"
+    assert gen.image_status(ex, gen.make_prompt(ex), scratch / f"{ex['id']}.png", manifest) == "stale"
+
+
+def test_only_real_gemini_entries_are_current(tmp_path):
+    ex = Catalog().records("push")[0]
+    prompt = gen.make_prompt(ex)
+    path = tmp_path / "img.png"
+    path.write_bytes(b"image")
+    legacy = gen.manifest_entry(prompt, b"image")
+    del legacy["backend"]
+    cases = [
+        (gen.manifest_entry(prompt, b"image"), "ok"),
+        (legacy, "ok"),                                  # written before "backend" existed
+        (gen.manifest_entry(prompt, b"image", "stub"), "stale"),
+        (gen.manifest_entry(prompt, b"image", "replay"), "stale"),
+        (gen.manifest_entry(prompt, b"image", "gemini", "http://127.0.0.1:8765"), "stale"),
+    ]
+    for entry, expected in cases:
+        assert gen.image_status(ex, prompt, path, {ex["id"]: entry}) == expected
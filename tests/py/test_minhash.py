@@ -0,0 +1,44 @@
+"""minhash.py: normalization, exact scores and LSH lookups against brute force."""
+
+import random
+
+from minhash import LSHIndex, containment, jaccard, normalize, shingles
+
+
+def test_normalize_strips_accents_and_punctuation():
+    assert normalize("Pompe déclinée (pieds surélevés)") == "pompe declinee pieds sureleves"
+    assert normalize("Push-Up", squash=True) == normalize("push up", squash=True) == "pushup"
+
+
+def test_scores():
+    short, long = shingles("Push-Up", 3, squash=True), shingles("Standard push-up", 3, squash=True)
+    assert containment(short, long) == 1.0
+    assert containment(long, short) == jaccard(short, long) == len(short) / len(long)
+    assert jaccard(short, frozenset()) == containment(frozenset(), long) == 0.0
+
+
+def test_query_finds_contained_names():
+    index = LSHIndex(ngram=3, bands=64, rows=1, squash=True)
+    for key, name in [("push_t", "T push-up"), ("push_standard", "Standard push-up"), ("plank", "Forearm plank")]:
+        index.add(key, name)
+    assert [key for _s, key in index.query("Push-Up", None)] == ["push_t", "push_standard"]
+    assert index.query("Push-Up", None, containment) == [(1.0, "push_t"), (1.0, "push_standard")]
+    assert index.query("", None) == []
+
+
+def test_query_matches_brute_force_above_threshold():
+    rng = random.Random(0)
+    words = ["push", "up", "plank", "side", "squat", "jump", "knee", "wall", "bridge", "glute"]
+    texts = {i: " ".join(rng.sample(words, rng.randint(1, 4))) for i in range(300)}
+    index = LSHIndex(ngram=3, bands=32, rows=2)
+    for key, text in texts.items():
+        index.add(key, text)
+    for probe in list(texts.values())[:40]:
+        found = dict((key, s) for s, key in index.query(probe, None))
+        hashes = index.shingles(probe)
+        for key, hashes_b in index.sets.items():
+            exact = jaccard(hashes, hashes_b)
+            if key in found:
+                assert found[key] == exact
+            # far above the (1/32)^(1/2) threshold: never missed
+            assert exact < 0.6 or key in found
@@ -0,0 +1,26 @@
+"""optimize_images.py: content-revisioned variant URLs."""
+
+import optimize_images
+from catalog import Catalog
+
+
+def test_variant_urls_follow_content(tmp_path):
+    formats = ("avif", "webp", "jpeg")
+    for width in optimize_images.WIDTHS:
+        for fmt in formats:
+            (tmp_path / optimize_images.variant_name("plank", width, fmt)).write_bytes(f"{width}{fmt}".encode())
+    url, srcset = optimize_images.srcset_fields("plank", formats, tmp_path)
+    assert url.startswith("/icons/exercises/plank-600.jpg?v=")
+    assert set(srcset) == {"image/avif", "image/webp"}
+
+    (tmp_path / "plank-600.jpg").write_bytes(b"regenerated")
+    new_url, new_srcset = optimize_images.srcset_fields("plank", formats, tmp_path)
+    assert new_url != url
+    assert new_srcset == srcset
+
+
+def test_catalog_urls_match_the_committed_variants():
+    ex = next(e for e in Catalog().records("core") if e.get("image_url"))
+    formats = [f for f in optimize_images.DEFAULT_FORMATS if f != optimize_images.FALLBACK_FORMAT]
+    expected = optimize_images.srcset_fields(ex["id"], [*formats, optimize_images.FALLBACK_FORMAT])
+    assert (ex["image_url"], ex["image_srcset"]) == expected
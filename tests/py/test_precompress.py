@@ -0,0 +1,63 @@
+"""precompress.py: deterministic siblings, dropped when useless, rewritten only when stale."""
+
+import gzip
+import os
+import random
+
+import precompress
+from precompress import clean, precompress as pack, sibling
+
+TEXT = b"const steps = ['warm-up', 'push', 'pull', 'squat'];\n" * 200
+
+
+def test_gzip_round_trip_is_deterministic(tmp_path):
+    path = tmp_path / "app.js"
+    path.write_bytes(TEXT)
+    sizes, written = pack(path, ("gz",))
+    first = sibling(path, "gz").read_bytes()
+    assert written == 1 and sizes == {"gz": len(first)} and len(first) < len(TEXT)
+    assert gzip.decompress(first) == TEXT
+
+    pack(path, ("gz",), force=True)
+    assert sibling(path, "gz").read_bytes() == first         # mtime 0: byte-identical
+
+
+def test_sibling_is_dropped_when_not_smaller(tmp_path):
+    path = tmp_path / "noise.wasm"
+    path.write_bytes(random.Random(0).randbytes(4096))
+    sibling(path, "gz").write_bytes(b"stale")
+    os.utime(sibling(path, "gz"), (0, 0))
+    assert pack(path, ("gz",)) == ({"gz": 4096}, 0)
+    assert not sibling(path, "gz").exists()
+
+
+def test_up_to_date_siblings_are_kept(tmp_path, monkeypatch):
+    path = tmp_path / "app.js"
+    path.write_bytes(TEXT)
+    pack(path, ("gz",))
+    out = sibling(path, "gz")
+    mtime = path.stat().st_mtime
+    os.utime(out, (mtime + 10, mtime + 10))
+
+    calls = []
+    monkeypatch.setattr(precompress, "compress", lambda *args: calls.append(args) or gzip.compress(args[0]))
+    assert pack(path, ("gz",)) == ({"gz": out.stat().st_size}, 0)
+    assert calls == []
+
+    os.utime(out, (mtime - 10, mtime - 10))                  # the source was edited since
+    assert pack(path, ("gz",))[1] == 1
+    assert pack(path, ("gz",), force=True)[1] == 1
+    assert len(calls) == 2
+
+
+def test_clean_only_removes_siblings_of_the_assets(tmp_path):
+    asset = tmp_path / "app.js"
+    asset.write_bytes(TEXT)
+    pack(asset, ("gz",))
+    sibling(asset, "br").write_bytes(b"br")
+    kept = [tmp_path / "data.json.gz", tmp_path / "backup.tar.gz"]
+    for path in kept:
+        path.write_bytes(b"not ours")
+
+    assert sorted(clean([asset])) == [sibling(asset, "br"), sibling(asset, "gz")]
+    assert sorted(tmp_path.iterdir()) == sorted([asset, *kept])
@@ -0,0 +1,81 @@
+"""simulate_sessions.py: rules read from the Rust sources, comparison with the Rust plans."""
+
+import pytest
+
+import coverage_matrix
+import simulate_sessions as sim
+from validate_catalog import SchemaError
+
+FIXTURE_EXERCISE = {
+    "id": "push_1", "category": "push", "movement_pattern": "horizontal_push", "difficulty": 1,
+    "duration_s": 30, "equipment_required": False, "postpartum_only": False, "contraindications": [],
+}
+
+
+def profile(**overrides):
+    return {"age_bracket": "under_35", "fitness_level": "beginner", "is_postpartum": False,
+            "injury_notes": [], "minutes_per_session": 30, "has_anchor": False, **overrides}
+
+
+def test_level_rules_come_from_program_and_profile_rs():
+    assert sim.LEVELS == {"beginner": (2, 8, 2), "intermediate": (3, 12, 3)}
+    assert sim.REST_S == {"beginner": 60, "intermediate": 45}
+    # age_45_plus_gets_longer_rest in src/program.rs
+    assert sim.sets_rest_reps(profile(age_bracket="45_plus")) == (2, 75, 8)
+    assert sim.max_difficulty(profile(age_bracket="45_plus")) == 1
+    assert sim.CATEGORIES == ("push", "pull", "squat", "hinge", "core", "mobility")
+    # post-partum: core first, for the pelvic-floor exercises
+    assert sim.PRIORITY == {False: sim.CATEGORIES, True: ("core", "mobility", "hinge", "squat", "push", "pull")}
+    assert sim.AGE_BRACKETS == ("under_35", "35_44", "45_plus")
+    assert (sim.DEFAULT_REPS, sim.SECONDS_PER_REP) == (10, 3)
+
+
+def test_priority_order_follows_program_rs(tmp_path):
+    source = sim.PROGRAM_RS.read_text(encoding="utf-8")
+    edited = tmp_path / "program.rs"
+    edited.write_text(source.replace("Category::Core,\n                Category::Mobility,",
+                                     "Category::Mobility,\n                Category::Core,", 1), encoding="utf-8")
+    assert sim.priority_order(edited)[True][:2] == ("mobility", "core")
+    assert sim.priority_order(edited)[False] == sim.PRIORITY[False]
+    edited.write_text(source.replace("priority_order", "order"), encoding="utf-8")
+    with pytest.raises(SchemaError):
+        sim.priority_order(edited)
+
+
+def test_rust_arms(tmp_path):
+    source = tmp_path / "lib.rs"
+    source.write_text(
+        "impl P {\n"
+        "    fn rule(&self) -> (u8, u32) {\n"
+        "        match self.level {\n"
+        "            Level::Low => (2, LOW_S), // comment\n"
+        "            Level::High => (3, HIGH_S),\n"
+        "        }\n"
+        "    }\n"
+        "}\n",
+        encoding="utf-8",
+    )
+    assert sim.rust_arms(source, "rule", "Level") == {"Low": "(2, LOW_S)", "High": "(3, HIGH_S)"}
+    with pytest.raises(SchemaError):
+        sim.rust_arms(source, "missing", "Level")
+
+
+def test_onboarding_choices_are_shared():
+    assert sim.INJURIES == coverage_matrix.UI_INJURIES == ("lower_back", "knee", "shoulder", "wrist")
+    assert sim.MINUTE_OPTIONS == (15, 20, 30, 45, 60)
+
+
+def test_compare_rust_reports_differing_plans():
+    rust_plan = sim.build_session(profile(), [FIXTURE_EXERCISE], 0)
+    case = {"catalog": "full", "profile": profile(), "day_seed": 0, "plan": rust_plan}
+    fixtures = {"catalogs": {"full": [FIXTURE_EXERCISE]}, "cases": [case]}
+    assert sim.compare_rust(fixtures, []) == []
+
+    case["plan"] = [{**rust_plan[0], "rest_s": 61}]
+    assert len(sim.compare_rust(fixtures, [])) == 1
+
+
+def test_compare_rust_filters_anchored_exercises():
+    anchored = {**FIXTURE_EXERCISE, "requires_anchor": True}
+    case = {"catalog": "catalog", "profile": profile(), "day_seed": 0, "plan": []}
+    assert sim.compare_rust({"catalogs": {}, "cases": [case]}, [anchored]) == []
@@ -0,0 +1,104 @@
+"""validate_catalog.py: the schema compiled from Rust source, on a synthetic struct and the real catalog."""
+
+import pytest
+
+from catalog import Catalog
+from validate_catalog import SchemaError, check_records, compile_type, load_schema, parse_rust
+
+SOURCE = """
+#[derive(Deserialize)]
+#[serde(rename_all = "snake_case")]
+pub enum Level {
+    Easy,
+    HardCore, // comment
+}
+
+#[derive(Deserialize)]
+#[serde(rename_all = "snake_case")]
+pub enum Tag {
+    Knee,
+    #[serde(rename = "lower_back")]
+    LowerBack,
+    #[serde(other)]
+    Other,
+}
+
+#[derive(Deserialize)]
+pub struct Exercise {
+    pub id: String,
+    pub level: Level,
+    pub sets: u8,
+    pub timed: bool,
+    pub duration_s: Option<u32>,
+    #[serde(default)]
+    pub tags: Vec<Tag>,
+}
+"""
+
+RECORD = {"id": "a", "level": "hard_core", "sets": 3, "timed": False, "duration_s": None, "tags": ["knee"]}
+
+
+@pytest.fixture
+def schema(tmp_path):
+    source = tmp_path / "exercise.rs"
+    source.write_text(SOURCE, encoding="utf-8")
+    return load_schema(source)
+
+
+def check(schema, **fields):
+    return check_records([{**RECORD, **fields}], "t.json", schema)
+
+
+def test_parse_rust():
+    enums, fields = parse_rust(SOURCE)
+    assert enums == {"Level": (("easy", "hard_core"), None), "Tag": (("knee", "lower_back"), "Other")}
+    assert fields["tags"] == ("Vec<Tag>", True)
+    assert fields["duration_s"] == ("Option<u32>", False)
+
+
+def test_valid_record(schema):
+    assert check(schema) == ([], [])
+
+
+def test_missing_field_unless_defaulted(schema):
+    record = {k: v for k, v in RECORD.items() if k not in ("sets", "tags", "duration_s")}
+    errors, _ = check_records([record], "t.json", schema)
+    assert errors == ["t.json[0] a: missing field 'sets'"]
+
+
+def test_unknown_enum_value_unless_other(schema):
+    assert check(schema, level="expert")[0] == ["t.json[0] a: level: 'expert' is not a Level (easy, hard_core)"]
+    assert check(schema, tags=["knee", "elbow"]) == ([], ["t.json[0] a: tags: 'elbow' is not a known Tag (read as Other)"])
+    assert check(schema, tags=["knee", 3])[0] == ["t.json[0] a: tags: [1] expected a Tag string, got 3"]
+
+
+def test_integers(schema):
+    assert check(schema, sets=255) == ([], [])
+    assert check(schema, sets=256)[0] == ["t.json[0] a: sets: 256 out of range for u8"]
+    assert check(schema, sets=-1)[0] == ["t.json[0] a: sets: -1 out of range for u8"]
+    assert check(schema, sets=True)[0] == ["t.json[0] a: sets: expected an integer (u8), got True"]
+    assert check(schema, timed=1)[0] == ["t.json[0] a: timed: expected true/false, got 1"]
+
+
+def test_option_accepts_none(schema):
+    assert check(schema, duration_s=None) == ([], [])
+    assert check(schema, duration_s=45) == ([], [])
+    assert check(schema, duration_s="45")[0] == ["t.json[0] a: duration_s: expected an integer (u32), got '45'"]
+
+
+def test_unsupported_type():
+    with pytest.raises(SchemaError, match="unsupported Rust type 'f32'"):
+        compile_type("Option<f32>", {})
+    with pytest.raises(SchemaError, match="struct Exercise not found"):
+        parse_rust("pub struct Other {\n    pub id: String,\n}\n")
+
+
+def test_not_a_list_or_object(schema):
+    assert check_records({}, "t.json", schema) == (["t.json: expected a JSON array"], [])
+    assert check_records(["x"], "t.json", schema)[0] == ["t.json[0]: expected an object"]
+
+
+def test_committed_catalog_is_clean():
+    catalog = Catalog()
+    for category in catalog.categories:
+        assert check_records(catalog.records(category), category) == ([], [])
@@ -8,9 +8,10 @@
  *  4. Enregistrer le Service Worker
  */
 
-import init, { build_session } from 'oops';
+import init, { Planner } from 'oops';
 import { initI18n, t, getLang } from './i18n.js';
 import { isWorkoutDay } from './schedule.js';
+import { loadCatalog, nextUnmastered } from './catalog.js';
 import { getProfile, saveProfile, getSetting, setSetting, resetAll, saveSession, getTodaySession, getCurrentStreak, getRecentSessions } from './db.js';
 import { renderDisclaimer } from './ui/disclaimer.js';
 import { renderOnboarding } from './ui/onboarding.js';
@@ -47,6 +48,9 @@ if ('serviceWorker' in navigator) {
 const state = {
   profile: null,
   exercises: [],       // catalogue complet
+  exerciseIndex: {},   // id → index dans exercises (précalculé par build_bundle.py)
+  planner: null,       // Planner WASM (index d'éligibilité compact, chargé une fois)
+  thumbs: null,        // atlas de vignettes des listes (build_atlas.py), ou null
   currentPlan: null,   // SessionPlan JSON (objet parsé)
   soundEnabled: false, // préférence UI, lue depuis settings table
   wasmReady: false,
@@ -96,29 +100,25 @@ async function navigateTo(screen) {
 // ────────────────────────────────────────────────
 // Chargement catalogue d'exercices
 // ────────────────────────────────────────────────
-async function loadExercises() {
-  const categories = ['push', 'pull', 'squat', 'hinge', 'core', 'mobility'];
-  const results = await Promise.all(
-    categories.map((cat) =>
-      fetch(`/data/exercises/${cat}.json`)
-        .then((r) => {
-          if (!r.ok) throw new Error(`HTTP ${r.status} pour ${cat}.json`);
-          return r.json();
-        })
-        .catch((err) => {
-          console.error(`[app] Erreur chargement ${cat}:`, err);
-          return [];
-        })
-    )
-  );
-  return results.flat();
+async function loadExercises(lang) {
+  try {
+    const { exercises, index, planner, thumbs } = await loadCatalog(lang);
+    state.exerciseIndex = index;
+    state.thumbs = thumbs;
+    // Les champs structurels ne dépendent pas de la langue : un seul Planner
+    state.planner ??= new Planner(JSON.stringify(planner));
+    return exercises;
+  } catch (err) {
+    console.error('[app] Erreur chargement catalogue:', err);
+    state.exerciseIndex = {};
+    return [];
+  }
 }
 
-// ────────────────────────────────────────────────
-// Filtrage exercices selon profil
-// ────────────────────────────────────────────────
-function getFilteredExercises(exercises, profile) {
-  return exercises.filter((ex) => !ex.requires_anchor || profile.has_anchor);
+/** Séance du jour `daySeed` (plan vide si le catalogue n'a pas pu être chargé). */
+function buildPlan(profileJson, daySeed) {
+  if (!state.planner) return { exercises: [] };
+  return JSON.parse(state.planner.build_session(profileJson, daySeed));
 }
 
 // ────────────────────────────────────────────────
@@ -143,21 +143,18 @@ function applyDeload(plan) {
 
 /**
  * Avance chaque exercice du plan vers sa progression si l'exercice est maîtrisé.
- * Parcourt la chaîne progression_to récursivement.
+ * Chaîne précalculée (progression_path) + index id → exercice : O(1) par exercice.
  */
 function applyProgressions(plan, profile) {
   if (!plan) return plan;
   const mastered = new Set(profile.mastered_exercises ?? []);
   if (mastered.size === 0) return plan;
 
-  const exerciseMap = Object.fromEntries(state.exercises.map((e) => [e.id, e]));
   return {
     ...plan,
     exercises: plan.exercises.map((ex) => {
-      let id = ex.exercise_id;
-      while (exerciseMap[id]?.progression_to && mastered.has(id)) {
-        id = exerciseMap[id].progression_to;
-      }
+      const info = state.exercises[state.exerciseIndex[ex.exercise_id]];
+      const id = info ? nextUnmastered(info, mastered) : ex.exercise_id;
       return id === ex.exercise_id ? ex : { ...ex, exercise_id: id };
     }),
   };
@@ -166,21 +163,17 @@ function applyProgressions(plan, profile) {
 // ────────────────────────────────────────────────
 // Génération de séances (aujourd'hui + aperçu semaine)
 // ────────────────────────────────────────────────
-export function generateTodayPlan(profile, exercises) {
+export function generateTodayPlan(profile) {
   const daySeed = Math.floor(Date.now() / 86_400_000);
-  const planJson = build_session(
-    JSON.stringify(profile),
-    JSON.stringify(exercises),
-    daySeed
-  );
-  return JSON.parse(planJson);
+  return buildPlan(JSON.stringify(profile), daySeed);
 }
 
 /** Génère un aperçu des 7 prochains jours (index 0 = aujourd'hui). */
-function generateWeekPreview(profile, exercises) {
+function generateWeekPreview(profile) {
   const dayMs = 86_400_000;
   const now = Date.now();
   const preview = [];
+  const profileJson = JSON.stringify(profile);
 
   for (let i = 0; i < 7; i++) {
     const dayTs = now + i * dayMs;
@@ -191,7 +184,7 @@ function generateWeekPreview(profile, exercises) {
     let plan = null;
     if (isWorkout) {
       try {
-        plan = JSON.parse(build_session(JSON.stringify(profile), JSON.stringify(exercises), daySeed));
+        plan = buildPlan(profileJson, daySeed);
       } catch (e) {
         console.warn('[app] generateWeekPreview error day', i, e);
       }
@@ -224,8 +217,8 @@ async function boot() {
   await initI18n(lang);
   $msg.textContent = t('app.loading') ?? 'Chargement des exercices…';
 
-  // 4. Exercices
-  state.exercises = await loadExercises();
+  // 4. Exercices (bundle + textes de la langue active)
+  state.exercises = await loadExercises(lang);
 
   // 5. Service Worker
   if ('serviceWorker' in navigator) {
@@ -276,8 +269,7 @@ async function routeToHome() {
     getCurrentStreak(),
   ]);
 
-  const filteredExercises = getFilteredExercises(state.exercises, state.profile);
-  const weekPreview = generateWeekPreview(state.profile, filteredExercises);
+  const weekPreview = generateWeekPreview(state.profile);
   const todayEntry = weekPreview[0];
 
   const deload = isDeloadWeek(state.profile);
@@ -302,6 +294,7 @@ async function routeToHome() {
     streak,
     lang: getLang(),
     exercises: state.exercises,
+    thumbs: state.thumbs,
     weekPreview,
     onStartSession: () => startSession(),
     onQuickSession: () => startQuickSession(),
@@ -356,11 +349,10 @@ function startSession() {
 }
 
 function startQuickSession() {
-  const filteredExercises = getFilteredExercises(state.exercises, state.profile);
   const daySeed = Math.floor(Date.now() / 86_400_000);
   let plan;
   try {
-    plan = JSON.parse(build_session(JSON.stringify(state.profile), JSON.stringify(filteredExercises), daySeed));
+    plan = buildPlan(JSON.stringify(state.profile), daySeed);
   } catch (e) {
     console.error('[app] startQuickSession error:', e);
     return;
@@ -381,6 +373,7 @@ function openSettings() {
       await setSetting('sound_enabled', val);
     },
     onLangChange: async (newLang) => {
+      state.exercises = await loadExercises(newLang);
       await routeToHome();
       showScreen('settings');
       openSettings();
@@ -409,6 +402,7 @@ function openProfileEdit() {
       if (langChanged) {
         await initI18n(updatedProfile.lang);
         await setSetting('lang', updatedProfile.lang);
+        state.exercises = await loadExercises(updatedProfile.lang);
       }
       await routeToHome();
     },
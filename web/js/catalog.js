@@ -0,0 +1,111 @@
+/**
+ * catalog.js — Chargement du catalogue d'exercices compilé
+ *
+ * Le catalogue est produit par scripts/build_bundle.py :
+ *  - /data/catalog.json                : champs structurels, enums internés, index id → ligne
+ *  - /locales/exercises.<lang>.json    : noms + consignes d'une seule langue, par id
+ *
+ * Deux requêtes au démarrage (au lieu de six fichiers par catégorie),
+ * et seule la langue active est téléchargée.
+ */
+
+const TEXT_FIELDS = ['name', 'instructions'];
+
+/**
+ * Reconstruit les objets exercice (même forme que web/data/exercises/*.json)
+ * à partir du bundle et de la table de textes de la langue active.
+ * Seuls `name_<lang>` et `instructions_<lang>` sont renseignés ; un id absent
+ * de la table s'affiche sous son id.
+ *
+ * @param {object} bundle  - contenu de catalog.json
+ * @param {object|null} strings - contenu de exercises.<lang>.json
+ * @param {string} lang
+ * @returns {object[]}
+ */
+export function decodeCatalog(bundle, strings, lang) {
+  const { fields, enums, rows } = bundle;
+  const texts = strings?.exercises ?? {};
+  if (strings && strings.hash !== bundle.hash) {
+    console.warn(`[catalog] exercises.${lang}.json (${strings.hash}) ≠ bundle ${bundle.hash}`);
+  }
+
+  return rows.map((row) => {
+    const ex = {};
+    fields.forEach((field, f) => {
+      const value = row[f];
+      if (value === null || value === undefined) return;
+      const table = enums[field];
+      if (!table) ex[field] = value;
+      else ex[field] = Array.isArray(value) ? value.map((v) => table[v]) : table[value];
+    });
+    for (const field of TEXT_FIELDS) {
+      ex[`${field}_${lang}`] = texts[ex.id]?.[field] ?? '';
+    }
+    if (!ex[`name_${lang}`]) ex[`name_${lang}`] = ex.id;
+    return ex;
+  });
+}
+
+/**
+ * Exercice à proposer à la place de `ex` : le premier échelon non maîtrisé
+ * de sa chaîne (ex lui-même s'il ne l'est pas), sinon le sommet.
+ * `progression_path` est précalculé par add_progressions.py : pas de
+ * parcours de progression_to à l'exécution.
+ *
+ * @param {object} ex - exercice décodé
+ * @param {Set<string>} mastered - ids maîtrisés
+ * @returns {string} id
+ */
+export function nextUnmastered(ex, mastered) {
+  if (!mastered.has(ex.id) || !ex.progression_path?.length) return ex.id;
+  return ex.progression_path.find((id) => !mastered.has(id)) ?? ex.progression_path.at(-1);
+}
+
+/**
+ * Style inline d'une vignette de l'atlas (scripts/build_atlas.py) : le panneau 1
+ * de l'illustration, découpé dans la planche partagée. Chaîne vide si l'atlas
+ * n'est pas construit ou si l'exercice n'y figure pas.
+ *
+ * @param {object|null} thumbs - section `thumbs` du bundle
+ * @param {string} id
+ * @param {number} size - côté affiché en px CSS
+ * @returns {string}
+ */
+export function thumbStyle(thumbs, id, size) {
+  const entry = thumbs?.thumbs[id];
+  if (!entry) return '';
+  const [sheet, x, y] = entry;
+  const { url, width, height } = thumbs.sheets[sheet];
+  const scale = size / thumbs.cell;
+  return `width:${size}px;height:${size}px;background-image:url(${url});`
+    + `background-position:-${x * scale}px -${y * scale}px;background-size:${width * scale}px ${height * scale}px`;
+}
+
+async function fetchJson(url) {
+  const r = await fetch(url);
+  if (!r.ok) throw new Error(`HTTP ${r.status} pour ${url}`);
+  return r.json();
+}
+
+/**
+ * Télécharge le bundle et la table de textes de la langue active (en parallèle).
+ * `index` (id → position dans `exercises`), `planner` (index d'éligibilité
+ * compact pour le Planner WASM) et `thumbs` (atlas de vignettes, ou null)
+ * sont précalculés par le build.
+ * @returns {Promise<{ exercises: object[], index: Record<string, number>, planner: object, thumbs: object|null }>}
+ */
+export async function loadCatalog(lang) {
+  const [bundle, strings] = await Promise.all([
+    fetchJson('/data/catalog.json'),
+    fetchJson(`/locales/exercises.${lang}.json`).catch((err) => {
+      console.error(`[catalog] Erreur chargement ${lang}:`, err);
+      return null;
+    }),
+  ]);
+  return {
+    exercises: decodeCatalog(bundle, strings, lang),
+    index: bundle.index,
+    planner: bundle.planner,
+    thumbs: bundle.thumbs ?? null,
+  };
+}
@@ -2,6 +2,10 @@
  * home.js — Écran d'accueil : séance du jour + aperçu semaine + streak
  */
 import { t, tRandom } from '../i18n.js';
+import { thumbStyle } from '../catalog.js';
+
+// Côté des vignettes de liste (px CSS) ; l'atlas est en 2x
+const THUMB_SIZE = 40;
 
 /**
  * @param {HTMLElement} container - #home-main
@@ -12,12 +16,13 @@ import { t, tRandom } from '../i18n.js';
  *   streak: number,
  *   lang: string,
  *   exercises: object[],      // catalogue complet
+ *   thumbs: object|null,      // atlas de vignettes (bundle.thumbs)
  *   weekPreview: object[],    // 7 jours [{ date, isWorkout, plan }]
  *   onStartSession: () => void,
  *   onOpenSettings: () => void,
  * }} opts
  */
-export function renderHome(container, { plan, todaySession, streak, lang, exercises, weekPreview, isDeload, onStartSession, onQuickSession }) {
+export function renderHome(container, { plan, todaySession, streak, lang, exercises, thumbs, weekPreview, isDeload, onStartSession, onQuickSession }) {
   const exerciseMap = Object.fromEntries(exercises.map((e) => [e.id, e]));
   const alreadyDone = !!todaySession;
   const today = new Date();
@@ -35,7 +40,7 @@ export function renderHome(container, { plan, todaySession, streak, lang, exerci
       const info = exerciseMap[ex.exercise_id];
       const name = info ? (lang === 'fr' ? info.name_fr : info.name_en) : ex.exercise_id;
       return `<div class="exercise-preview animate-in">
-        <span class="exercise-preview-dot"></span>
+        ${previewMarker(thumbs, ex.exercise_id)}
         <span>${name} — ${ex.sets}×${ex.reps ?? Math.round(ex.duration_s / 3)}${ex.reps ? ' reps' : 's'}</span>
       </div>`;
     })
@@ -127,7 +132,7 @@ export function renderHome(container, { plan, todaySession, streak, lang, exerci
         const name = info ? (lang === 'fr' ? info.name_fr : info.name_en) : ex.exercise_id;
         const spec = ex.reps ? `${ex.sets}×${ex.reps} reps` : `${ex.sets}×${ex.duration_s}s`;
         return `<div class="exercise-preview animate-in">
-          <span class="exercise-preview-dot"></span>
+          ${previewMarker(thumbs, ex.exercise_id)}
           <span>${name} — ${spec}</span>
         </div>`;
       }).join('');
@@ -172,6 +177,14 @@ function renderWeekPreview(weekPreview, lang) {
     </div>`;
 }
 
+/** Vignette de l'exercice (une seule planche pour toute la liste), sinon une pastille. */
+function previewMarker(thumbs, id) {
+  const style = thumbStyle(thumbs, id, THUMB_SIZE);
+  return style
+    ? `<span class="exercise-thumb" style="${style}" aria-hidden="true"></span>`
+    : '<span class="exercise-preview-dot"></span>';
+}
+
 function greeting(lang) {
   const h = new Date().getHours();
   if (lang === 'fr') {
@@ -54,6 +54,12 @@
 import { t } from '../i18n.js';
 import { setSoundsEnabled, scheduleCountdown, cancelCountdown, playClave, playTick, playSnare, playKick } from '../sounds.js';
 
+// Largeur affichée de .session-ex-img (max-height 180px, ratio 3:1) → choix 600w / 1200w
+const IMG_SIZES = '(max-width: 540px) 100vw, 540px';
+// Dimensions de la variante 1200w : réservent la hauteur avant le chargement
+const IMG_WIDTH = 1200;
+const IMG_HEIGHT = 396;
+
 /**
  * @param {HTMLElement} container - #screen-session
  * @param {{
@@ -128,6 +134,23 @@ export function renderSession(container, { plan, exercises, lang, soundEnabled,
     return info ? (lang === 'fr' ? info.instructions_fr : info.instructions_en) : '';
   }
 
+  /**
+   * Illustration de l'exercice : <picture> avec sources AVIF/WebP (image_srcset)
+   * et repli JPEG (image_url). Chaîne vide si l'exercice n'a pas d'image.
+   * L'aperçu flou (image_placeholder, ~200 o embarqués dans le catalogue) est
+   * peint en fond de l'<img> jusqu'à l'arrivée de l'illustration.
+   */
+  function exImage(ex, alt, loading = 'lazy') {
+    const info = getInfo(ex);
+    if (!info?.image_url) return '';
+    const sources = Object.entries(info.image_srcset ?? {})
+      .map(([type, srcset]) => `<source type="${type}" srcset="${srcset}" sizes="${IMG_SIZES}" />`)
+      .join('');
+    const placeholder = info.image_placeholder ? ` style="background-image:url(${info.image_placeholder})"` : '';
+    return `<picture>${sources}<img class="session-ex-img" src="${info.image_url}" alt="${alt}" `
+      + `width="${IMG_WIDTH}" height="${IMG_HEIGHT}" loading="${loading}"${placeholder} /></picture>`;
+  }
+
   function isTimed(ex) { return ex.reps == null && ex.duration_s != null; }
 
   /** Durée d'une série en secondes (reps × 3s ou durée iso) */
@@ -212,7 +235,6 @@ export function renderSession(container, { plan, exercises, lang, soundEnabled,
     stopAll();
     state.timeLeft = 15;
 
-    const imgUrl = getInfo(ex)?.image_url ?? null;
     const instructions = exInstructions(ex);
 
     $main.innerHTML = `
@@ -221,7 +243,7 @@ export function renderSession(container, { plan, exercises, lang, soundEnabled,
           <span class="session-ex-counter">${state.exIdx + 1} / ${state.activeList.length}</span>
           <span class="session-reading-label">${t('session.reading')}</span>
         </div>
-        ${imgUrl ? `<img class="session-ex-img" src="${imgUrl}" alt="${exName(ex)}" loading="lazy" />` : ''}
+        ${exImage(ex, exName(ex))}
         <div class="session-ex-name">${exName(ex)}</div>
         <div class="session-rest-timer" id="reading-timer">${state.timeLeft}s</div>
         ${instructions ? `<p class="session-ex-instructions">${instructions}</p>` : ''}
@@ -253,15 +275,13 @@ export function renderSession(container, { plan, exercises, lang, soundEnabled,
 
     state.timeLeft = setDuration(ex);
 
-    const imgUrl = getInfo(ex)?.image_url ?? null;
-
     $main.innerHTML = `
       <div class="session-exercise animate-in">
         <div class="session-ex-meta">
           <span class="session-ex-counter">${exLabel}</span>
           <span class="session-ex-setlabel">${setLabel}</span>
         </div>
-        ${imgUrl ? `<img class="session-ex-img" src="${imgUrl}" alt="${exName(ex)}" loading="lazy" />` : ''}
+        ${exImage(ex, exName(ex))}
         <div class="session-ex-name">${exName(ex)}</div>
         <div class="session-timer">
           <span class="session-timer-value" id="timer-value">${state.timeLeft}s</span>
@@ -340,14 +360,13 @@ export function renderSession(container, { plan, exercises, lang, soundEnabled,
     playSnare();
 
     const nextEx     = isBetweenEx ? state.activeList[state.exIdx] : null;
-    const nextImgUrl = nextEx ? (getInfo(nextEx)?.image_url ?? null) : null;
     const nextLabel  = nextExerciseName
       ? `${t('session.next_exercise')} : ${nextExerciseName}`
       : t('session.next_set');
 
     $main.innerHTML = `
       <div class="session-rest animate-in">
-        ${nextImgUrl ? `<img class="session-ex-img" src="${nextImgUrl}" alt="${nextExerciseName}" loading="eager" />` : ''}
+        ${nextEx ? exImage(nextEx, nextExerciseName, 'eager') : ''}
         <div class="session-rest-label">${t('session.rest')}</div>
         <div class="session-rest-timer" id="rest-timer">${state.timeLeft}s</div>
         <div class="session-rest-next">${nextLabel}</div>
@@ -1,67 +1,139 @@
 // Service Worker OOPS — cache offline de base
 // Phase 1 : offline shell + assets
 // Phase 3 : notifications push
+//
+// Précache révisionné : chaque fichier est mis en cache sous `<url>?__rev=<hash>`.
+// Une mise à jour ne télécharge que les fichiers dont le hash a changé, puis
+// l'activation supprime les révisions qui ne figurent plus dans le manifeste.
+//
+// Illustrations : cache d'exécution, cache-first sous leur URL complète
+// `/icons/exercises/<id>-<largeur>.<ext>?v=<hash>` (scripts/optimize_images.py).
+// Une image régénérée change d'URL dans catalog.json ; l'activation supprime
+// les illustrations que le catalogue précaché ne référence plus.
 
-const CACHE_VERSION = 'oops-v38';
+const PRECACHE = 'oops-precache';
+const RUNTIME = 'oops-runtime';
+const IMAGE_PREFIX = '/icons/exercises/';
 
-const PRECACHE_URLS = [
-  '/',
-  '/index.html',
-  '/manifest.json',
-  '/css/main.css',
-  '/js/app.js',
-  '/js/db.js',
-  '/js/version.js',
-  '/js/i18n.js',
-  '/js/schedule.js',
-  '/js/ui/disclaimer.js',
-  '/js/ui/onboarding.js',
-  '/js/ui/home.js',
-  '/js/ui/session.js',
-  '/js/ui/history.js',
-  '/js/ui/settings.js',
-  '/js/ui/about.js',
-  '/locales/fr.json',
-  '/locales/en.json',
-  // WASM (généré par wasm-pack)
-  '/pkg/oops.js',
-  '/pkg/oops_bg.wasm',
-  // Icônes
-  '/favicon.svg',
-  '/icons/logo.svg',
-  '/icons/icon-192.png',
-  '/icons/icon-512.png',
-  // Exercices
-  '/data/exercises/push.json',
-  '/data/exercises/pull.json',
-  '/data/exercises/squat.json',
-  '/data/exercises/hinge.json',
-  '/data/exercises/core.json',
-  '/data/exercises/mobility.json',
+// precache:start — généré par scripts/build_precache.py, ne pas éditer à la main
+const PRECACHE_MANIFEST = [
+  { url: '/css/main.css', revision: 'c338a8f03e' },
+  { url: '/data/catalog.json', revision: 'cfbbcc9d49' },
+  { url: '/favicon.svg', revision: '93574ddafb' },
+  { url: '/icons/atlas/thumbs-0.6d00a535.webp', revision: '6d00a53544' },
+  { url: '/icons/icon-192.png', revision: '15cbbbec4e' },
+  { url: '/icons/icon-512.png', revision: 'ac527f6a99' },
+  { url: '/icons/logo.svg', revision: '653542bedf' },
+  { url: '/index.html', revision: '49e45aa5bd' },
+  { url: '/js/app.js', revision: '13c050c3a3' },
+  { url: '/js/catalog.js', revision: 'e2b431e6ae' },
+  { url: '/js/db.js', revision: 'f04feda1c4' },
+  { url: '/js/i18n.js', revision: 'f606d95fd0' },
+  { url: '/js/schedule.js', revision: 'b67feab2ae' },
+  { url: '/js/sounds.js', revision: 'b1b3ba03e9' },
+  { url: '/js/ui/about.js', revision: '9f718135b8' },
+  { url: '/js/ui/disclaimer.js', revision: '2e669cd688' },
+  { url: '/js/ui/history.js', revision: '7e7a27b80d' },
+  { url: '/js/ui/home.js', revision: '586542b7c0' },
+  { url: '/js/ui/onboarding.js', revision: 'c16797ed30' },
+  { url: '/js/ui/profile.js', revision: 'dd1ba54995' },
+  { url: '/js/ui/session.js', revision: 'c51d9c7b7d' },
+  { url: '/js/ui/settings.js', revision: '877b86001c' },
+  { url: '/js/version.js', revision: '4f3bacbbf2' },
+  { url: '/locales/en.json', revision: '7e18ec3fd0' },
+  { url: '/locales/exercises.en.json', revision: 'eeb626e8f4' },
+  { url: '/locales/exercises.fr.json', revision: 'b6f665b4f3' },
+  { url: '/locales/fr.json', revision: '21563521b8' },
+  { url: '/manifest.json', revision: '5386f23ca3' },
+  { url: '/pkg/oops.js', revision: null },
+  { url: '/pkg/oops_bg.wasm', revision: null },
 ];
+// precache:end
 
-// ── Install : précache tous les assets ──
+const cacheKey = ({ url, revision }) => (revision ? `${url}?__rev=${revision}` : url);
+const PRECACHE_KEYS = new Map(PRECACHE_MANIFEST.map((entry) => [entry.url, cacheKey(entry)]));
+PRECACHE_KEYS.set('/', PRECACHE_KEYS.get('/index.html'));
+
+/**
+ * URL (chemin + requête) des illustrations référencées par le catalogue
+ * précaché (image_url et image_srcset) ; null si le catalogue est illisible.
+ */
+async function catalogImageUrls(precache) {
+  try {
+    const response = await precache.match(PRECACHE_KEYS.get('/data/catalog.json'));
+    const { fields, rows } = await response.json();
+    const urlColumn = fields.indexOf('image_url');
+    const srcsetColumn = fields.indexOf('image_srcset');
+    const urls = new Set();
+    for (const row of rows) {
+      if (row[urlColumn]) urls.add(row[urlColumn]);
+      for (const srcset of Object.values(row[srcsetColumn] ?? {})) {
+        for (const candidate of srcset.split(',')) urls.add(candidate.trim().split(/\s+/)[0]);
+      }
+    }
+    return urls;
+  } catch {
+    return null;
+  }
+}
+
+// ── Install : télécharge les seules révisions absentes du cache ──
 self.addEventListener('install', (event) => {
   event.waitUntil(
-    caches.open(CACHE_VERSION).then((cache) => {
+    caches.open(PRECACHE).then((cache) =>
       // On ignore les erreurs individuelles (ex: WASM pas encore buildé)
-      return Promise.allSettled(
-        PRECACHE_URLS.map((url) => cache.add(url).catch(() => null))
-      );
-    }).then(() => self.skipWaiting())
+      Promise.allSettled(
+        PRECACHE_MANIFEST.map(async (entry) => {
+          const key = cacheKey(entry);
+          if (entry.revision && (await cache.match(key))) return;
+          // `reload` : le cache HTTP pourrait rendre l'ancienne version
+          const response = await fetch(entry.url, { cache: 'reload' });
+          if (response.ok) await cache.put(key, response);
+        })
+      )
+    ).then(() => self.skipWaiting())
   );
 });
 
-// ── Activate : supprime les vieux caches ──
+/** Supprime du cache d'exécution les illustrations absentes du catalogue précaché. */
+async function pruneImages(precache) {
+  const current = await catalogImageUrls(precache);
+  if (!current || !(await caches.has(RUNTIME))) return;
+  const runtime = await caches.open(RUNTIME);
+  const requests = await runtime.keys();
+  await Promise.all(
+    requests
+      .filter((req) => {
+        const url = new URL(req.url);
+        return url.origin === self.location.origin
+          && url.pathname.startsWith(IMAGE_PREFIX)
+          && !current.has(url.pathname + url.search);
+      })
+      .map((req) => runtime.delete(req))
+  );
+}
+
+// ── Activate : supprime les révisions périmées, les anciennes illustrations et les anciens caches ──
 self.addEventListener('activate', (event) => {
+  const keep = new Set([...PRECACHE_KEYS.values()].map((key) => new URL(key, self.location.origin).href));
   event.waitUntil(
-    caches.keys().then((cacheNames) =>
-      Promise.all(
-        cacheNames
-          .filter((name) => name !== CACHE_VERSION)
-          .map((name) => caches.delete(name))
+    caches.keys()
+      .then((cacheNames) =>
+        Promise.all(
+          cacheNames
+            .filter((name) => name !== PRECACHE && name !== RUNTIME)
+            .map((name) => caches.delete(name))
+        )
       )
-    ).then(() => self.clients.claim())
+      .then(() => caches.open(PRECACHE))
+      .then((cache) =>
+        cache.keys()
+          .then((requests) =>
+            Promise.all(requests.filter((req) => !keep.has(req.url)).map((req) => cache.delete(req)))
+          )
+          .then(() => pruneImages(cache))
+      )
+      .then(() => self.clients.claim())
   );
 });
 
@@ -78,7 +150,7 @@ self.addEventListener('fetch', (event) => {
       fetch(event.request)
         .then((response) => {
           const clone = response.clone();
-          caches.open(CACHE_VERSION).then((c) => c.put(event.request, clone));
+          caches.open(RUNTIME).then((c) => c.put(event.request, clone));
           return response;
         })
         .catch(() => caches.match(event.request))
@@ -86,14 +158,25 @@ self.addEventListener('fetch', (event) => {
     return;
   }
 
-  // Assets locaux : cache-first
+  // Fichiers précachés : la révision du manifeste, sinon le réseau
+  const key = url.origin === self.location.origin && PRECACHE_KEYS.get(url.pathname);
+  if (key) {
+    event.respondWith(
+      caches.open(PRECACHE)
+        .then((cache) => cache.match(key))
+        .then((cached) => cached ?? fetch(event.request))
+    );
+    return;
+  }
+
+  // Autres assets locaux (illustrations, URL révisionnées par ?v=) : cache-first
   event.respondWith(
     caches.match(event.request).then((cached) => {
       if (cached) return cached;
       return fetch(event.request).then((response) => {
         if (response.ok) {
           const clone = response.clone();
-          caches.open(CACHE_VERSION).then((c) => c.put(event.request, clone));
+          caches.open(RUNTIME).then((c) => c.put(event.request, clone));
         }
         return response;
       });